@@ -9,6 +9,8 @@ from src.models.interview import db, Interview, Document, Question, Response
 from src.routes.user import user_bp
 from src.routes.interview import interview_bp
 from src.routes.settings import settings_bp
+from src.routes.monitoring import monitoring_bp
+from src.services.telemetry import telemetry
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 
@@ -30,6 +32,8 @@ else:
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(interview_bp, url_prefix='/api')
 app.register_blueprint(settings_bp, url_prefix='/api')
+app.register_blueprint(monitoring_bp, url_prefix='/api')
+telemetry.init_app(app)
 
 # Database configuration
 if IS_PRODUCTION:
@@ -52,6 +56,9 @@ if IS_PRODUCTION:
         print("Warning: DATABASE_URL not set, falling back to SQLite")
         os.makedirs('/tmp/database', exist_ok=True)
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////tmp/database/app.db'
+elif os.environ.get('DEV_DATABASE_URL'):
+    # A separate development database, e.g. a throwaway one for benchmarks
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DEV_DATABASE_URL']
 else:
     # Use SQLite for development
     os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
@@ -20,6 +20,10 @@ class Interview(db.Model):
     documents = db.relationship('Document', backref='interview', lazy=True, cascade='all, delete-orphan')
     questions = db.relationship('Question', backref='interview', lazy=True, cascade='all, delete-orphan')
     responses = db.relationship('Response', backref='interview', lazy=True, cascade='all, delete-orphan')
+    context_pack = db.relationship('InterviewContextPack', backref='interview', uselist=False,
+                                   cascade='all, delete-orphan')
+    rollup = db.relationship('InterviewRollup', backref='interview', uselist=False,
+                             cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Interview {self.id}: {self.candidate_name} for {self.position_title}>'
@@ -127,3 +131,127 @@ class Response(db.Model):
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
 
+
+class LLMCacheEntry(db.Model):
+    """Persistent tier of the LLM result cache (see services/llm_cache.py)."""
+    __tablename__ = 'llm_cache_entry'
+
+    cache_key = db.Column(db.String(64), primary_key=True)  # sha256 hex digest
+    operation = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    value = db.Column(db.Text, nullable=False)  # JSON string
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    hit_count = db.Column(db.Integer, default=0)
+
+    def __repr__(self):
+        return f'<LLMCacheEntry {self.cache_key[:12]}: {self.operation}>'
+
+class AnalysisJob(db.Model):
+    """Background job record (see services/jobs.py)."""
+    __tablename__ = 'analysis_job'
+
+    id = db.Column(db.String(36), primary_key=True)  # uuid4
+    interview_id = db.Column(db.Integer, db.ForeignKey('interview.id'), nullable=False)
+    job_type = db.Column(db.String(50), nullable=False)  # document_analysis
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    stage = db.Column(db.String(100), nullable=True)
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    result = db.Column(db.Text, nullable=True)  # JSON string
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<AnalysisJob {self.id}: {self.job_type} {self.status}>'
+
+    def to_dict(self, include_result=True):
+        data = {
+            'id': self.id,
+            'interview_id': self.interview_id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+        if include_result:
+            data['result'] = json.loads(self.result) if self.result else None
+        return data
+
+
+class InterviewContextPack(db.Model):
+    """Condensed resume/job context reused by the per-answer prompts (see services/context_pack.py)."""
+    __tablename__ = 'interview_context_pack'
+
+    interview_id = db.Column(db.Integer, db.ForeignKey('interview.id'), primary_key=True)
+    source = db.Column(db.String(20), nullable=False)  # analysis, local
+    pack = db.Column(db.Text, nullable=False)  # JSON: candidate_profile, job_requirements, key_probes
+    text = db.Column(db.Text, nullable=False)  # rendered prompt section
+    token_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<InterviewContextPack {self.interview_id}: {self.source}, {self.token_count} tokens>'
+
+    def to_dict(self):
+        return {
+            'interview_id': self.interview_id,
+            'source': self.source,
+            'pack': json.loads(self.pack) if self.pack else {},
+            'text': self.text,
+            'token_count': self.token_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class InterviewRollup(db.Model):
+    """Running per-response summaries and score aggregates (see services/interview_rollup.py)."""
+    __tablename__ = 'interview_rollup'
+
+    interview_id = db.Column(db.Integer, db.ForeignKey('interview.id'), primary_key=True)
+    response_count = db.Column(db.Integer, default=0)
+    score_total = db.Column(db.Float, default=0.0)
+    score_count = db.Column(db.Integer, default=0)
+    confidence_total = db.Column(db.Float, default=0.0)
+    confidence_count = db.Column(db.Integer, default=0)
+    star_counts = db.Column(db.Text, nullable=True)  # JSON: {component: responses where present}
+    strengths = db.Column(db.Text, nullable=True)  # JSON: {strength: times mentioned}
+    improvements = db.Column(db.Text, nullable=True)  # JSON: {improvement: times mentioned}
+    summaries = db.Column(db.Text, nullable=True)  # JSON array of the latest per-response summaries
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<InterviewRollup {self.interview_id}: {self.response_count} responses>'
+
+    def to_dict(self):
+        return {
+            'interview_id': self.interview_id,
+            'response_count': self.response_count,
+            'average_score': self.score_total / self.score_count if self.score_count else None,
+            'average_confidence': self.confidence_total / self.confidence_count if self.confidence_count else None,
+            'star_counts': json.loads(self.star_counts) if self.star_counts else {},
+            'strengths': json.loads(self.strengths) if self.strengths else {},
+            'improvements': json.loads(self.improvements) if self.improvements else {},
+            'summaries': json.loads(self.summaries) if self.summaries else [],
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class QuestionEmbedding(db.Model):
+    """Precomputed question vector for local semantic matching (see services/question_embeddings.py)."""
+    __tablename__ = 'question_embedding'
+
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), primary_key=True)
+    embedder = db.Column(db.String(50), nullable=False)  # embedder version the vector was computed with
+    dimensions = db.Column(db.Integer, nullable=False)
+    vector = db.Column(db.LargeBinary, nullable=False)  # float32, L2-normalized
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<QuestionEmbedding {self.question_id}: {self.embedder}>'
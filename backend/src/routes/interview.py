@@ -1,21 +1,51 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from werkzeug.utils import secure_filename
 import os
 import json
 from datetime import datetime
 
-from src.models.interview import db, Interview, Document, Question, Response
-from src.services.ai_service_simple import AIService, COMMON_HR_QUESTIONS
+from src.models.interview import db, Interview, Document, Question, Response, AnalysisJob
+from src.services.ai_service_simple import AIService, COMMON_HR_QUESTIONS, FALLBACK_DOCUMENT_ANALYSIS
 from src.services.document_service_simple import DocumentService, TranscriptionService
 from src.services.ai_service_enhanced import EnhancedAIService
 from src.services.ai_service_contextual import ContextualQuestionGenerator
+from src.services.ai_executor import run_concurrently
+from src.services.context_pack import (
+    get_context_text, invalidate_context_pack, pack_from_analysis, pack_from_documents, save_context_pack
+)
+from src.services.deadline import deadline_scope, stage
+from src.services.interview_rollup import get_rollup, record_response, rollup_payload
+from src.services.live_analysis import create_live_analysis_store
+from src.services.question_embeddings import store_question_embeddings
+from src.services.question_index import question_indexes
+from src.services.question_stream import transcript_streams
+from src.services.jobs import job_runner
+from src.services.llm_clients import llm_clients
+from src.services.singleflight import single_flight
 
 interview_bp = Blueprint('interview', __name__)
 
+# Issue the two per-response analyses in parallel instead of back-to-back
+CONCURRENT_RESPONSE_ANALYSIS = os.environ.get('CONCURRENT_RESPONSE_ANALYSIS', 'true').lower() != 'false'
+RESPONSE_ANALYSIS_TIMEOUT = float(os.environ.get('RESPONSE_ANALYSIS_TIMEOUT', 120))
+
+# Analyze documents and generate questions in one structured request before falling back to the chain
+COMBINED_DOCUMENT_ANALYSIS = os.environ.get('COMBINED_DOCUMENT_ANALYSIS', 'true').lower() != 'false'
+
+# Time budgets for AI work; synchronous requests must finish inside gunicorn's worker timeout (30s by default)
+ANALYZE_DEADLINE_SECONDS = float(os.environ.get('ANALYZE_DEADLINE_SECONDS', 25))
+ANALYZE_JOB_DEADLINE_SECONDS = float(os.environ.get('ANALYZE_JOB_DEADLINE_SECONDS', 180))
+RESPONSE_DEADLINE_SECONDS = float(os.environ.get('RESPONSE_DEADLINE_SECONDS', 20))
+LIVE_ANALYSIS_DEADLINE_SECONDS = float(os.environ.get('LIVE_ANALYSIS_DEADLINE_SECONDS', 8))
+COMPLETE_DEADLINE_SECONDS = float(os.environ.get('COMPLETE_DEADLINE_SECONDS', 15))
+# Seconds held back from the LLM stages for the local fallback and saving results
+LOCAL_FALLBACK_RESERVE_SECONDS = float(os.environ.get('LOCAL_FALLBACK_RESERVE_SECONDS', 2))
+
 # Initialize services
 ai_service = AIService()
 enhanced_ai_service = EnhancedAIService()
 contextual_generator = ContextualQuestionGenerator()
+live_analysis_store = create_live_analysis_store(enhanced_ai_service)
 document_service = DocumentService()
 transcription_service = TranscriptionService()
 
@@ -73,12 +103,11 @@ def list_interviews():
         return jsonify({'error': str(e)}), 500
 
 @interview_bp.route('/interviews/<int:interview_id>/documents', methods=['POST'])
-def upload_document():
+def upload_document(interview_id):
     """Upload a document for an interview."""
     try:
-        print(f"DEBUG: Upload request received for interview {request.view_args.get('interview_id')}")
+        print(f"DEBUG: Upload request received for interview {interview_id}")
         
-        interview_id = request.view_args['interview_id']
         interview = Interview.query.get_or_404(interview_id)
         
         print(f"DEBUG: Interview found: {interview.id}")
@@ -130,6 +159,7 @@ def upload_document():
         print("DEBUG: Adding document to database")
         
         db.session.add(document)
+        invalidate_context_pack(interview_id)
         db.session.commit()
         
         print("DEBUG: Document saved successfully")
@@ -144,10 +174,9 @@ def upload_document():
         return jsonify({'error': str(e)}), 500
 
 @interview_bp.route('/interviews/<int:interview_id>/job-url', methods=['POST'])
-def add_job_url():
+def add_job_url(interview_id):
     """Add job posting from URL."""
     try:
-        interview_id = request.view_args['interview_id']
         interview = Interview.query.get_or_404(interview_id)
         
         data = request.get_json()
@@ -182,6 +211,7 @@ def add_job_url():
             )
             db.session.add(document)
         
+        invalidate_context_pack(interview_id)
         db.session.commit()
         
         return jsonify({
@@ -193,103 +223,197 @@ def add_job_url():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _run_document_analysis(interview_id, report_progress=None):
+    """Run the document analysis and question generation chain for an interview.
+    
+    Shared by the synchronous /analyze request and the background job. Returns the
+    response payload; report_progress(stage, percent) is called between stages.
+    Each LLM stage gets a share of the current deadline, and the local contextual
+    generator runs once the budget is gone.
+    """
+    report = report_progress or (lambda stage, progress: None)
+    
+    print(f"Starting analysis for interview {interview_id}")
+    interview = Interview.query.get_or_404(interview_id)
+    
+    # Get documents
+    documents = {doc.document_type: doc for doc in interview.documents}
+    
+    resume_text = documents['resume'].extracted_text
+    job_listing_text = documents['job_listing'].extracted_text
+    company_questions = documents['questions'].extracted_text if 'questions' in documents else ''
+    
+    print(f"Documents loaded - Resume: {len(resume_text)} chars, Job: {len(job_listing_text)} chars")
+    
+    # Check if an LLM provider is configured (OpenAI, Bedrock, or the local mock server)
+    api_key_configured = llm_clients.active_provider() is not None
+    print(f"LLM provider configured: {api_key_configured}")
+    
+    # Try a single structured call for analysis and questions; keep the multi-call chain as fallback
+    combined = None
+    if api_key_configured and COMBINED_DOCUMENT_ANALYSIS:
+        report('analyzing_documents_and_questions', 10)
+        print("Using single structured call for analysis and question generation...")
+        # One large completion needs the whole budget; the frontend runs this as an async job for that reason
+        with stage('combined_analysis', reserve=LOCAL_FALLBACK_RESERVE_SECONDS):
+            combined = ai_service.analyze_and_generate_questions(resume_text, job_listing_text, company_questions, num_questions=7)
+    
+    if combined:
+        analysis_result = combined['analysis']
+        print(f"Combined analysis complete with {len(combined['questions'])} questions")
+    else:
+        # Analyze documents
+        report('analyzing_documents', 20)
+        with stage('analyze_documents', fraction=0.4, reserve=LOCAL_FALLBACK_RESERVE_SECONDS):
+            analysis_result = ai_service.analyze_documents(resume_text, job_listing_text, company_questions)
+        print(f"Analysis complete: {list(analysis_result.keys())}")
+    
+    # Store analysis results
+    documents['resume'].analysis_result = json.dumps(analysis_result)
+    
+    # Condense them into the context pack that the per-response prompts reuse
+    if analysis_result != FALLBACK_DOCUMENT_ANALYSIS:
+        save_context_pack(interview_id, pack_from_analysis(analysis_result, interview.position_title), 'analysis')
+    else:
+        save_context_pack(interview_id, pack_from_documents(resume_text, job_listing_text, interview.position_title), 'local')
+    
+    # Generate questions - prioritize OpenAI if configured
+    generated_questions = combined['questions'] if combined else []
+    
+    if api_key_configured and not generated_questions:
+        # Generate questions from the analysis
+        try:
+            report('generating_analysis_questions', 60)
+            print("Generating questions from the document analysis...")
+            with stage('analysis_questions', reserve=LOCAL_FALLBACK_RESERVE_SECONDS):
+                generated_questions = ai_service.generate_interview_questions(analysis_result, num_questions=7)
+            print(f"Generated {len(generated_questions)} analysis-based questions")
+        except Exception as e:
+            print(f"Analysis-based generation failed: {str(e)}")
+    
+    # Fallback to contextual generator if OpenAI fails or is not configured
+    if not generated_questions:
+        try:
+            report('generating_contextual_questions', 80)
+            print("Using contextual pattern matching for question generation...")
+            contextual_questions = contextual_generator.generate_contextual_questions(resume_text, job_listing_text)
+            generated_questions = contextual_questions[:7]
+            print(f"Generated {len(generated_questions)} questions using contextual patterns")
+        except Exception as e:
+            print(f"Contextual generation also failed: {str(e)}")
+            # Last resort - use default questions
+            generated_questions = []
+    
+    report('saving_questions', 90)
+    
+    # Save generated questions
+    saved_questions = []
+    for i, q_data in enumerate(generated_questions):
+        question = Question(
+            interview_id=interview_id,
+            text=q_data['text'],
+            category=q_data['category'],
+            is_generated=True,
+            order_index=i
+        )
+        db.session.add(question)
+        saved_questions.append(question)
+    
+    # Add common HR questions as options
+    for i, q_data in enumerate(COMMON_HR_QUESTIONS[:5]):
+        question = Question(
+            interview_id=interview_id,
+            text=q_data['text'],
+            category=q_data['category'],
+            is_generated=False,
+            order_index=i + 10  # Offset to separate from generated questions
+        )
+        db.session.add(question)
+        saved_questions.append(question)
+    
+    # Store the question vectors for semantic matching alongside the questions
+    db.session.flush()
+    store_question_embeddings(saved_questions)
+    db.session.commit()
+    question_indexes.build(interview_id)
+    
+    return {
+        'message': 'Analysis completed successfully',
+        'analysis': analysis_result,
+        'generated_questions': generated_questions,
+        'total_questions': len(generated_questions) + len(COMMON_HR_QUESTIONS[:5])
+    }
+
+def _run_document_analysis_with_deadline(interview_id, deadline_seconds, report_progress=None):
+    """Run the analysis chain under a deadline of deadline_seconds."""
+    with deadline_scope(deadline_seconds, 'analyze_documents'):
+        return _run_document_analysis(interview_id, report_progress)
+
 @interview_bp.route('/interviews/<int:interview_id>/analyze', methods=['POST'])
 def analyze_documents(interview_id):
-    """Analyze uploaded documents and generate questions."""
+    """Analyze uploaded documents and generate questions.
+    
+    Pass ?async=true (or {"async": true}) to run the chain as a background job;
+    the request then returns 202 with a job to poll at /jobs/<job_id>.
+    """
     try:
-        print(f"Starting analysis for interview {interview_id}")
         interview = Interview.query.get_or_404(interview_id)
         
-        # Get documents
-        documents = {doc.document_type: doc for doc in interview.documents}
-        
-        if 'resume' not in documents or 'job_listing' not in documents:
+        document_types = {doc.document_type for doc in interview.documents}
+        if 'resume' not in document_types or 'job_listing' not in document_types:
             return jsonify({'error': 'Both resume and job listing are required for analysis'}), 400
         
-        resume_text = documents['resume'].extracted_text
-        job_listing_text = documents['job_listing'].extracted_text
-        company_questions = documents.get('questions', {}).get('extracted_text', '')
-        
-        print(f"Documents loaded - Resume: {len(resume_text)} chars, Job: {len(job_listing_text)} chars")
-        
-        # Check if API key is configured
-        import os
-        api_key_configured = bool(os.environ.get('OPENAI_API_KEY'))
-        print(f"OpenAI API key configured: {api_key_configured}")
-        
-        # Analyze documents
-        analysis_result = ai_service.analyze_documents(resume_text, job_listing_text, company_questions)
-        print(f"Analysis complete: {list(analysis_result.keys())}")
-        
-        # Store analysis results
-        documents['resume'].analysis_result = json.dumps(analysis_result)
-        
-        # Generate questions - prioritize OpenAI if configured
-        generated_questions = []
-        
-        if api_key_configured:
-            # Try direct generation first (often more specific)
-            try:
-                print("Using OpenAI direct generation for highly tailored questions...")
-                generated_questions = ai_service.generate_direct_questions(resume_text, job_listing_text, num_questions=7)
-                print(f"Generated {len(generated_questions)} direct tailored questions")
-            except Exception as e:
-                print(f"Direct generation failed: {str(e)}")
-            
-            # Fallback to analysis-based generation
-            if not generated_questions:
-                try:
-                    print("Falling back to analysis-based generation...")
-                    generated_questions = ai_service.generate_interview_questions(analysis_result, num_questions=7)
-                    print(f"Generated {len(generated_questions)} analysis-based questions")
-                except Exception as e:
-                    print(f"Analysis-based generation also failed: {str(e)}")
-        
-        # Fallback to contextual generator if OpenAI fails or is not configured
-        if not generated_questions:
-            try:
-                print("Using contextual pattern matching for question generation...")
-                contextual_questions = contextual_generator.generate_contextual_questions(resume_text, job_listing_text)
-                generated_questions = contextual_questions[:7]
-                print(f"Generated {len(generated_questions)} questions using contextual patterns")
-            except Exception as e:
-                print(f"Contextual generation also failed: {str(e)}")
-                # Last resort - use default questions
-                generated_questions = []
-        
-        # Save generated questions
-        for i, q_data in enumerate(generated_questions):
-            question = Question(
-                interview_id=interview_id,
-                text=q_data['text'],
-                category=q_data['category'],
-                is_generated=True,
-                order_index=i
-            )
-            db.session.add(question)
-        
-        # Add common HR questions as options
-        for i, q_data in enumerate(COMMON_HR_QUESTIONS[:5]):
-            question = Question(
-                interview_id=interview_id,
-                text=q_data['text'],
-                category=q_data['category'],
-                is_generated=False,
-                order_index=i + 10  # Offset to separate from generated questions
-            )
-            db.session.add(question)
+        data = request.get_json(silent=True) or {}
+        run_async = str(request.args.get('async', data.get('async', False))).lower() in ('1', 'true', 'yes')
         
-        db.session.commit()
+        if run_async:
+            # Re-use an in-flight job rather than queueing the same chain twice
+            job = job_runner.active_job(interview_id, 'document_analysis')
+            if job is None:
+                job = job_runner.submit(
+                    interview_id, 'document_analysis',
+                    lambda report: _run_document_analysis_with_deadline(interview_id, ANALYZE_JOB_DEADLINE_SECONDS, report)
+                )
+            return jsonify({
+                'message': 'Analysis queued',
+                'job': job.to_dict(include_result=False),
+                'status_url': f'/api/jobs/{job.id}'
+            }), 202
+        
+        # Concurrent identical requests share one run of the chain (and one set of saved questions)
+        documents_fingerprint = [(doc.document_type, doc.extracted_text) for doc in interview.documents]
+        payload, _ = single_flight.do(
+            single_flight.make_key(interview_id, 'analyze', documents_fingerprint),
+            lambda: _run_document_analysis_with_deadline(interview_id, ANALYZE_DEADLINE_SECONDS)
+        )
+        return jsonify(payload), 200
         
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@interview_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get background job status, progress and result."""
+    try:
+        job = AnalysisJob.query.get_or_404(job_id)
+        # Stop pollers waiting on a job whose worker is gone
+        if job_runner.expire_if_stale(job):
+            db.session.commit()
+        return jsonify({'job': job.to_dict()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@interview_bp.route('/interviews/<int:interview_id>/jobs', methods=['GET'])
+def list_interview_jobs(interview_id):
+    """List background jobs for an interview, newest first."""
+    try:
+        interview = Interview.query.get_or_404(interview_id)
+        jobs = AnalysisJob.query.filter_by(interview_id=interview_id).order_by(AnalysisJob.created_at.desc()).all()
         return jsonify({
-            'message': 'Analysis completed successfully',
-            'analysis': analysis_result,
-            'generated_questions': generated_questions,
-            'total_questions': len(generated_questions) + len(COMMON_HR_QUESTIONS[:5])
+            'jobs': [job.to_dict(include_result=False) for job in jobs]
         }), 200
-        
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @interview_bp.route('/interviews/<int:interview_id>/questions', methods=['GET'])
@@ -381,15 +505,20 @@ def analyze_live(interview_id):
         interview = Interview.query.get_or_404(interview_id)
         
         data = request.get_json()
+        question_id = data.get('question_id')
         question_text = data.get('question_text', '')
         partial_response = data.get('partial_response', '')
         
         if not partial_response:
             return jsonify({'error': 'No response text provided'}), 400
         
-        # Use enhanced AI service for live STAR analysis
+        # Use enhanced AI service for live STAR analysis, analyzing only text added since the last call
         try:
-            star_result = enhanced_ai_service.analyze_response_star(question_text, partial_response)
+            with deadline_scope(LIVE_ANALYSIS_DEADLINE_SECONDS, 'analyze_live'):
+                (star_result, live_info), _ = single_flight.do(
+                    single_flight.make_key(interview_id, 'analyze_live', question_id, question_text, partial_response),
+                    lambda: live_analysis_store.analyze(interview_id, question_id, question_text, partial_response)
+                )
             
             # Return streamlined analysis for live updates
             return jsonify({
@@ -397,7 +526,9 @@ def analyze_live(interview_id):
                 'missing_components': star_result.get('missing_components', []),
                 'follow_up_questions': star_result.get('follow_up_questions', []),
                 'summary_points': star_result.get('summary_points', []),
-                'overall_quality': star_result.get('overall_quality', 'analyzing')
+                'summary_spans': star_result.get('summary_spans', []),
+                'overall_quality': star_result.get('overall_quality', 'analyzing'),
+                'live_analysis': live_info
             }), 200
             
         except Exception as e:
@@ -416,6 +547,119 @@ def analyze_live(interview_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _sse_event(event, data):
+    """Format a Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(events):
+    """Wrap an iterator of SSE frames in an unbuffered streaming response."""
+    return current_app.response_class(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@interview_bp.route('/interviews/<int:interview_id>/analyze-live/stream', methods=['POST'])
+def analyze_live_stream(interview_id):
+    """Stream live STAR analysis as Server-Sent Events.
+    
+    Emits 'star_component' and 'follow_up_question' events as soon as each one
+    is complete in the model output, 'delta' events with the raw token text,
+    and a final 'complete' event with the same payload as /analyze-live.
+    """
+    try:
+        interview = Interview.query.get_or_404(interview_id)
+        
+        data = request.get_json()
+        question_text = data.get('question_text', '')
+        partial_response = data.get('partial_response', '')
+        include_deltas = data.get('include_deltas', True)
+        
+        if not partial_response:
+            return jsonify({'error': 'No response text provided'}), 400
+        
+        def generate():
+            try:
+                with deadline_scope(LIVE_ANALYSIS_DEADLINE_SECONDS, 'analyze_live_stream'):
+                    for item in enhanced_ai_service.stream_response_star(question_text, partial_response):
+                        if item['event'] == 'delta' and not include_deltas:
+                            continue
+                        if item['event'] == 'complete':
+                            star_result = item['data']
+                            yield _sse_event('complete', {
+                                'star_breakdown': star_result.get('star_breakdown'),
+                                'missing_components': star_result.get('missing_components', []),
+                                'follow_up_questions': star_result.get('follow_up_questions', []),
+                                'summary_points': star_result.get('summary_points', []),
+                                'summary_spans': star_result.get('summary_spans', []),
+                                'overall_quality': star_result.get('overall_quality', 'analyzing')
+                            })
+                        else:
+                            yield _sse_event(item['event'], item['data'])
+            except Exception as e:
+                yield _sse_event('error', {'error': str(e)})
+        
+        return _sse_response(generate())
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _merge_star_analysis(question_text, transcribed_text, star_result, analysis_result):
+    """Merge enhanced STAR analysis into the basic analysis and pick follow-up questions."""
+    # Override with enhanced STAR analysis
+    if star_result:
+        analysis_result['star_analysis'] = star_result.get('star_breakdown', analysis_result.get('star_analysis'))
+        analysis_result['star_breakdown'] = star_result.get('star_breakdown')
+        analysis_result['missing_components'] = star_result.get('missing_components', [])
+        analysis_result['strengths'] = star_result.get('strengths', analysis_result.get('evaluation', {}).get('strengths', []))
+        analysis_result['improvements'] = star_result.get('improvements', analysis_result.get('evaluation', {}).get('areas_for_improvement', []))
+        
+        # Use enhanced follow-up questions
+        follow_up_questions = star_result.get('follow_up_questions', [])
+    else:
+        # Fallback to simple follow-up generation
+        follow_up_questions = ai_service.generate_follow_up_questions(
+            question_text, transcribed_text, analysis_result.get('star_analysis', {})
+        )
+    return analysis_result, follow_up_questions
+
+def _analyze_saved_response(question_text, transcribed_text, job_context):
+    """Run the enhanced STAR analysis and the basic analysis for a saved response.
+    
+    job_context is the interview's context pack text, shared by both prompts.
+    Both are independent LLM round trips, so by default they are issued together
+    on the AI executor; set CONCURRENT_RESPONSE_ANALYSIS=false to run them in series.
+    The LLM calls leave LOCAL_FALLBACK_RESERVE_SECONDS of the deadline for the local fallback.
+    """
+    basic_analysis = None
+    try:
+        with stage('response_analysis', reserve=LOCAL_FALLBACK_RESERVE_SECONDS):
+            if CONCURRENT_RESPONSE_ANALYSIS:
+                results, errors = run_concurrently({
+                    'star': lambda: enhanced_ai_service.analyze_response_star(question_text, transcribed_text, job_context),
+                    'basic': lambda: ai_service.analyze_response(question_text, transcribed_text, job_context)
+                }, timeout=RESPONSE_ANALYSIS_TIMEOUT)
+                basic_analysis = results.get('basic')
+                if errors:
+                    name, error = next(iter(errors.items()))
+                    raise RuntimeError(f"{name} analysis failed: {error}")
+                star_result, analysis_result = results['star'], results['basic']
+            else:
+                # Try enhanced STAR analysis first
+                star_result = enhanced_ai_service.analyze_response_star(question_text, transcribed_text, job_context)
+                # Merge with basic analysis
+                analysis_result = ai_service.analyze_response(question_text, transcribed_text, job_context)
+        
+        return _merge_star_analysis(question_text, transcribed_text, star_result, analysis_result)
+    except Exception as e:
+        print(f"Enhanced AI analysis failed: {str(e)}")
+        # Fallback to simple analysis, reusing the basic result if it already finished
+        analysis_result = basic_analysis or ai_service.analyze_response(question_text, transcribed_text, job_context)
+        follow_up_questions = ai_service.generate_follow_up_questions(
+            question_text, transcribed_text, analysis_result.get('star_analysis', {})
+        )
+        return analysis_result, follow_up_questions
+
 @interview_bp.route('/interviews/<int:interview_id>/responses', methods=['POST'])
 def save_response(interview_id):
     """Save candidate response and generate analysis."""
@@ -430,39 +674,13 @@ def save_response(interview_id):
         if not transcribed_text:
             return jsonify({'error': 'No transcribed text provided'}), 400
         
-        # Get job context for analysis
-        job_doc = Document.query.filter_by(interview_id=interview_id, document_type='job_listing').first()
-        job_context = job_doc.extracted_text if job_doc else ""
+        # Compact role/candidate context instead of the full job listing
+        job_context = get_context_text(interview)
         
-        # Use enhanced AI service for STAR analysis if available
-        try:
-            # Try enhanced STAR analysis first
-            star_result = enhanced_ai_service.analyze_response_star(question_text, transcribed_text)
-            
-            # Merge with basic analysis
-            analysis_result = ai_service.analyze_response(question_text, transcribed_text, job_context)
-            
-            # Override with enhanced STAR analysis
-            if star_result:
-                analysis_result['star_analysis'] = star_result.get('star_breakdown', analysis_result.get('star_analysis'))
-                analysis_result['star_breakdown'] = star_result.get('star_breakdown')
-                analysis_result['missing_components'] = star_result.get('missing_components', [])
-                analysis_result['strengths'] = star_result.get('strengths', analysis_result.get('evaluation', {}).get('strengths', []))
-                analysis_result['improvements'] = star_result.get('improvements', analysis_result.get('evaluation', {}).get('areas_for_improvement', []))
-                
-                # Use enhanced follow-up questions
-                follow_up_questions = star_result.get('follow_up_questions', [])
-            else:
-                # Fallback to simple follow-up generation
-                follow_up_questions = ai_service.generate_follow_up_questions(
-                    question_text, transcribed_text, analysis_result.get('star_analysis', {})
-                )
-        except Exception as e:
-            print(f"Enhanced AI analysis failed: {str(e)}")
-            # Fallback to simple analysis
-            analysis_result = ai_service.analyze_response(question_text, transcribed_text, job_context)
-            follow_up_questions = ai_service.generate_follow_up_questions(
-                question_text, transcribed_text, analysis_result.get('star_analysis', {})
+        with deadline_scope(RESPONSE_DEADLINE_SECONDS, 'save_response'):
+            (analysis_result, follow_up_questions), _ = single_flight.do(
+                single_flight.make_key(interview_id, 'save_response', question_text, transcribed_text),
+                lambda: _analyze_saved_response(question_text, transcribed_text, job_context)
             )
         
         # Calculate scores
@@ -493,8 +711,13 @@ def save_response(interview_id):
         )
         
         db.session.add(response)
+        # Fold it into the running summaries and scores used by the final evaluation
+        record_response(interview_id, response, analysis_result)
         db.session.commit()
         
+        # The answer is final, so its live analysis session is no longer needed
+        live_analysis_store.reset(interview_id, question_id, question_text)
+        
         return jsonify({
             'message': 'Response saved successfully',
             'response': response.to_dict(),
@@ -515,18 +738,20 @@ def complete_interview(interview_id):
         if interview.status != 'active':
             return jsonify({'error': 'Interview is not active'}), 400
         
-        # Gather all interview data
-        responses = Response.query.filter_by(interview_id=interview_id).all()
-        documents = Document.query.filter_by(interview_id=interview_id).all()
-        
+        # The responses go in as the incremental rollup and the documents as the condensed context pack
         interview_data = {
-            'interview': interview.to_dict(),
-            'responses': [r.to_dict() for r in responses],
-            'documents': [d.to_dict() for d in documents]
+            'interview': {
+                'candidate_name': interview.candidate_name,
+                'position_title': interview.position_title,
+                'started_at': interview.started_at.isoformat() if interview.started_at else None
+            },
+            'context': get_context_text(interview),
+            'rollup': rollup_payload(get_rollup(interview))
         }
         
         # Generate final evaluation
-        final_evaluation = ai_service.generate_final_evaluation(interview_data)
+        with deadline_scope(COMPLETE_DEADLINE_SECONDS, 'complete_interview'):
+            final_evaluation = ai_service.generate_final_evaluation(interview_data)
         
         # Update interview status
         interview.status = 'completed'
@@ -556,16 +781,14 @@ def detect_question(interview_id):
         if not spoken_text:
             return jsonify({'error': 'No spoken text provided'}), 400
         
-        # Get available questions
-        questions = Question.query.filter_by(interview_id=interview_id).all()
-        question_texts = [q.text for q in questions]
+        top_k = min(max(int(data.get('top_k', 3)), 1), 20)
         
-        # Detect question match
-        match_result = ai_service.detect_question_match(spoken_text, question_texts)
+        # Rank the interview's questions with its cached BM25 index, then its embeddings for paraphrases
+        best, matches, method = question_indexes.match(interview_id, spoken_text, top_k)
+        ranked = [{'question_id': m['key'], 'confidence': m['confidence'], 'score': m['score']} for m in matches]
         
-        if match_result['matched']:
-            question_index = match_result['question_index']
-            matched_question = questions[question_index]
+        if best is not None:
+            matched_question = db.session.get(Question, best['key'])
             
             # Mark question as asked
             matched_question.is_asked = True
@@ -574,19 +797,74 @@ def detect_question(interview_id):
             return jsonify({
                 'matched': True,
                 'question': matched_question.to_dict(),
-                'confidence': match_result['confidence'],
-                'exact_match': match_result['exact_match']
+                'confidence': best['confidence'],
+                'exact_match': best['exact_match'],
+                'match_method': method,
+                'matches': ranked
             }), 200
         else:
             return jsonify({
                 'matched': False,
-                'message': 'No matching question found'
+                'message': 'No matching question found',
+                'matches': ranked
             }), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@interview_bp.route('/interviews/<int:interview_id>/transcript-stream', methods=['POST'])
+def stream_transcript(interview_id):
+    """Feed the next chunk of the interviewer's transcript and detect questions as they are asked.
+    
+    Send only the text recognized since the previous chunk, with an optional
+    stream_id (one per transcript source) and final=true once the speaker stops.
+    Detected questions are marked as asked and returned as question_detected events.
+    """
+    try:
+        interview = Interview.query.get_or_404(interview_id)
+        
+        data = request.get_json() or {}
+        text = data.get('text', '')
+        stream_id = str(data.get('stream_id') or 'default')
+        final = bool(data.get('final', False))
+        
+        if not text and not final:
+            return jsonify({'error': 'No transcript text provided'}), 400
+        
+        events, stream_info = transcript_streams.feed(interview_id, stream_id, text, final)
+        
+        detected = []
+        for event in events:
+            question = db.session.get(Question, event['key'])
+            if question is None:
+                continue
+            question.is_asked = True
+            detected.append({
+                'event': event['event'],
+                'question': question.to_dict(),
+                'confidence': event['confidence'],
+                'match_method': event['match_method']
+            })
+        if detected:
+            db.session.commit()
+        
+        return jsonify({
+            'events': detected,
+            'stream': stream_info
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@interview_bp.route('/interviews/<int:interview_id>/transcript-stream', methods=['DELETE'])
+def reset_transcript_stream(interview_id):
+    """Forget a transcript stream's window and detected questions."""
+    stream_id = str(request.args.get('stream_id') or 'default')
+    transcript_streams.reset(interview_id, stream_id)
+    return jsonify({'message': 'Transcript stream reset'}), 200
+
 @interview_bp.route('/common-questions', methods=['GET'])
 def get_common_questions():
     """Get list of common HR interview questions."""
@@ -680,6 +958,7 @@ def upload_document_base64(interview_id):
             db.session.add(document)
         
         print("DEBUG: Committing to database")
+        invalidate_context_pack(interview_id)
         db.session.commit()
         
         print("DEBUG: Document saved successfully")
@@ -747,6 +1026,7 @@ def add_job_url_enhanced(interview_id):
             )
             db.session.add(document)
         
+        invalidate_context_pack(interview_id)
         db.session.commit()
         
         print("DEBUG: Job URL processed successfully")
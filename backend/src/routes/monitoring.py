@@ -0,0 +1,57 @@
+from flask import Blueprint, Response, jsonify
+
+from src.services.circuit_breaker import circuit_breakers
+from src.services.llm_cache import llm_cache
+from src.services.question_index import question_indexes
+from src.services.question_stream import transcript_streams
+from src.services.singleflight import single_flight
+from src.services.telemetry import telemetry
+
+monitoring_bp = Blueprint('monitoring', __name__)
+
+@monitoring_bp.route('/monitoring/llm-cache', methods=['GET'])
+def get_llm_cache_stats():
+    """Get LLM result cache hit/miss counters."""
+    return jsonify({'llm_cache': llm_cache.stats()}), 200
+
+@monitoring_bp.route('/monitoring/llm-cache', methods=['DELETE'])
+def clear_llm_cache():
+    """Drop the in-process cache tier and prune expired persistent entries."""
+    try:
+        llm_cache.clear()
+        removed = llm_cache.prune()
+        return jsonify({
+            'message': 'LLM cache cleared',
+            'pruned_rows': removed
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@monitoring_bp.route('/monitoring/singleflight', methods=['GET'])
+def get_singleflight_stats():
+    """Get per-operation counts of executed and coalesced AI calls."""
+    return jsonify({'singleflight': single_flight.stats()}), 200
+
+@monitoring_bp.route('/monitoring/circuit-breakers', methods=['GET'])
+def get_circuit_breakers():
+    """Get the state of each provider/model circuit breaker."""
+    return jsonify({'circuit_breakers': circuit_breakers.stats()}), 200
+
+@monitoring_bp.route('/monitoring/circuit-breakers', methods=['DELETE'])
+def reset_circuit_breakers():
+    """Close every circuit breaker, e.g. after fixing an API key."""
+    circuit_breakers.reset()
+    return jsonify({'message': 'Circuit breakers reset'}), 200
+
+@monitoring_bp.route('/monitoring/question-index', methods=['GET'])
+def get_question_index_stats():
+    """Get the number of cached per-interview question indexes and rebuilds, and transcript stream counters."""
+    return jsonify({
+        'question_index': question_indexes.stats(),
+        'transcript_streams': transcript_streams.stats()
+    }), 200
+
+@monitoring_bp.route('/monitoring/metrics', methods=['GET'])
+def get_metrics():
+    """LLM call and AI operation telemetry in Prometheus text format."""
+    return Response(telemetry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
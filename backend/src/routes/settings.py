@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 import os
-import json
+
+from src.services.llm_clients import llm_clients
+from src.services.llm_providers import BedrockProvider, BEDROCK_FAST_MODEL
 
 settings_bp = Blueprint('settings', __name__)
 
@@ -39,6 +41,9 @@ def save_api_keys():
         if data.get('aws_region'):
             os.environ['AWS_DEFAULT_REGION'] = data['aws_region']
         
+        # Swap in pooled clients built for the new keys
+        llm_clients.configure(api_keys)
+        
         return jsonify({
             'message': 'API keys saved successfully',
             'provider': api_keys.get('ai_provider', 'openai')
@@ -63,20 +68,19 @@ def test_ai_connection():
                     'message': 'OpenAI API key is required'
                 }), 400
             
-            # Set temporary API key for testing
             try:
-                import openai
-                from openai import OpenAI
-                
-                # Create client with just the API key
-                client = OpenAI(api_key=api_key)
+                # Reuse a pooled client for this key instead of building one per request
+                client = llm_clients.probe_openai_client(api_key)
+                if client is None:
+                    raise RuntimeError('could not create OpenAI client')
                 
                 # Make a minimal API call to test connection
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": "test"}],
-                    max_tokens=5
-                )
+                with llm_clients.slot('openai'):
+                    response = client.chat.completions.create(
+                        model="gpt-3.5-turbo",
+                        messages=[{"role": "user", "content": "test"}],
+                        max_tokens=5
+                    )
                 
                 return jsonify({
                     'success': True,
@@ -102,25 +106,14 @@ def test_ai_connection():
                 }), 400
             
             try:
-                import boto3
-                
-                # Create Bedrock client
-                client = boto3.client(
-                    'bedrock-runtime',
-                    aws_access_key_id=access_key,
-                    aws_secret_access_key=secret_key,
-                    region_name=region
-                )
+                # Reuse a pooled Bedrock client for these credentials
+                client = llm_clients.probe_bedrock_client(access_key, secret_key, region)
                 
-                # Test with a minimal request
-                response = client.invoke_model(
-                    modelId='anthropic.claude-instant-v1',
-                    body=json.dumps({
-                        'prompt': '\n\nHuman: test\n\nAssistant:',
-                        'max_tokens_to_sample': 10
-                    }),
-                    contentType='application/json'
-                )
+                # Test with a minimal request on the model the AI services use for fast calls
+                with llm_clients.slot('bedrock'):
+                    BedrockProvider(client).complete(
+                        [{'role': 'user', 'content': 'test'}], BEDROCK_FAST_MODEL, max_tokens=5
+                    )
                 
                 return jsonify({
                     'success': True,
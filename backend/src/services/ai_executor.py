@@ -0,0 +1,86 @@
+"""
+Bounded thread pool for issuing independent AI calls concurrently.
+
+The AI services are blocking (OpenAI SDK, boto3), so running two of them side by
+side only needs threads. Each task runs inside the caller's Flask app context so
+services that touch the database (e.g. the LLM cache) keep working, and inside a
+copy of the caller's context variables so the request deadline carries over.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.services.deadline import remaining_time
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide AI executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                max_workers = int(os.environ.get('AI_EXECUTOR_MAX_WORKERS', 8))
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-call')
+    return _executor
+
+
+def with_app_context(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """Wrap fn so it runs inside the current Flask app context, if there is one."""
+    try:
+        from flask import current_app, has_app_context
+        app = current_app._get_current_object() if has_app_context() else None
+    except Exception:
+        app = None
+
+    if app is None:
+        return fn
+
+    def runner():
+        with app.app_context():
+            return fn()
+    return runner
+
+
+def submit(fn: Callable[[], Any]):
+    """Submit a single callable to the AI executor and return its future."""
+    context = contextvars.copy_context()
+    return get_executor().submit(context.run, with_app_context(fn))
+
+
+def run_concurrently(calls: Dict[str, Callable[[], Any]],
+                     timeout: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, BaseException]]:
+    """Run independent calls together and wait for all of them.
+
+    Returns (results, errors), both keyed by call name. As soon as one call
+    raises, calls that have not started yet are cancelled and no longer waited
+    on; calls already in flight are left to finish in the background and are
+    reported only if they completed in time. The wait never outlasts the
+    current deadline.
+    """
+    remaining = remaining_time()
+    if remaining is not None:
+        timeout = remaining if timeout is None else min(timeout, remaining)
+    futures = {submit(fn): name for name, fn in calls.items()}
+    done, pending = wait(futures, timeout=timeout, return_when=FIRST_EXCEPTION)
+
+    results = {}
+    errors = {}
+    for future in done:
+        name = futures[future]
+        error = future.exception()
+        if error is not None:
+            errors[name] = error
+        else:
+            results[name] = future.result()
+
+    for future in pending:
+        future.cancel()
+        if not errors:
+            errors[futures[future]] = TimeoutError(f"{futures[future]} did not finish within {timeout}s")
+
+    return results, errors
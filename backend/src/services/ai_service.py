@@ -1,27 +1,92 @@
-import openai
 import json
-import re
+import os
 from typing import List, Dict, Any, Optional
 
+from src.services.llm_cache import llm_cache
+from src.services.llm_clients import llm_clients
+from src.services.llm_output import (
+    DocumentAnalysis, FinalEvaluation, ParseError, QuestionList, parse_json_value, parse_llm_output
+)
+from src.services.prompt_budget import PromptBuilder
+from src.services.prompt_templates import PromptTemplate
+from src.services.question_embeddings import SemanticQuestionIndex
+from src.services.question_index import QuestionIndex, match_question
+from src.services.telemetry import instrumented, telemetry
+
+# Bump a version whenever its prompt template changes so stale cache entries are ignored
+ANALYZE_DOCUMENTS_PROMPT_VERSION = 'analyze_documents/v2'
+INTERVIEW_QUESTIONS_PROMPT_VERSION = 'interview_questions/v2'
+DIRECT_QUESTIONS_PROMPT_VERSION = 'direct_questions/v2'
+
+# Ask the model which question was spoken instead of matching locally (BM25, then embeddings)
+QUESTION_MATCH_LLM = os.environ.get('QUESTION_MATCH_LLM', 'false').lower() == 'true'
+
+# The examples are generic so the whole instruction block is a cacheable static prefix
+INTERVIEW_QUESTIONS_TEMPLATE = PromptTemplate(
+    'generate_interview_questions',
+    instructions="""
+You are an expert interviewer who ALWAYS creates highly specific questions that reference the candidate's actual experience and companies. Never ask generic questions.
+
+The user message describes the role and the candidate's background. Generate the requested number of interview questions that:
+1. MUST mention specific companies, projects, or achievements from the candidate's background
+2. MUST relate to specific requirements or responsibilities of the job
+3. MUST be behavioral (start with "Tell me about...", "Describe a time...", "Walk me through...")
+4. MUST probe deeper into their actual experience, not hypotheticals
+
+For each question, pick ONE specific item from their background and connect it to ONE specific job requirement.
+
+EXAMPLES OF EXCELLENT TAILORED QUESTIONS (for a candidate who led a billing migration at Acme and a role that requires Kubernetes):
+- "At Acme, you led the migration of the billing platform. Walk me through how you approached this and how it prepares you for owning our deployment pipeline."
+- "You mentioned the real-time analytics dashboard project. This role requires Kubernetes. Describe how you applied similar skills in that context."
+- "Looking at your experience with Python and our need for distributed systems, tell me about the most complex problem you solved using this technology."
+""",
+    output_format="""
+Return ONLY a JSON array with this exact structure:
+[
+    {
+        "text": "Your specific question here",
+        "category": "behavioral|technical|situational|cultural",
+        "rationale": "Why this question matters for this specific candidate and role"
+    }
+]
+""",
+    delta="Generate {num_questions} interview questions.",
+    context_label='Interview'
+)
+
 class AIService:
     def __init__(self):
-        # OpenAI client is already configured via environment variables
-        self.client = openai.OpenAI()
+        # LLM provider clients are shared through the LLM client registry
+        pass
     
+    @instrumented('analyze_documents')
     def analyze_documents(self, resume_text: str, job_listing_text: str, company_questions: str = "") -> Dict[str, Any]:
         """Analyze uploaded documents to extract key information."""
+        model = "gpt-4-turbo-preview"
+        prompt_builder = PromptBuilder('analyze_documents', model=model)
+        prompt_builder.add('resume', resume_text, priority=3)
+        prompt_builder.add('job_listing', job_listing_text, priority=2)
+        prompt_builder.add('company_questions', company_questions, priority=1, max_tokens=800)
+        sections = prompt_builder.build()
+        
+        cache_key = llm_cache.make_key('analyze_documents', ANALYZE_DOCUMENTS_PROMPT_VERSION, llm_clients.model_id(model),
+                                       sections['resume'], sections['job_listing'], sections['company_questions'])
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""
         As an expert HR interviewer, carefully analyze the following resume and job listing to create a detailed profile.
         Focus on extracting SPECIFIC details, technologies, companies, projects, and achievements mentioned.
 
         RESUME:
-        {resume_text}
+        {sections['resume']}
 
         JOB LISTING:
-        {job_listing_text}
+        {sections['job_listing']}
 
         COMPANY INTERVIEW QUESTIONS (if provided):
-        {company_questions}
+        {sections['company_questions']}
 
         Provide a DETAILED JSON response. Be SPECIFIC - extract actual company names, project names, technologies, and achievements from the documents:
         {{
@@ -56,101 +121,91 @@ class AIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",  # More capable model
+            response = llm_clients.complete(
+                model=model,  # More capable model
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3
             )
             
-            content = response.choices[0].message.content
-            # Extract JSON from the response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return {"error": "Could not parse analysis response"}
+            analysis = parse_llm_output(response.content, DocumentAnalysis).to_dict()
+            llm_cache.set(cache_key, analysis, operation='analyze_documents', model=model)
+            return analysis
                 
+        except ParseError as e:
+            telemetry.note_fallback(e)
+            return {"error": "Could not parse analysis response"}
         except Exception as e:
+            telemetry.note_fallback(e)
             return {"error": f"Analysis failed: {str(e)}"}
     
+    @instrumented('generate_interview_questions')
     def generate_interview_questions(self, analysis_result: Dict[str, Any], num_questions: int = 5) -> List[Dict[str, str]]:
         """Generate tailored interview questions based on document analysis."""
+        model = "gpt-4-turbo-preview"
+        cache_key = llm_cache.make_key('generate_interview_questions', INTERVIEW_QUESTIONS_PROMPT_VERSION, llm_clients.model_id(model),
+                                       analysis_result, num_questions)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Extract specific details from analysis
         candidate = analysis_result.get('candidate_profile', {})
         job = analysis_result.get('job_requirements', {})
-        match = analysis_result.get('match_analysis', {})
-        
-        # Create a more direct prompt with the actual resume and job text
-        prompt = f"""
-        You are conducting an interview for {job.get('job_title', 'this position')} at {job.get('company_name', 'our company')}.
-        
-        The candidate has:
-        - Worked at: {', '.join(candidate.get('companies_worked', [])) if candidate.get('companies_worked') else 'various companies'}
-        - Skills: {', '.join(candidate.get('key_skills', [])[:5]) if candidate.get('key_skills') else 'multiple technical skills'}
-        - Projects: {', '.join(candidate.get('projects', [])[:3]) if candidate.get('projects') else 'several projects'}
-        - Achievements: {', '.join(candidate.get('notable_achievements', [])[:3]) if candidate.get('notable_achievements') else 'various achievements'}
-        
-        The role requires:
-        - Skills: {', '.join(job.get('required_skills', [])[:5]) if job.get('required_skills') else 'technical expertise'}
-        - Responsibilities: {', '.join(job.get('key_responsibilities', [])[:3]) if job.get('key_responsibilities') else 'key responsibilities'}
-        
-        Generate {num_questions} interview questions that:
-        1. MUST mention specific companies, projects, or achievements from the candidate's background
-        2. MUST relate to specific requirements or responsibilities of the job
-        3. MUST be behavioral (start with "Tell me about...", "Describe a time...", "Walk me through...")
-        4. MUST probe deeper into their actual experience, not hypotheticals
-        
-        For each question, pick ONE specific item from their background and connect it to ONE specific job requirement.
-        
-        EXAMPLES OF EXCELLENT TAILORED QUESTIONS:
-        - "At {candidate.get('companies_worked', ['TechCorp'])[0] if candidate.get('companies_worked') else 'your previous company'}, you {candidate.get('notable_achievements', ['led a project'])[0] if candidate.get('notable_achievements') else 'worked on projects'}. Walk me through how you approached this and how it prepares you for {job.get('key_responsibilities', ['similar responsibilities'])[0] if job.get('key_responsibilities') else 'this role'}."
-        - "You mentioned {candidate.get('projects', ['a specific project'])[0] if candidate.get('projects') else 'project experience'}. This role requires {job.get('required_skills', ['specific skills'])[0] if job.get('required_skills') else 'similar expertise'}. Describe how you applied similar skills in that context."
-        - "Looking at your experience with {candidate.get('key_skills', ['Python'])[0] if candidate.get('key_skills') else 'technology'} and our need for {job.get('required_skills', ['similar tech'])[0] if job.get('required_skills') else 'technical skills'}, tell me about the most complex problem you solved using this technology."
         
-        Return ONLY a JSON array with this exact structure:
-        [
-            {{
-                "text": "Your specific question here",
-                "category": "behavioral|technical|situational|cultural",
-                "rationale": "Why this question matters for this specific candidate and role"
-            }}
-        ]
-        """
+        background = f"""
+Role: {job.get('job_title', 'this position')} at {job.get('company_name', 'our company')}
+
+The candidate has:
+- Worked at: {', '.join(candidate.get('companies_worked', [])) if candidate.get('companies_worked') else 'various companies'}
+- Skills: {', '.join(candidate.get('key_skills', [])[:5]) if candidate.get('key_skills') else 'multiple technical skills'}
+- Projects: {', '.join(candidate.get('projects', [])[:3]) if candidate.get('projects') else 'several projects'}
+- Achievements: {', '.join(candidate.get('notable_achievements', [])[:3]) if candidate.get('notable_achievements') else 'various achievements'}
+
+The role requires:
+- Skills: {', '.join(job.get('required_skills', [])[:5]) if job.get('required_skills') else 'technical expertise'}
+- Responsibilities: {', '.join(job.get('key_responsibilities', [])[:3]) if job.get('key_responsibilities') else 'key responsibilities'}
+"""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",  # More capable model
-                messages=[
-                    {"role": "system", "content": "You are an expert interviewer who ALWAYS creates highly specific questions that reference the candidate's actual experience and companies. Never ask generic questions."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = llm_clients.complete(
+                model=model,  # More capable model
+                messages=INTERVIEW_QUESTIONS_TEMPLATE.messages(background.strip(), num_questions=num_questions),
                 temperature=0.6,  # Higher for more creative questions
                 max_tokens=2000
             )
             
-            content = response.choices[0].message.content
-            # Extract JSON array from the response
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return []
+            questions = parse_llm_output(response.content, QuestionList).to_list()
+            llm_cache.set(cache_key, questions, operation='generate_interview_questions', model=model)
+            return questions
                 
         except Exception as e:
+            telemetry.note_fallback(e)
             print(f"Question generation failed: {str(e)}")
             return []
     
+    @instrumented('generate_direct_questions')
     def generate_direct_questions(self, resume_text: str, job_text: str, num_questions: int = 7) -> List[Dict[str, str]]:
         """Generate questions directly from resume and job text without intermediate analysis."""
+        model = "gpt-4-turbo-preview"
+        prompt_builder = PromptBuilder('generate_direct_questions', model=model)
+        prompt_builder.add('resume', resume_text, priority=2)
+        prompt_builder.add('job_description', job_text, priority=1)
+        sections = prompt_builder.build()
+        
+        cache_key = llm_cache.make_key('generate_direct_questions', DIRECT_QUESTIONS_PROMPT_VERSION, llm_clients.model_id(model),
+                                       sections['resume'], sections['job_description'], num_questions)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""
         Create {num_questions} highly specific interview questions for this candidate.
         
         RESUME:
-        {resume_text[:2000]}  # First 2000 chars
+        {sections['resume']}
         
         JOB DESCRIPTION:
-        {job_text[:2000]}  # First 2000 chars
+        {sections['job_description']}
         
         REQUIREMENTS:
         1. Each question MUST quote or reference something SPECIFIC from the resume (a company name, project, achievement, or technology)
@@ -169,8 +224,8 @@ class AIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
+            response = llm_clients.complete(
+                model=model,
                 messages=[
                     {"role": "system", "content": "You are reviewing a specific resume and job description. Create questions that prove you've read both documents carefully. Reference specific companies, projects, and achievements by name."},
                     {"role": "user", "content": prompt}
@@ -179,23 +234,29 @@ class AIService:
                 max_tokens=2000
             )
             
-            content = response.choices[0].message.content
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            return []
+            questions = parse_llm_output(response.content, QuestionList).to_list()
+            llm_cache.set(cache_key, questions, operation='generate_direct_questions', model=model)
+            return questions
         except Exception as e:
+            telemetry.note_fallback(e)
             print(f"Direct question generation failed: {str(e)}")
             return []
     
+    @instrumented('analyze_response')
     def analyze_response(self, question: str, response_text: str, job_context: str = "") -> Dict[str, Any]:
         """Analyze candidate response and provide STAR breakdown and evaluation."""
+        prompt_builder = PromptBuilder('analyze_response')
+        prompt_builder.add('question', question, priority=3, max_tokens=300)
+        prompt_builder.add('response', response_text, priority=2)
+        prompt_builder.add('job_context', job_context, priority=1, max_tokens=800)
+        sections = prompt_builder.build()
+        
         prompt = f"""
         As an HR expert, analyze this candidate's response to an interview question:
 
-        QUESTION: {question}
-        RESPONSE: {response_text}
-        JOB CONTEXT: {job_context}
+        QUESTION: {sections['question']}
+        RESPONSE: {sections['response']}
+        JOB CONTEXT: {sections['job_context']}
 
         Provide a comprehensive analysis in JSON format:
         {{
@@ -235,22 +296,22 @@ class AIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = llm_clients.complete(
                 model="gpt-4-turbo-preview",  # More capable model
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3
             )
             
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return {"error": "Could not parse response analysis"}
+            return parse_json_value(response.content, 'response_analysis', '{')
                 
+        except ParseError as e:
+            telemetry.note_fallback(e)
+            return {"error": "Could not parse response analysis"}
         except Exception as e:
+            telemetry.note_fallback(e)
             return {"error": f"Response analysis failed: {str(e)}"}
     
+    @instrumented('generate_follow_up_questions')
     def generate_follow_up_questions(self, original_question: str, response_text: str, star_analysis: Dict[str, Any]) -> List[str]:
         """Generate follow-up questions based on missing STAR components."""
         missing_components = []
@@ -261,11 +322,16 @@ class AIService:
         if not missing_components:
             return []
         
+        prompt_builder = PromptBuilder('generate_follow_up_questions')
+        prompt_builder.add('question', original_question, priority=2, max_tokens=300)
+        prompt_builder.add('response', response_text, priority=1)
+        sections = prompt_builder.build()
+        
         prompt = f"""
         Based on the candidate's response to the interview question, generate follow-up questions to explore missing STAR components.
 
-        ORIGINAL QUESTION: {original_question}
-        CANDIDATE RESPONSE: {response_text}
+        ORIGINAL QUESTION: {sections['question']}
+        CANDIDATE RESPONSE: {sections['response']}
         MISSING STAR COMPONENTS: {', '.join(missing_components)}
 
         Generate 2-3 follow-up questions that would help the candidate provide the missing information.
@@ -276,30 +342,32 @@ class AIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = llm_clients.complete(
                 model="gpt-4-turbo-preview",  # More capable model
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.4
             )
             
-            content = response.choices[0].message.content
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return []
+            follow_ups = parse_json_value(response.content, 'follow_up_questions', '[')
+            return [q for q in follow_ups if isinstance(q, str)] if isinstance(follow_ups, list) else []
                 
         except Exception as e:
+            telemetry.note_fallback(e)
             print(f"Follow-up question generation failed: {str(e)}")
             return []
     
+    @instrumented('generate_final_evaluation')
     def generate_final_evaluation(self, interview_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate final candidate evaluation based on all responses."""
+        prompt_builder = PromptBuilder('generate_final_evaluation')
+        prompt_builder.add('interview_data', json.dumps(interview_data, indent=2), priority=1)
+        sections = prompt_builder.build()
+        
         prompt = f"""
         As an HR expert, provide a comprehensive final evaluation of this candidate based on their interview performance:
 
         INTERVIEW DATA:
-        {json.dumps(interview_data, indent=2)}
+        {sections['interview_data']}
 
         Provide a detailed evaluation in JSON format:
         {{
@@ -321,24 +389,33 @@ class AIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = llm_clients.complete(
                 model="gpt-4-turbo-preview",  # More capable model
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3
             )
             
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return {"error": "Could not parse final evaluation"}
+            return parse_llm_output(response.content, FinalEvaluation).to_dict()
                 
+        except ParseError as e:
+            telemetry.note_fallback(e)
+            return {"error": "Could not parse final evaluation"}
         except Exception as e:
+            telemetry.note_fallback(e)
             return {"error": f"Final evaluation failed: {str(e)}"}
     
+    @instrumented('detect_question_match')
     def detect_question_match(self, spoken_text: str, available_questions: List[str]) -> Optional[Dict[str, Any]]:
         """Detect which question from the list matches the spoken text."""
+        if not QUESTION_MATCH_LLM:
+            questions = list(enumerate(available_questions))
+            best, _, _ = match_question(QuestionIndex(questions), SemanticQuestionIndex.from_texts(questions),
+                                        spoken_text)
+            if best is None:
+                return {"matched": False, "question_index": None, "confidence": 0.0, "exact_match": False}
+            return {"matched": True, "question_index": best["key"], "confidence": best["confidence"],
+                    "exact_match": best["exact_match"]}
+        
         prompt = f"""
         Analyze the spoken text and determine which of the available questions it matches best.
 
@@ -365,20 +442,16 @@ class AIService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = llm_clients.complete(
                 model="gpt-4-turbo-preview",  # More capable model
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.1
             )
             
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return {"matched": False, "question_index": None, "confidence": 0.0, "exact_match": False}
+            return parse_json_value(response.content, 'question_match', '{')
                 
         except Exception as e:
+            telemetry.note_fallback(e)
             print(f"Question matching failed: {str(e)}")
             return {"matched": False, "question_index": None, "confidence": 0.0, "exact_match": False}
 
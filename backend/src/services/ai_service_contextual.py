@@ -5,6 +5,8 @@ import json
 import re
 from typing import List, Dict, Any, Optional
 
+from src.services.skill_taxonomy import TECHNOLOGY_CATEGORIES, skill_taxonomy
+
 class ContextualQuestionGenerator:
     def __init__(self):
         self.provider = 'contextual'
@@ -18,9 +20,9 @@ class ContextualQuestionGenerator:
         # Extract requirements from job description
         job_requirements = self._extract_requirements(job_text)
         
-        # Find gaps and matches
-        matching_skills = list(set(resume_skills) & set(job_requirements))
-        missing_skills = list(set(job_requirements) - set(resume_skills))
+        # Find gaps and matches, in the order the job description lists them
+        matching_skills = [skill for skill in job_requirements if skill in resume_skills]
+        missing_skills = [skill for skill in job_requirements if skill not in resume_skills]
         
         # Extract experience mentions
         experience_years = self._extract_experience_years(resume_text)
@@ -130,7 +132,7 @@ class ContextualQuestionGenerator:
                 tech = tech_keywords[0]
                 project = projects[0] if projects else 'a recent project'
                 # Check if this tech is required for the job
-                is_required = tech.lower() in job_text.lower()
+                is_required = tech in info['job_requirements']
                 
                 if is_required:
                     questions.append({
@@ -148,21 +150,8 @@ class ContextualQuestionGenerator:
         return questions[:7]  # Return top 7 most relevant questions
     
     def _extract_skills(self, text: str) -> List[str]:
-        """Extract skills from text."""
-        skills = []
-        # Common skill keywords
-        skill_patterns = [
-            r'Python', r'Java', r'JavaScript', r'React', r'Node\.js', r'SQL', r'AWS', r'Docker',
-            r'Kubernetes', r'Machine Learning', r'Data Analysis', r'Project Management',
-            r'Agile', r'Scrum', r'Git', r'CI/CD', r'REST API', r'Microservices'
-        ]
-        
-        text_lower = text.lower()
-        for pattern in skill_patterns:
-            if re.search(pattern.lower(), text_lower):
-                skills.append(pattern.replace('\\', ''))
-        
-        return skills
+        """Extract skills from text as canonical taxonomy names."""
+        return skill_taxonomy.skills(text)
     
     def _extract_requirements(self, job_text: str) -> List[str]:
         """Extract requirements from job description."""
@@ -243,22 +232,7 @@ class ContextualQuestionGenerator:
     
     def _extract_technologies(self, text: str) -> List[str]:
         """Extract specific technologies mentioned."""
-        tech_patterns = [
-            r'Python', r'Java(?!Script)', r'JavaScript', r'TypeScript', r'React', r'Angular', r'Vue',
-            r'Node\.js', r'Express', r'Django', r'Flask', r'Spring', r'\.NET', r'C\+\+', r'C#',
-            r'MongoDB', r'PostgreSQL', r'MySQL', r'Redis', r'Elasticsearch',
-            r'AWS', r'Azure', r'GCP', r'Docker', r'Kubernetes', r'Jenkins',
-            r'TensorFlow', r'PyTorch', r'Scikit-learn', r'Pandas', r'NumPy'
-        ]
-        
-        found_tech = []
-        text_lower = text.lower()
-        
-        for pattern in tech_patterns:
-            if re.search(pattern.lower(), text_lower):
-                found_tech.append(pattern.replace('\\', ''))
-        
-        return found_tech
+        return skill_taxonomy.skills(text, TECHNOLOGY_CATEGORIES)
     
     def _extract_companies(self, resume_text: str) -> List[str]:
         """Extract company names from resume."""
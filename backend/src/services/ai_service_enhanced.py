@@ -1,114 +1,341 @@
 import json
-import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator
+
+from src.services.llm_clients import llm_clients
+from src.services.llm_output import StarAnalysis, StreamingOutputParser, parse_llm_output
+from src.services.prompt_budget import PromptBuilder
+from src.services.prompt_templates import PromptTemplate
+from src.services.response_document import SUMMARY_POINTS, ResponseDocument, shift_spans
+from src.services.telemetry import instrumented, instrumented_stream, telemetry
+
+# Streamed values surfaced to the live panel as soon as they are complete
+STAR_STREAM_WATCH = [('star_breakdown', '*'), ('follow_up_questions', '*')]
+
+STAR_COMPONENTS = ['situation', 'task', 'action', 'result']
+QUALITY_RANK = {'missing': 0, 'weak': 1, 'adequate': 2, 'strong': 3}
+
+STAR_MODEL = "gpt-4-turbo-preview"
+
+STAR_JSON_FORMAT = """
+JSON format:
+{
+    "star_breakdown": {
+        "situation": {
+            "present": boolean,
+            "content": "extracted content or null",
+            "quality": "strong/adequate/weak/missing"
+        },
+        "task": {
+            "present": boolean,
+            "content": "extracted content or null",
+            "quality": "strong/adequate/weak/missing"
+        },
+        "action": {
+            "present": boolean,
+            "content": "extracted content or null",
+            "quality": "strong/adequate/weak/missing"
+        },
+        "result": {
+            "present": boolean,
+            "content": "extracted content or null",
+            "quality": "strong/adequate/weak/missing"
+        }
+    },
+    "missing_components": ["list of missing/weak components"],
+    "follow_up_questions": [
+        "Specific follow-up question 1",
+        "Specific follow-up question 2",
+        "Specific follow-up question 3"
+    ],
+    "strengths": ["strength 1", "strength 2"],
+    "improvements": ["improvement 1", "improvement 2"],
+    "overall_quality": "excellent/good/adequate/needs_improvement"
+}
+"""
+
+# Static instructions and schema first, so every call shares a cacheable prefix (see prompt_templates.py)
+STAR_ANALYSIS_TEMPLATE = PromptTemplate(
+    'analyze_response_star',
+    instructions="""
+You are an expert HR interviewer analyzing responses using the STAR method.
+
+Analyze the interview response in the user message using the STAR method (Situation, Task, Action, Result).
+
+Provide a detailed analysis in JSON format with:
+1. star_breakdown: Break down the response into STAR components (extract exact quotes where possible)
+2. missing_components: List which STAR components are missing or weak
+3. follow_up_questions: Generate 2-3 specific follow-up questions targeting missing STAR components
+4. strengths: List 2-3 strengths demonstrated in the response
+5. improvements: List 2-3 areas where the response could be improved
+""",
+    output_format=STAR_JSON_FORMAT,
+    delta="""
+Question: {question}
+
+Candidate Response: {response}
+""",
+    context_label='Role and candidate context'
+)
+
+STAR_DELTA_TEMPLATE = PromptTemplate(
+    'analyze_response_star_delta',
+    instructions="""
+You are an expert HR interviewer analyzing responses using the STAR method.
+
+You are continuing a live STAR analysis of an interview answer that is still being spoken.
+The user message gives the question, the STAR components identified so far (content omitted)
+and the new portion of the candidate's response, which has not been analyzed yet.
+
+Analyze ONLY the new portion and return the same JSON format as a full STAR analysis:
+star_breakdown (situation/task/action/result with present, content, quality for what the
+new portion adds), missing_components, follow_up_questions (targeting what is still missing
+overall), strengths, improvements and overall_quality (for the whole answer so far).
+""",
+    output_format=STAR_JSON_FORMAT,
+    delta="""
+Question: {question}
+
+STAR components identified so far (content omitted): {prior}
+
+New portion of the candidate's response (not yet analyzed): {new_text}
+"""
+)
+
+# Bump when the STAR prompt changes; batch re-scoring runs record it
+STAR_RUBRIC_VERSION = 'star/v1'
+
 
 class EnhancedAIService:
-    def __init__(self):
-        self.client = None
-        self.provider = 'simple'
-        self._initialize_client()
+    @property
+    def provider(self) -> str:
+        """AI provider in use ('openai' or 'bedrock'), based on the current settings."""
+        provider = llm_clients.active_provider()
+        return provider.name if provider else 'simple'
     
-    def _initialize_client(self):
-        """Initialize AI client based on configured provider."""
-        try:
-            from src.routes.settings import get_current_api_keys
-            keys = get_current_api_keys()
-            
-            if keys.get('ai_provider') == 'openai' and keys.get('openai'):
-                try:
-                    from openai import OpenAI
-                    self.client = OpenAI(api_key=keys['openai'])
-                    self.provider = 'openai'
-                except Exception as e:
-                    print(f"Failed to initialize OpenAI client: {str(e)}")
-                    self.provider = 'simple'
-            else:
-                # Fallback to simple implementation
-                self.provider = 'simple'
-        except Exception as e:
-            print(f"Failed to get API keys: {str(e)}")
-            self.provider = 'simple'
+    def _llm_available(self) -> bool:
+        """Whether to call the model; False when no provider is configured or its circuit breaker is open."""
+        return llm_clients.available(STAR_MODEL)
     
-    def analyze_response_star(self, question: str, response_text: str) -> Dict[str, Any]:
-        """Analyze candidate response for STAR components and generate follow-up questions."""
+    @instrumented('analyze_response_star')
+    def analyze_response_star(self, question: str, response_text: str, job_context: str = "") -> Dict[str, Any]:
+        """Analyze candidate response for STAR components and generate follow-up questions.
+        
+        job_context is the interview's compact context pack (services/context_pack.py), if any.
+        """
         
-        if not self.client or self.provider != 'openai':
+        if not self._llm_available():
             # Fallback to simple analysis
+            telemetry.note_fallback(reason='unavailable')
             return self._simple_star_analysis(response_text)
         
         try:
-            prompt = f"""
-            Analyze the following interview response using the STAR method (Situation, Task, Action, Result).
-            
-            Question: {question}
-            
-            Candidate Response: {response_text}
-            
-            Provide a detailed analysis in JSON format with:
-            1. star_breakdown: Break down the response into STAR components (extract exact quotes where possible)
-            2. missing_components: List which STAR components are missing or weak
-            3. follow_up_questions: Generate 2-3 specific follow-up questions targeting missing STAR components
-            4. strengths: List 2-3 strengths demonstrated in the response
-            5. improvements: List 2-3 areas where the response could be improved
-            
-            JSON format:
-            {{
-                "star_breakdown": {{
-                    "situation": {{
-                        "present": boolean,
-                        "content": "extracted content or null",
-                        "quality": "strong/adequate/weak/missing"
-                    }},
-                    "task": {{
-                        "present": boolean,
-                        "content": "extracted content or null",
-                        "quality": "strong/adequate/weak/missing"
-                    }},
-                    "action": {{
-                        "present": boolean,
-                        "content": "extracted content or null",
-                        "quality": "strong/adequate/weak/missing"
-                    }},
-                    "result": {{
-                        "present": boolean,
-                        "content": "extracted content or null",
-                        "quality": "strong/adequate/weak/missing"
-                    }}
-                }},
-                "missing_components": ["list of missing/weak components"],
-                "follow_up_questions": [
-                    "Specific follow-up question 1",
-                    "Specific follow-up question 2",
-                    "Specific follow-up question 3"
-                ],
-                "strengths": ["strength 1", "strength 2"],
-                "improvements": ["improvement 1", "improvement 2"],
-                "overall_quality": "excellent/good/adequate/needs_improvement"
-            }}
-            """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are an expert HR interviewer analyzing responses using the STAR method."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = llm_clients.complete(
+                model=STAR_MODEL,
+                messages=self._star_messages(question, response_text, job_context),
                 temperature=0.3,
                 response_format={"type": "json_object"}
             )
             
-            result = json.loads(response.choices[0].message.content)
+            result = parse_llm_output(response.content, StarAnalysis).to_dict()
             
             # Add summary points
-            result['summary_points'] = self._extract_summary_points(response_text)
+            result.update(self._summary(ResponseDocument(response_text)))
             
             return result
             
         except Exception as e:
+            telemetry.note_fallback(e)
             print(f"OpenAI API error: {str(e)}")
             # Fallback to simple analysis
             return self._simple_star_analysis(response_text)
     
+    @instrumented('analyze_response_star_delta')
+    def analyze_response_star_delta(self, question: str, previous_result: Dict[str, Any],
+                                    new_text: str, full_text: str) -> Dict[str, Any]:
+        """Analyze only the text added since previous_result and merge it in.
+        
+        The model sees the compact prior breakdown plus the new segment, so each
+        live update costs roughly the size of the delta rather than the whole transcript.
+        """
+        if not self._llm_available():
+            telemetry.note_fallback(reason='unavailable')
+            update = self._simple_star_analysis(new_text)
+            return self._merge_star_results(previous_result, update, new_text, full_text, recompute_quality=True)
+        
+        try:
+            prior = {
+                component: {
+                    'present': data.get('present', False),
+                    'quality': data.get('quality', 'missing')
+                }
+                for component, data in (previous_result.get('star_breakdown') or {}).items()
+            }
+            prompt_builder = PromptBuilder('analyze_response_star')
+            prompt_builder.add('question', question, priority=2, max_tokens=300)
+            prompt_builder.add('new_text', new_text, priority=1)
+            sections = prompt_builder.build()
+            
+            response = llm_clients.complete(
+                model=STAR_MODEL,
+                messages=STAR_DELTA_TEMPLATE.messages(question=sections['question'], prior=json.dumps(prior),
+                                                      new_text=sections['new_text']),
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            
+            update = parse_llm_output(response.content, StarAnalysis).to_dict()
+            return self._merge_star_results(previous_result, update, new_text, full_text, recompute_quality=False)
+            
+        except Exception as e:
+            telemetry.note_fallback(e)
+            print(f"OpenAI API error: {str(e)}")
+            update = self._simple_star_analysis(new_text)
+            return self._merge_star_results(previous_result, update, new_text, full_text, recompute_quality=True)
+    
+    def _merge_star_results(self, previous: Dict[str, Any], update: Dict[str, Any], new_text: str,
+                            full_text: str, recompute_quality: bool) -> Dict[str, Any]:
+        """Merge a delta analysis into an existing STAR result."""
+        old_breakdown = previous.get('star_breakdown') or {}
+        new_breakdown = update.get('star_breakdown') or {}
+        # Spans in the update are offsets into new_text, which ends the full transcript
+        offset = len(full_text) - len(new_text) if full_text.endswith(new_text) else None
+        
+        star_breakdown = {}
+        for component in STAR_COMPONENTS:
+            old = old_breakdown.get(component) or {}
+            new = new_breakdown.get(component) or {}
+            contents = [c for c in (old.get('content'), new.get('content')) if c]
+            content = '. '.join(contents) if contents else None
+            if recompute_quality:
+                # Same word-count thresholds as the keyword analysis, applied to the merged content
+                word_count = len(content.split()) if content else 0
+                quality = ("missing" if not content else "weak" if word_count < 10
+                           else "adequate" if word_count < 30 else "strong")
+            else:
+                quality = max(old.get('quality', 'missing'), new.get('quality', 'missing'),
+                              key=lambda q: QUALITY_RANK.get(q, 0))
+            spans = list(old.get('spans') or [])
+            if offset is not None:
+                spans += shift_spans(new.get('spans') or [], offset)
+            star_breakdown[component] = {
+                'present': bool(old.get('present') or new.get('present')),
+                'content': content,
+                'quality': quality,
+                'spans': spans
+            }
+        
+        missing_components = [
+            component for component, data in star_breakdown.items()
+            if not data['present'] or data['quality'] in ['missing', 'weak']
+        ]
+        
+        def merged_list(key):
+            items = []
+            for item in (update.get(key) or []) + (previous.get(key) or []):
+                if item not in items:
+                    items.append(item)
+            return items[:3]
+        
+        if recompute_quality or not update.get('overall_quality'):
+            present_count = sum(1 for c in star_breakdown.values() if c['present'])
+            if present_count == 4:
+                overall_quality = "good"
+            elif present_count >= 2:
+                overall_quality = "adequate"
+            else:
+                overall_quality = "needs_improvement"
+        else:
+            overall_quality = update['overall_quality']
+        
+        # Model follow-ups already account for the prior state; keyword ones only saw the delta
+        follow_up_questions = update.get('follow_up_questions') if not recompute_quality else None
+        
+        # The leading sentences rarely change once there are enough of them
+        if len(previous.get('summary_spans') or []) >= SUMMARY_POINTS:
+            summary = {'summary_points': previous['summary_points'], 'summary_spans': previous['summary_spans']}
+        else:
+            summary = self._summary(ResponseDocument(full_text))
+        
+        return {
+            'star_breakdown': star_breakdown,
+            'missing_components': missing_components,
+            'follow_up_questions': follow_up_questions or self.generate_star_follow_ups({'star_breakdown': star_breakdown}),
+            'strengths': merged_list('strengths'),
+            'improvements': merged_list('improvements'),
+            'overall_quality': overall_quality,
+            **summary
+        }
+    
+    def star_request(self, question: str, response_text: str, job_context: str = "") -> Dict[str, Any]:
+        """OpenAI chat completion body for a STAR analysis, as submitted by batch re-scoring."""
+        return {
+            'model': STAR_MODEL,
+            'messages': self._star_messages(question, response_text, job_context),
+            'temperature': 0.3,
+            'response_format': {"type": "json_object"}
+        }
+    
+    def _star_messages(self, question: str, response_text: str, job_context: str = "") -> List[Dict[str, str]]:
+        """Build the STAR analysis messages shared by the blocking and streaming paths."""
+        prompt_builder = PromptBuilder('analyze_response_star')
+        prompt_builder.add('question', question, priority=2, max_tokens=300)
+        prompt_builder.add('response', response_text, priority=1)
+        prompt_builder.add('job_context', job_context, priority=0, max_tokens=400)
+        sections = prompt_builder.build()
+        
+        return STAR_ANALYSIS_TEMPLATE.messages(sections['job_context'], question=sections['question'],
+                                               response=sections['response'])
+    
+    @instrumented_stream('stream_response_star')
+    def stream_response_star(self, question: str, response_text: str) -> Iterator[Dict[str, Any]]:
+        """Stream a STAR analysis as events.
+        
+        Yields {'event': ..., 'data': ...} dicts: 'delta' for raw token deltas,
+        'star_component' as each star_breakdown entry completes, 'follow_up_question'
+        as each follow-up completes, and finally 'complete' with the full result.
+        """
+        if not self._llm_available():
+            telemetry.note_fallback(reason='unavailable')
+            yield from self._events_from_result(self._simple_star_analysis(response_text))
+            return
+        
+        parser = StreamingOutputParser(StarAnalysis, STAR_STREAM_WATCH)
+        try:
+            stream = llm_clients.stream(
+                model=STAR_MODEL,
+                messages=self._star_messages(question, response_text),
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            
+            for delta in stream:
+                yield {'event': 'delta', 'data': {'text': delta}}
+                for path, value in parser.feed(delta):
+                    yield self._stream_event(path, value)
+            
+            result = parser.finish().to_dict()
+            result.update(self._summary(ResponseDocument(response_text)))
+            yield {'event': 'complete', 'data': result}
+            
+        except Exception as e:
+            telemetry.note_fallback(e)
+            print(f"LLM streaming error: {str(e)}")
+            # Fallback to simple analysis; components already sent are simply re-sent
+            yield from self._events_from_result(self._simple_star_analysis(response_text))
+    
+    def _stream_event(self, path, value) -> Dict[str, Any]:
+        if path[0] == 'star_breakdown':
+            return {'event': 'star_component', 'data': {'component': path[1], **value}}
+        return {'event': 'follow_up_question', 'data': {'index': path[1], 'question': value}}
+    
+    def _events_from_result(self, result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Replay a finished analysis as the same events the streaming path emits."""
+        for component, data in (result.get('star_breakdown') or {}).items():
+            yield self._stream_event(('star_breakdown', component), data)
+        for index, question in enumerate(result.get('follow_up_questions') or []):
+            yield self._stream_event(('follow_up_questions', index), question)
+        yield {'event': 'complete', 'data': result}
+    
     def generate_star_follow_ups(self, star_analysis: Dict[str, Any]) -> List[str]:
         """Generate specific follow-up questions based on missing STAR components."""
         
@@ -141,60 +368,29 @@ class EnhancedAIService:
     
     def _simple_star_analysis(self, response_text: str) -> Dict[str, Any]:
         """Simple STAR analysis fallback when API is not available."""
-        words = response_text.lower().split()
-        
-        # Keywords for each STAR component
-        situation_keywords = ["situation", "when", "time", "project", "company", "team", "context", "background"]
-        task_keywords = ["task", "responsibility", "goal", "objective", "needed", "required", "assigned", "role"]
-        action_keywords = ["action", "did", "implemented", "created", "developed", "led", "managed", "approached", "decided"]
-        result_keywords = ["result", "outcome", "achieved", "improved", "increased", "successful", "impact", "saved", "reduced"]
-        
-        def extract_content(keywords, text):
-            """Extract sentences containing keywords."""
-            sentences = text.split('.')
-            relevant = []
-            for sentence in sentences:
-                if any(keyword in sentence.lower() for keyword in keywords):
-                    relevant.append(sentence.strip())
-            return '. '.join(relevant[:2]) if relevant else None
-        
-        def assess_quality(content, keywords, word_count):
-            """Assess the quality of a STAR component."""
-            if not content:
+        # Sentences are segmented and tagged once; components refer to them by offsets
+        document = ResponseDocument(response_text)
+        
+        def assess_quality(spans):
+            """Assess the quality of a STAR component from the words in its sentences."""
+            if not spans:
                 return "missing"
-            if len(content.split()) < 10:
+            word_count = sum(document.count_words(span) for span in spans)
+            if word_count < 10:
                 return "weak"
-            if len(content.split()) < 30:
+            if word_count < 30:
                 return "adequate"
             return "strong"
         
-        situation_content = extract_content(situation_keywords, response_text)
-        task_content = extract_content(task_keywords, response_text)
-        action_content = extract_content(action_keywords, response_text)
-        result_content = extract_content(result_keywords, response_text)
-        
-        star_breakdown = {
-            "situation": {
-                "present": bool(situation_content),
-                "content": situation_content,
-                "quality": assess_quality(situation_content, situation_keywords, len(words))
-            },
-            "task": {
-                "present": bool(task_content),
-                "content": task_content,
-                "quality": assess_quality(task_content, task_keywords, len(words))
-            },
-            "action": {
-                "present": bool(action_content),
-                "content": action_content,
-                "quality": assess_quality(action_content, action_keywords, len(words))
-            },
-            "result": {
-                "present": bool(result_content),
-                "content": result_content,
-                "quality": assess_quality(result_content, result_keywords, len(words))
+        star_breakdown = {}
+        for component in STAR_COMPONENTS:
+            spans = document.component_spans(component)
+            star_breakdown[component] = {
+                "present": bool(spans),
+                "content": document.excerpt(spans),
+                "quality": assess_quality(spans),
+                "spans": [list(span) for span in spans]
             }
-        }
         
         # Identify missing components
         missing_components = []
@@ -227,11 +423,13 @@ class EnhancedAIService:
                 "Could include more quantifiable results"
             ],
             "overall_quality": overall_quality,
-            "summary_points": self._extract_summary_points(response_text)
+            **self._summary(document)
         }
     
-    def _extract_summary_points(self, text: str) -> List[str]:
-        """Extract key summary points from the response."""
-        sentences = text.split('.')
-        # Return first 3 sentences as summary points
-        return [s.strip() for s in sentences[:3] if s.strip()][:3]
\ No newline at end of file
+    def _summary(self, document: ResponseDocument) -> Dict[str, Any]:
+        """The response's leading sentences as summary points, with their offsets."""
+        spans = document.summary_spans()
+        return {
+            'summary_points': [document.slice(span) for span in spans],
+            'summary_spans': [list(span) for span in spans]
+        }
\ No newline at end of file
@@ -1,38 +1,139 @@
+import copy
 import json
-import re
 import os
 from typing import List, Dict, Any, Optional
 
+from src.services.llm_cache import llm_cache
+from src.services.llm_clients import llm_clients
+from src.services.prompt_budget import PromptBuilder
+from src.services.prompt_templates import PromptTemplate
+from src.services.question_embeddings import SemanticQuestionIndex
+from src.services.question_index import QuestionIndex, match_question
+from src.services.response_document import ResponseDocument
+from src.services.interview_rollup import local_final_evaluation
+from src.services.llm_output import CombinedAnalysis, DocumentAnalysis, FinalEvaluation, QuestionList, parse_llm_output
+from src.services.structured_output import COMBINED_ANALYSIS_SCHEMA, response_format_for
+from src.services.telemetry import instrumented, telemetry
+
+# Bump a version whenever its prompt template changes so stale cache entries are ignored
+ANALYZE_DOCUMENTS_PROMPT_VERSION = 'simple/analyze_documents/v2'
+INTERVIEW_QUESTIONS_PROMPT_VERSION = 'simple/interview_questions/v3'
+COMBINED_ANALYSIS_PROMPT_VERSION = 'simple/combined_analysis/v1'
+
+# Model for the single-call analysis + question generation mode
+COMBINED_ANALYSIS_MODEL = os.environ.get('COMBINED_ANALYSIS_MODEL', 'gpt-4-turbo-preview')
+
+# Model for the final evaluation, which only sees the interview rollup
+FINAL_EVALUATION_MODEL = os.environ.get('FINAL_EVALUATION_MODEL', 'gpt-3.5-turbo')
+
+# Static instructions first and the analysis next, so calls share a cacheable prefix (see prompt_templates.py)
+INTERVIEW_QUESTIONS_TEMPLATE = PromptTemplate(
+    'generate_interview_questions',
+    instructions="""
+You are an expert interviewer. Generate insightful questions.
+
+Based on the candidate analysis in the user message, generate the requested number of tailored interview questions that:
+1. Explore gaps between candidate skills and job requirements
+2. Assess technical competencies mentioned in resume
+3. Evaluate behavioral fit based on job culture
+4. Include STAR-based situational questions
+""",
+    output_format="""
+Return as JSON array with format:
+[{"text": "question", "category": "technical/behavioral/situational/cultural", "rationale": "why this question"}]
+""",
+    delta="Generate {num_questions} tailored interview questions.",
+    context_label='Analysis'
+)
+
+# Canned analysis returned when no LLM result is available
+FALLBACK_DOCUMENT_ANALYSIS = {
+    "candidate_profile": {
+        "key_skills": ["Python", "JavaScript", "React", "Flask", "SQL"],
+        "experience_years": "5+ years",
+        "education": "Bachelor's in Computer Science",
+        "notable_achievements": [
+            "Led development team of 4 engineers",
+            "Increased system efficiency by 30%",
+            "Implemented CI/CD pipeline"
+        ],
+        "strengths": [
+            "Strong technical background",
+            "Leadership experience",
+            "Problem-solving skills"
+        ],
+        "potential_concerns": [
+            "Limited experience with specific technologies",
+            "May need mentoring in domain knowledge"
+        ]
+    },
+    "job_requirements": {
+        "required_skills": ["Python", "Web Development", "Database Design"],
+        "preferred_qualifications": ["React", "AWS", "Agile methodology"],
+        "key_responsibilities": [
+            "Develop web applications",
+            "Collaborate with cross-functional teams",
+            "Maintain code quality"
+        ],
+        "company_culture_indicators": [
+            "Innovation-focused",
+            "Collaborative environment",
+            "Growth opportunities"
+        ]
+    },
+    "match_analysis": {
+        "skill_match_percentage": 85,
+        "experience_alignment": "Strong alignment with required experience level",
+        "gaps_to_explore": [
+            "Specific domain knowledge",
+            "Experience with company's tech stack"
+        ],
+        "strengths_to_highlight": [
+            "Technical leadership",
+            "Full-stack development",
+            "Problem-solving approach"
+        ]
+    }
+}
+
 class AIService:
     def __init__(self):
-        # Try to use OpenAI if API key is available
-        self.openai_client = None
-        self.api_key = os.environ.get('OPENAI_API_KEY', '')
-        
-        if self.api_key:
-            try:
-                from openai import OpenAI
-                self.openai_client = OpenAI(api_key=self.api_key)
-                print("AI Service initialized with OpenAI")
-            except Exception as e:
-                print(f"Failed to initialize OpenAI: {e}")
-                self.openai_client = None
+        # The LLM provider (OpenAI or Bedrock) is used if one is configured; clients are shared through the registry
+        if self.llm_provider:
+            print(f"AI Service initialized with {self.llm_provider.name}")
         else:
             print("AI Service running in fallback mode (no API key)")
     
+    @property
+    def llm_provider(self):
+        return llm_clients.active_provider()
+    
+    @instrumented('analyze_documents')
     def analyze_documents(self, resume_text: str, job_listing_text: str, company_questions: str = "") -> Dict[str, Any]:
         """Analyze uploaded documents to extract key information."""
         
         # If OpenAI is available, use it for analysis
-        if self.openai_client:
+        if self.llm_provider:
+            model = "gpt-3.5-turbo"
+            prompt_builder = PromptBuilder('analyze_documents', budget_tokens=1500, model=model)
+            prompt_builder.add('resume', resume_text, priority=2)
+            prompt_builder.add('job_listing', job_listing_text, priority=1)
+            sections = prompt_builder.build()
+            
+            cache_key = llm_cache.make_key('analyze_documents', ANALYZE_DOCUMENTS_PROMPT_VERSION, llm_clients.model_id(model),
+                                           sections['resume'], sections['job_listing'])
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
             try:
                 prompt = f"""Analyze the following resume and job listing to extract key information.
 
 Resume:
-{resume_text[:2000]}
+{sections['resume']}
 
 Job Listing:
-{job_listing_text[:2000]}
+{sections['job_listing']}
 
 Provide a JSON analysis with:
 1. candidate_profile: key skills, experience, achievements, strengths, concerns
@@ -41,8 +142,8 @@ Provide a JSON analysis with:
 
 Return only valid JSON."""
 
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
+                response = llm_clients.complete(
+                    model=model,
                     messages=[
                         {"role": "system", "content": "You are an expert HR analyst. Provide analysis in JSON format."},
                         {"role": "user", "content": prompt}
@@ -51,115 +152,127 @@ Return only valid JSON."""
                     temperature=0.7
                 )
                 
-                # Parse the response
-                content = response.choices[0].message.content
-                # Try to extract JSON from the response
-                try:
-                    # Find JSON in the response
-                    import re
-                    json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                    if json_match:
-                        return json.loads(json_match.group())
-                except:
-                    pass
+                analysis = parse_llm_output(response.content, DocumentAnalysis).to_dict()
+                llm_cache.set(cache_key, analysis, operation='analyze_documents', model=model)
+                return analysis
                     
             except Exception as e:
+                telemetry.note_fallback(e)
                 print(f"OpenAI analysis failed: {e}")
         
         # Fallback to simple analysis
-        return {
-            "candidate_profile": {
-                "key_skills": ["Python", "JavaScript", "React", "Flask", "SQL"],
-                "experience_years": "5+ years",
-                "education": "Bachelor's in Computer Science",
-                "notable_achievements": [
-                    "Led development team of 4 engineers",
-                    "Increased system efficiency by 30%",
-                    "Implemented CI/CD pipeline"
-                ],
-                "strengths": [
-                    "Strong technical background",
-                    "Leadership experience",
-                    "Problem-solving skills"
-                ],
-                "potential_concerns": [
-                    "Limited experience with specific technologies",
-                    "May need mentoring in domain knowledge"
-                ]
-            },
-            "job_requirements": {
-                "required_skills": ["Python", "Web Development", "Database Design"],
-                "preferred_qualifications": ["React", "AWS", "Agile methodology"],
-                "key_responsibilities": [
-                    "Develop web applications",
-                    "Collaborate with cross-functional teams",
-                    "Maintain code quality"
-                ],
-                "company_culture_indicators": [
-                    "Innovation-focused",
-                    "Collaborative environment",
-                    "Growth opportunities"
-                ]
-            },
-            "match_analysis": {
-                "skill_match_percentage": 85,
-                "experience_alignment": "Strong alignment with required experience level",
-                "gaps_to_explore": [
-                    "Specific domain knowledge",
-                    "Experience with company's tech stack"
+        telemetry.note_fallback(reason=None if self.llm_provider else 'unavailable')
+        return copy.deepcopy(FALLBACK_DOCUMENT_ANALYSIS)
+    
+    @instrumented('analyze_and_generate_questions')
+    def analyze_and_generate_questions(self, resume_text: str, job_listing_text: str, company_questions: str = "",
+                                       num_questions: int = 7) -> Optional[Dict[str, Any]]:
+        """Analyze documents and generate tailored questions in one structured request.
+        
+        Returns {'analysis': ..., 'questions': [...]} when the response passes schema
+        validation, or None so the caller can fall back to the multi-call chain.
+        """
+        if not self.llm_provider:
+            telemetry.note_fallback(reason='unavailable')
+            return None
+        
+        model = COMBINED_ANALYSIS_MODEL
+        prompt_builder = PromptBuilder('analyze_documents', model=model)
+        prompt_builder.add('resume', resume_text, priority=3)
+        prompt_builder.add('job_listing', job_listing_text, priority=2)
+        prompt_builder.add('company_questions', company_questions, priority=1, max_tokens=800)
+        sections = prompt_builder.build()
+        
+        cache_key = llm_cache.make_key('analyze_and_generate_questions', COMBINED_ANALYSIS_PROMPT_VERSION, llm_clients.model_id(model),
+                                       sections['resume'], sections['job_listing'], sections['company_questions'],
+                                       num_questions)
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = f"""Analyze this resume and job listing, then write {num_questions} interview questions tailored to both.
+
+Resume:
+{sections['resume']}
+
+Job Listing:
+{sections['job_listing']}
+
+Company Interview Questions (if provided):
+{sections['company_questions']}
+
+Return a single JSON object:
+{{
+  "analysis": {{
+    "candidate_profile": {{"key_skills": [], "experience_years": "", "current_role": "", "companies_worked": [], "education": "", "notable_achievements": [], "projects": [], "strengths": [], "potential_concerns": []}},
+    "job_requirements": {{"job_title": "", "company_name": "", "required_skills": [], "preferred_qualifications": [], "key_responsibilities": [], "experience_required": "", "industry_context": ""}},
+    "match_analysis": {{"matching_skills": [], "missing_skills": [], "relevant_experience": [], "transferable_skills": [], "areas_to_probe": []}}
+  }},
+  "questions": [
+    {{"text": "question", "category": "behavioral|technical|situational|cultural", "rationale": "why this question"}}
+  ]
+}}
+
+Extract actual company names, projects, technologies and achievements from the documents.
+Each question must reference something specific from the resume and connect it to a specific job requirement."""
+
+        try:
+            response = llm_clients.complete(
+                model=model,
+                messages=[
+                    {"role": "system", "content": "You are an expert HR analyst and interviewer. Respond with JSON only."},
+                    {"role": "user", "content": prompt}
                 ],
-                "strengths_to_highlight": [
-                    "Technical leadership",
-                    "Full-stack development",
-                    "Problem-solving approach"
-                ]
-            }
-        }
+                temperature=0.5,
+                max_tokens=3000,
+                response_format=response_format_for(model, 'combined_analysis', COMBINED_ANALYSIS_SCHEMA)
+            )
+            
+            result = parse_llm_output(response.content, CombinedAnalysis).to_dict(num_questions)
+            llm_cache.set(cache_key, result, operation='analyze_and_generate_questions', model=model)
+            return result
+            
+        except Exception as e:
+            telemetry.note_fallback(e)
+            print(f"Combined analysis failed: {e}")
+            return None
     
+    @instrumented('generate_interview_questions')
     def generate_interview_questions(self, analysis_result: Dict[str, Any], num_questions: int = 5) -> List[Dict[str, str]]:
         """Generate tailored interview questions based on document analysis."""
         
         # If OpenAI is available, generate contextual questions
-        if self.openai_client:
+        if self.llm_provider:
+            model = "gpt-3.5-turbo"
+            prompt_builder = PromptBuilder('generate_interview_questions', budget_tokens=600, model=model)
+            # Compact separators fit more of the analysis into the same budget than indented JSON
+            prompt_builder.add('analysis', json.dumps(analysis_result, separators=(',', ':')), priority=1)
+            sections = prompt_builder.build()
+            
+            cache_key = llm_cache.make_key('generate_interview_questions', INTERVIEW_QUESTIONS_PROMPT_VERSION, llm_clients.model_id(model),
+                                           sections['analysis'], num_questions)
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
             try:
-                prompt = f"""Based on this candidate analysis, generate {num_questions} tailored interview questions.
-
-Analysis: {json.dumps(analysis_result, indent=2)[:1500]}
-
-Generate questions that:
-1. Explore gaps between candidate skills and job requirements
-2. Assess technical competencies mentioned in resume
-3. Evaluate behavioral fit based on job culture
-4. Include STAR-based situational questions
-
-Return as JSON array with format:
-[{{"text": "question", "category": "technical/behavioral/situational/cultural", "rationale": "why this question"}}]"""
-
-                response = self.openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are an expert interviewer. Generate insightful questions."},
-                        {"role": "user", "content": prompt}
-                    ],
+                response = llm_clients.complete(
+                    model=model,
+                    messages=INTERVIEW_QUESTIONS_TEMPLATE.messages(sections['analysis'], num_questions=num_questions),
                     max_tokens=600,
                     temperature=0.8
                 )
                 
-                content = response.choices[0].message.content
-                # Try to extract JSON array
-                try:
-                    import re
-                    json_match = re.search(r'\[.*\]', content, re.DOTALL)
-                    if json_match:
-                        questions = json.loads(json_match.group())
-                        return questions[:num_questions]
-                except:
-                    pass
+                questions = parse_llm_output(response.content, QuestionList).to_list(num_questions)
+                llm_cache.set(cache_key, questions, operation='generate_interview_questions', model=model)
+                return questions
                     
             except Exception as e:
+                telemetry.note_fallback(e)
                 print(f"OpenAI question generation failed: {e}")
         
         # Fallback: Pre-defined questions based on common scenarios
+        telemetry.note_fallback(reason=None if self.llm_provider else 'unavailable')
         questions = [
             {
                 "text": "Tell me about a challenging technical problem you solved and how you approached it.",
@@ -192,39 +305,34 @@ Return as JSON array with format:
     
     def analyze_response(self, question: str, response_text: str, job_context: str = "") -> Dict[str, Any]:
         """Analyze candidate response and provide STAR breakdown and evaluation."""
-        # Simplified analysis
-        words = response_text.lower().split()
-        
-        # Simple STAR detection based on keywords
-        situation_keywords = ["situation", "when", "time", "project", "company", "team"]
-        task_keywords = ["task", "responsibility", "goal", "objective", "needed", "required"]
-        action_keywords = ["action", "did", "implemented", "created", "developed", "led", "managed"]
-        result_keywords = ["result", "outcome", "achieved", "improved", "increased", "successful"]
-        
-        def has_keywords(keywords, text_words):
-            return any(keyword in text_words for keyword in keywords)
-        
+        # STAR detection based on keywords (shared with the enhanced fallback)
+        document = ResponseDocument(response_text)
+        spans = document.components
         star_analysis = {
             "situation": {
-                "present": has_keywords(situation_keywords, words),
-                "content": "Context provided about the scenario" if has_keywords(situation_keywords, words) else None
+                "present": bool(spans["situation"]),
+                "content": "Context provided about the scenario" if spans["situation"] else None,
+                "spans": [list(span) for span in document.component_spans("situation")]
             },
             "task": {
-                "present": has_keywords(task_keywords, words),
-                "content": "Specific responsibilities mentioned" if has_keywords(task_keywords, words) else None
+                "present": bool(spans["task"]),
+                "content": "Specific responsibilities mentioned" if spans["task"] else None,
+                "spans": [list(span) for span in document.component_spans("task")]
             },
             "action": {
-                "present": has_keywords(action_keywords, words),
-                "content": "Actions taken described" if has_keywords(action_keywords, words) else None
+                "present": bool(spans["action"]),
+                "content": "Actions taken described" if spans["action"] else None,
+                "spans": [list(span) for span in document.component_spans("action")]
             },
             "result": {
-                "present": has_keywords(result_keywords, words),
-                "content": "Outcomes and results shared" if has_keywords(result_keywords, words) else None
+                "present": bool(spans["result"]),
+                "content": "Outcomes and results shared" if spans["result"] else None,
+                "spans": [list(span) for span in document.component_spans("result")]
             }
         }
         
         # Simple scoring based on response length and STAR completeness
-        word_count = len(words)
+        word_count = document.word_count
         star_completeness = sum(1 for component in star_analysis.values() if component["present"])
         
         relevance_score = min(10, word_count / 10)  # Basic scoring
@@ -237,7 +345,7 @@ Return as JSON array with format:
                 "Candidate provided context about the situation",
                 "Specific actions and approaches were described", 
                 "Results and outcomes were mentioned"
-            ][:min(3, len(response_text.split('.')))],
+            ][:min(3, len(document.sentences))],
             "star_analysis": star_analysis,
             "evaluation": {
                 "relevance_score": round(relevance_score, 1),
@@ -273,63 +381,76 @@ Return as JSON array with format:
         
         return follow_ups[:3]
     
+    @instrumented('generate_final_evaluation')
     def generate_final_evaluation(self, interview_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate final candidate evaluation based on all responses."""
-        # Simplified evaluation
-        return {
-            "overall_score": 78,
-            "category_scores": {
-                "technical_competency": 82,
-                "communication_skills": 85,
-                "cultural_fit": 75,
-                "problem_solving": 80,
-                "leadership_potential": 70
-            },
-            "strengths": [
-                "Strong technical background with relevant experience",
-                "Excellent communication and articulation skills", 
-                "Demonstrated problem-solving abilities",
-                "Good understanding of industry best practices"
-            ],
-            "areas_for_development": [
-                "Could provide more specific examples in behavioral responses",
-                "Leadership experience could be more extensive"
-            ],
-            "recommendation": "hire",
-            "key_insights": [
-                "Candidate shows strong technical competency aligned with job requirements",
-                "Communication style would fit well with team culture",
-                "Previous experience directly applicable to role responsibilities"
-            ],
-            "next_steps": [
-                "Schedule technical interview with team lead",
-                "Check references from previous employers"
-            ],
-            "summary": "Strong candidate with excellent technical skills and communication abilities. Recommended for next round of interviews with some areas for further exploration."
-        }
-    
-    def detect_question_match(self, spoken_text: str, available_questions: List[str]) -> Optional[Dict[str, Any]]:
-        """Detect which question from the list matches the spoken text."""
-        # Simple text matching
-        spoken_lower = spoken_text.lower()
+        """Generate the final evaluation from the interview's rollup (services/interview_rollup.py).
         
-        for i, question in enumerate(available_questions):
-            question_lower = question.lower()
-            # Simple keyword matching
-            question_words = set(question_lower.split())
-            spoken_words = set(spoken_lower.split())
+        interview_data carries the interview summary, the context pack text and the rollup
+        payload, so the request is bounded however many responses were saved. Without an
+        LLM, or if the call fails, the rollup is aggregated locally.
+        """
+        rollup = interview_data.get('rollup') or {}
+        
+        if self.llm_provider:
+            model = FINAL_EVALUATION_MODEL
+            prompt_builder = PromptBuilder('generate_final_evaluation', budget_tokens=2000, model=model)
+            prompt_builder.add('interview', json.dumps(interview_data.get('interview') or {}), priority=3)
+            prompt_builder.add('context', interview_data.get('context', ''), priority=1, max_tokens=400)
+            prompt_builder.add('rollup', json.dumps(rollup, indent=1), priority=2)
+            sections = prompt_builder.build()
             
-            # Calculate overlap
-            overlap = len(question_words.intersection(spoken_words))
-            if overlap >= 3:  # Threshold for match
-                return {
-                    "matched": True,
-                    "question_index": i,
-                    "confidence": min(0.95, overlap / len(question_words)),
-                    "exact_match": spoken_lower == question_lower
-                }
+            try:
+                prompt = f"""Provide a final evaluation of this candidate from their interview results.
+
+Interview:
+{sections['interview']}
+
+Role context:
+{sections['context']}
+
+Per-response summaries (scores 0-100) and aggregates:
+{sections['rollup']}
+
+Return only valid JSON:
+{{"overall_score": 0-100, "category_scores": {{"technical_competency": 0-100, "communication_skills": 0-100, "cultural_fit": 0-100, "problem_solving": 0-100, "leadership_potential": 0-100}}, "strengths": ["..."], "areas_for_development": ["..."], "recommendation": "strong_hire|hire|maybe|no_hire", "key_insights": ["..."], "next_steps": ["..."], "summary": "2-3 sentences"}}"""
+
+                response = llm_clients.complete(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are an expert HR analyst. Provide the evaluation in JSON format."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=700,
+                    temperature=0.3
+                )
+                
+                return parse_llm_output(response.content, FinalEvaluation).to_dict()
+                
+            except Exception as e:
+                telemetry.note_fallback(e)
+                print(f"OpenAI final evaluation failed: {e}")
         
-        return {"matched": False, "question_index": None, "confidence": 0.0, "exact_match": False}
+        # Fallback: aggregate the rollup locally
+        telemetry.note_fallback(reason=None if self.llm_provider else 'unavailable')
+        return local_final_evaluation(rollup)
+    
+    def detect_question_match(self, spoken_text: str, available_questions: List[str]) -> Optional[Dict[str, Any]]:
+        """Detect which question from the list matches the spoken text (BM25, then embeddings; see question_index.py)."""
+        questions = list(enumerate(available_questions))
+        best, matches, method = match_question(QuestionIndex(questions), SemanticQuestionIndex.from_texts(questions),
+                                               spoken_text)
+        ranked = [{"question_index": m["key"], "confidence": m["confidence"], "score": m["score"]} for m in matches]
+        if best is None:
+            return {"matched": False, "question_index": None, "confidence": 0.0, "exact_match": False,
+                    "matches": ranked}
+        return {
+            "matched": True,
+            "question_index": best["key"],
+            "confidence": best["confidence"],
+            "exact_match": best["exact_match"],
+            "match_method": method,
+            "matches": ranked
+        }
 
 # Pre-populated common HR interview questions
 COMMON_HR_QUESTIONS = [
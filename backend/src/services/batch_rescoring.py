@@ -0,0 +1,280 @@
+"""
+Bulk re-scoring of stored responses through the OpenAI Batch API.
+
+After a change to the STAR rubric (see STAR_RUBRIC_VERSION in
+ai_service_enhanced.py) every stored Response can be re-analyzed without one
+synchronous call per row: rows are packed into Batch API submissions (billed at
+half price), the batches are polled until they finish, and the STAR
+breakdowns are written back to star_analysis with one bulk update per batch.
+Each request carries its interview's context pack, like the live analysis.
+evaluation_score is left alone (it holds the live answer score, a different
+metric), and the affected rollups are recounted from the new breakdowns with
+their strength and improvement tallies kept. Progress is kept in a JSON checkpoint file, so an interrupted run picks
+up where it stopped: submitted batches are polled again instead of resubmitted,
+and packing resumes after the last row already submitted.
+
+Run from the backend directory:
+
+    python -m src.services.batch_rescoring --checkpoint rescore.json
+
+With LLM_MOCK_URL set, batches go to the mock server's Batch API
+(services/mock_llm_server.py), which is the local stand-in for testing.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.models.interview import db, Interview, Response
+from src.services.ai_service_enhanced import EnhancedAIService, STAR_MODEL, STAR_RUBRIC_VERSION
+from src.services.context_pack import get_context_text
+from src.services.interview_rollup import refresh_rollup
+from src.services.llm_output import StarAnalysis, parse_llm_output
+from src.services.telemetry import telemetry
+
+RESCORE_BATCH_SIZE = int(os.environ.get('RESCORE_BATCH_SIZE', 1000))
+RESCORE_POLL_SECONDS = float(os.environ.get('RESCORE_POLL_SECONDS', 30))
+RESCORE_MAX_IN_FLIGHT = int(os.environ.get('RESCORE_MAX_IN_FLIGHT', 4))
+
+# OpenAI's per-batch request limit
+OPENAI_BATCH_MAX_REQUESTS = 50000
+# Batch API calls are billed at half the synchronous price
+BATCH_PRICE_RATIO = 0.5
+# Ids per IN (...) clause, below SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 500
+
+TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+_custom_id_prefix = 'response-'
+
+
+class OpenAIBatchBackend:
+    """Submits chat completion requests as OpenAI Batch API jobs."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests: List[Dict[str, Any]], metadata: Dict[str, str]) -> Dict[str, str]:
+        """Upload requests ({'custom_id', 'body'}) as a JSONL file and start a batch over it."""
+        lines = ''.join(json.dumps({'custom_id': r['custom_id'], 'method': 'POST', 'url': '/v1/chat/completions',
+                                    'body': r['body']}) + '\n' for r in requests)
+        upload = self.client.files.create(file=('rescore.jsonl', lines.encode('utf-8')), purpose='batch')
+        batch = self.client.batches.create(input_file_id=upload.id, endpoint='/v1/chat/completions',
+                                           completion_window='24h', metadata=metadata)
+        return {'batch_id': batch.id, 'input_file_id': upload.id}
+
+    def poll(self, batch_id: str) -> Dict[str, Any]:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            'status': batch.status,
+            'output_file_id': batch.output_file_id,
+            'error_file_id': batch.error_file_id,
+            'request_counts': {'total': counts.total, 'completed': counts.completed, 'failed': counts.failed}
+            if counts else {}
+        }
+
+    def read_results(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        text = self.client.files.content(file_id).text
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class Checkpoint:
+    """Run state persisted as JSON after every submission and every write."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data: Dict[str, Any] = {}
+
+    def load(self, settings: Dict[str, Any]) -> None:
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.data = json.load(f)
+            if self.data.get('settings') != settings:
+                raise ValueError(f"Checkpoint {self.path} was written for {self.data.get('settings')}, "
+                                 f"not {settings}; use a new checkpoint file for a different run")
+            print(f"Resuming from {self.path}: {len(self.data['batches'])} batches, "
+                  f"last submitted response {self.data['last_response_id']}")
+        else:
+            self.data = {'settings': settings, 'created_at': datetime.utcnow().isoformat(),
+                         'last_response_id': 0, 'submitted': 0, 'batches': [],
+                         'totals': {'rescored': 0, 'failed': 0, 'unparsed': 0,
+                                    'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0}}
+
+    def save(self) -> None:
+        self.data['updated_at'] = datetime.utcnow().isoformat()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=1)
+        os.replace(tmp_path, self.path)  # never leave a half-written checkpoint
+
+    def pending(self) -> List[Dict[str, Any]]:
+        return [b for b in self.data['batches'] if b['status'] not in TERMINAL_STATUSES + ('written',)]
+
+
+class BatchRescorer:
+    def __init__(self, backend, checkpoint: Checkpoint, batch_size: int = RESCORE_BATCH_SIZE,
+                 poll_seconds: float = RESCORE_POLL_SECONDS, max_in_flight: int = RESCORE_MAX_IN_FLIGHT,
+                 interview_id: Optional[int] = None, limit: Optional[int] = None):
+        self.backend = backend
+        self.checkpoint = checkpoint
+        self.batch_size = min(batch_size, OPENAI_BATCH_MAX_REQUESTS)
+        self.poll_seconds = poll_seconds
+        self.max_in_flight = max(1, max_in_flight)
+        self.interview_id = interview_id
+        self.limit = limit
+        self.ai_service = EnhancedAIService()
+        self._contexts: Dict[int, str] = {}
+
+    def settings(self) -> Dict[str, Any]:
+        return {'rubric': STAR_RUBRIC_VERSION, 'model': STAR_MODEL, 'interview_id': self.interview_id}
+
+    def run(self, wait: bool = True) -> Dict[str, Any]:
+        """Submit every remaining row and write back finished batches.
+
+        With wait=False, submits what fits in flight, writes back whatever has
+        finished and returns; run again with the same checkpoint to continue.
+        """
+        self.checkpoint.load(self.settings())
+        self.poll_pending()
+        while True:
+            while len(self.checkpoint.pending()) >= self.max_in_flight:
+                if not wait:
+                    return self.checkpoint.data['totals']
+                time.sleep(self.poll_seconds)
+                self.poll_pending()
+            rows = self._next_rows()
+            if not rows:
+                break
+            self._submit(rows)
+        while wait and self.checkpoint.pending():
+            time.sleep(self.poll_seconds)
+            self.poll_pending()
+        return self.checkpoint.data['totals']
+
+    def _next_rows(self) -> List[Any]:
+        size = self.batch_size
+        if self.limit is not None:
+            size = min(size, self.limit - self.checkpoint.data['submitted'])
+            if size <= 0:
+                return []
+        query = db.session.query(Response.id, Response.interview_id, Response.question_text,
+                                 Response.transcribed_text).filter(
+            Response.id > self.checkpoint.data['last_response_id'])
+        if self.interview_id is not None:
+            query = query.filter(Response.interview_id == self.interview_id)
+        return query.order_by(Response.id).limit(size).all()
+
+    def _context(self, interview_id: int) -> str:
+        """The interview's context pack text, as the live STAR analysis gets it as job_context."""
+        if interview_id not in self._contexts:
+            interview = db.session.get(Interview, interview_id)
+            self._contexts[interview_id] = get_context_text(interview) if interview else ''
+        return self._contexts[interview_id]
+
+    def _submit(self, rows: List[Any]) -> None:
+        requests = [{'custom_id': f"{_custom_id_prefix}{row.id}",
+                     'body': self.ai_service.star_request(row.question_text, row.transcribed_text,
+                                                          self._context(row.interview_id))}
+                    for row in rows]
+        submission = self.backend.submit(requests, {'job': 'rescore', 'rubric': STAR_RUBRIC_VERSION})
+        data = self.checkpoint.data
+        data['batches'].append(dict(submission, status='submitted', first_response_id=rows[0].id,
+                                    last_response_id=rows[-1].id, requests=len(rows),
+                                    submitted_at=datetime.utcnow().isoformat()))
+        data['last_response_id'] = rows[-1].id
+        data['submitted'] += len(rows)
+        self.checkpoint.save()
+        print(f"Submitted batch {submission['batch_id']} with {len(rows)} responses "
+              f"({rows[0].id}-{rows[-1].id})")
+
+    def poll_pending(self) -> None:
+        for entry in self.checkpoint.pending():
+            state = self.backend.poll(entry['batch_id'])
+            if state['status'] not in TERMINAL_STATUSES:
+                if state['status'] != entry['status']:
+                    entry['status'] = state['status']
+                    self.checkpoint.save()
+                continue
+            # Expired and cancelled batches still return the requests that finished
+            written = self._write_results(entry, self.backend.read_results(state['output_file_id']),
+                                          self.backend.read_results(state['error_file_id']))
+            entry['status'] = 'written' if state['status'] == 'completed' else state['status']
+            entry['finished_at'] = datetime.utcnow().isoformat()
+            entry['request_counts'] = state['request_counts']
+            self.checkpoint.save()
+            print(f"Batch {entry['batch_id']} {state['status']}: wrote {written} of {entry['requests']} responses")
+
+    def _write_results(self, entry: Dict[str, Any], records: List[Dict[str, Any]],
+                       errors: List[Dict[str, Any]]) -> int:
+        totals = self.checkpoint.data['totals']
+        mappings = []
+        for record in records:
+            response = record.get('response') or {}
+            body = response.get('body') or {}
+            if response.get('status_code') != 200 or not body.get('choices'):
+                totals['failed'] += 1
+                continue
+            usage = body.get('usage') or {}
+            totals['prompt_tokens'] += usage.get('prompt_tokens', 0)
+            totals['completion_tokens'] += usage.get('completion_tokens', 0)
+            totals['cost_usd'] += telemetry.cost(body.get('model', STAR_MODEL), usage) * BATCH_PRICE_RATIO
+            try:
+                result = parse_llm_output(body['choices'][0]['message'].get('content') or '', StarAnalysis).to_dict()
+            except ValueError as e:
+                totals['unparsed'] += 1
+                print(f"Unusable analysis for {record.get('custom_id')}: {e}")
+                continue
+            mappings.append({
+                'id': int(record['custom_id'][len(_custom_id_prefix):]),
+                'star_analysis': json.dumps(result['star_breakdown'])
+            })
+        totals['failed'] += len(errors)
+
+        ids = [m['id'] for m in mappings]
+        db.session.bulk_update_mappings(Response, mappings)
+        # Rollups count STAR coverage from the old breakdowns
+        interview_ids = set()
+        for start in range(0, len(ids), ID_CHUNK_SIZE):
+            interview_ids.update(row.interview_id for row in db.session.query(Response.interview_id).filter(
+                Response.id.in_(ids[start:start + ID_CHUNK_SIZE])).distinct())
+        for interview_id in sorted(interview_ids):
+            refresh_rollup(interview_id)
+        db.session.commit()
+        totals['rescored'] += len(mappings)
+        return len(mappings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-score stored responses with the current STAR rubric '
+                                                 'through the OpenAI Batch API')
+    parser.add_argument('--checkpoint', required=True, help='JSON file recording progress; reuse it to resume')
+    parser.add_argument('--batch-size', type=int, default=RESCORE_BATCH_SIZE, help='responses per batch')
+    parser.add_argument('--max-in-flight', type=int, default=RESCORE_MAX_IN_FLIGHT, help='batches submitted at once')
+    parser.add_argument('--poll-seconds', type=float, default=RESCORE_POLL_SECONDS)
+    parser.add_argument('--interview-id', type=int, help='only re-score this interview')
+    parser.add_argument('--limit', type=int, help='stop after submitting this many responses')
+    parser.add_argument('--no-wait', action='store_true',
+                        help='submit and write back what is ready, then exit; run again to continue')
+    args = parser.parse_args()
+
+    from src.main import app
+    from src.services.llm_clients import llm_clients
+
+    with app.app_context():
+        client = llm_clients.openai_client()
+        if client is None:
+            raise SystemExit('The Batch API needs an OpenAI key (or LLM_MOCK_URL for the local mock server)')
+        rescorer = BatchRescorer(OpenAIBatchBackend(client), Checkpoint(args.checkpoint),
+                                 batch_size=args.batch_size, poll_seconds=args.poll_seconds,
+                                 max_in_flight=args.max_in_flight, interview_id=args.interview_id, limit=args.limit)
+        totals = rescorer.run(wait=not args.no_wait)
+        print(f"Re-scoring totals: {json.dumps(totals)}")
+
+
+if __name__ == '__main__':
+    main()
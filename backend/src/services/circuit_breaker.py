@@ -0,0 +1,190 @@
+"""
+Circuit breakers for LLM providers.
+
+Each (provider, model) pair has a breaker. After failure_threshold consecutive
+provider failures (timeouts, connection errors, 429s, 5xx) it opens, and calls
+are rejected immediately with CircuitOpenError so the services drop straight to
+their local fallbacks instead of each waiting for its own failure. After
+reset_timeout seconds one probe call is let through (half-open): success closes
+the breaker, failure opens it again.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from src.services.deadline import DeadlineExceeded
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether an error says the provider is unhealthy (as opposed to a bad request or our own deadline)."""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    try:
+        import openai
+        if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+            return True
+    except ImportError:
+        pass
+    status = getattr(error, 'status_code', None)
+    response = getattr(error, 'response', None)
+    if status is None and isinstance(response, dict):
+        # botocore ClientError
+        status = response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.last_error = None
+        self._stats = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def available(self) -> bool:
+        """Whether a call would be admitted right now (does not claim the half-open probe)."""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.reset_timeout
+            return not (self.state == HALF_OPEN and self.probe_in_flight)
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == OPEN or (self.state == HALF_OPEN and self.probe_in_flight):
+                self._stats['rejected'] += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is open (last error: {self.last_error})")
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = True
+            self._stats['calls'] += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"Circuit for {self.name} closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        with self._lock:
+            self._stats['failures'] += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"[:200]
+            self.probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self._stats['opened'] += 1
+                    print(f"Circuit for {self.name} opened after {self.consecutive_failures} failures: {self.last_error}")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def record_release(self) -> None:
+        """The call ended without saying anything about provider health (e.g. a 400)."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Admit the block as one call and record how it ended."""
+        self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            if is_provider_failure(e):
+                self.record_failure(e)
+            else:
+                self.record_release()
+            raise
+        self.record_success()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_after = None
+            if self.state == OPEN:
+                retry_after = round(max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0), 1)
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'retry_after_seconds': retry_after,
+                'last_error': self.last_error,
+                **self._stats
+            }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0, enabled: bool = True):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, provider: str, model: Optional[str]) -> CircuitBreaker:
+        key = (provider, model or 'default')
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(f"{provider}/{key[1]}", self.failure_threshold, self.reset_timeout)
+                self._breakers[key] = breaker
+            return breaker
+
+    def available(self, provider: str, model: Optional[str]) -> bool:
+        return not self.enabled or self.get(provider, model).available()
+
+    @contextmanager
+    def guard(self, provider: str, model: Optional[str]) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        with self.get(provider, model).guard():
+            yield
+
+    def reset(self) -> None:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        for breaker in breakers:
+            breaker.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            'enabled': self.enabled,
+            'failure_threshold': self.failure_threshold,
+            'reset_timeout_seconds': self.reset_timeout,
+            'breakers': {breaker.name: breaker.stats() for breaker in breakers.values()}
+        }
+
+
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=int(os.environ.get('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 3)),
+    reset_timeout=float(os.environ.get('CIRCUIT_BREAKER_RESET_SECONDS', 30)),
+    enabled=os.environ.get('CIRCUIT_BREAKER_ENABLED', 'true').lower() != 'false'
+)
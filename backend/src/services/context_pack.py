@@ -0,0 +1,174 @@
+"""
+Per-interview context pack.
+
+Instead of pasting the full job listing (and resume) into every per-answer
+prompt, the interview gets one condensed pack: the candidate profile, the job
+requirements and the key areas to probe, rendered into a few hundred tokens.
+It is built from the document analysis when /analyze runs, and otherwise from
+a local keyword extraction over the documents. Changing a document drops the
+pack, so the next prompt that needs it rebuilds it.
+"""
+import json
+import os
+from typing import Any, Dict, List
+
+from src.models.interview import db, Document, InterviewContextPack
+from src.services.ai_service_contextual import ContextualQuestionGenerator
+from src.services.prompt_budget import count_tokens, truncate_to_tokens
+
+CONTEXT_PACK_MAX_TOKENS = int(os.environ.get('CONTEXT_PACK_MAX_TOKENS', 350))
+# Cap on each listed item (an achievement, a probe, ...)
+CONTEXT_ITEM_MAX_TOKENS = 40
+
+_extractor = ContextualQuestionGenerator()
+
+
+def _items(values: Any, limit: int) -> List[str]:
+    if not isinstance(values, list):
+        return []
+    items = []
+    for value in values:
+        if isinstance(value, (str, int, float)) and str(value).strip():
+            item = truncate_to_tokens(str(value).strip(), CONTEXT_ITEM_MAX_TOKENS)
+            if item not in items:
+                items.append(item)
+        if len(items) >= limit:
+            break
+    return items
+
+
+def _text(value: Any) -> str:
+    return str(value).strip() if isinstance(value, (str, int, float)) and str(value).strip() else ''
+
+
+def pack_from_analysis(analysis: Dict[str, Any], position_title: str = '') -> Dict[str, Any]:
+    """Condense a document analysis (analyze_documents output) into a context pack."""
+    candidate = analysis.get('candidate_profile') or {}
+    job = analysis.get('job_requirements') or {}
+    match = analysis.get('match_analysis') or {}
+
+    probes = _items(match.get('areas_to_probe'), 4)
+    probes += [f"Gap: {skill}" for skill in _items(match.get('missing_skills'), 3)]
+    probes += _items(candidate.get('potential_concerns'), 2)
+
+    return {
+        'candidate_profile': {
+            'current_role': _text(candidate.get('current_role')),
+            'experience_years': _text(candidate.get('experience_years')),
+            'key_skills': _items(candidate.get('key_skills'), 8),
+            'companies_worked': _items(candidate.get('companies_worked'), 4),
+            'notable_achievements': _items(candidate.get('notable_achievements'), 3),
+            'projects': _items(candidate.get('projects'), 3)
+        },
+        'job_requirements': {
+            'job_title': _text(job.get('job_title')) or position_title,
+            'company_name': _text(job.get('company_name')),
+            'experience_required': _text(job.get('experience_required')),
+            'required_skills': _items(job.get('required_skills'), 8),
+            'key_responsibilities': _items(job.get('key_responsibilities'), 4)
+        },
+        'key_probes': probes[:6]
+    }
+
+
+def pack_from_documents(resume_text: str, job_text: str, position_title: str = '') -> Dict[str, Any]:
+    """Build a context pack without an LLM, from keyword extraction over the documents."""
+    info = _extractor.extract_key_info(resume_text or '', job_text or '')
+    experience = info.get('experience_years')
+    return {
+        'candidate_profile': {
+            'current_role': '',
+            'experience_years': f"{experience}+" if experience else '',
+            'key_skills': _items(info.get('resume_skills'), 8),
+            'companies_worked': [],
+            'notable_achievements': _items(info.get('achievements'), 3),
+            'projects': []
+        },
+        'job_requirements': {
+            'job_title': _text(info.get('job_title')) or position_title,
+            'company_name': _text(info.get('company_name')),
+            'experience_required': '',
+            'required_skills': _items(info.get('job_requirements'), 8),
+            'key_responsibilities': []
+        },
+        'key_probes': [f"Gap: {skill}" for skill in _items(info.get('missing_skills'), 4)]
+    }
+
+
+def render_context_pack(pack: Dict[str, Any]) -> str:
+    """Render a pack as a compact prompt section of at most CONTEXT_PACK_MAX_TOKENS tokens."""
+    candidate = pack.get('candidate_profile') or {}
+    job = pack.get('job_requirements') or {}
+
+    role = job.get('job_title') or 'Unspecified role'
+    if job.get('company_name'):
+        role += f" at {job['company_name']}"
+    if job.get('experience_required'):
+        role += f" ({job['experience_required']})"
+
+    background = ', '.join(filter(None, [
+        candidate.get('current_role'),
+        f"{candidate['experience_years']} years" if candidate.get('experience_years') else '',
+        ', '.join(candidate.get('companies_worked') or [])
+    ]))
+
+    lines = [f"Role: {role}"]
+    for label, values in (
+        ('Required skills', ', '.join(job.get('required_skills') or [])),
+        ('Responsibilities', '; '.join(job.get('key_responsibilities') or [])),
+        ('Candidate', background),
+        ('Candidate skills', ', '.join(candidate.get('key_skills') or [])),
+        ('Achievements', '; '.join((candidate.get('notable_achievements') or []) + (candidate.get('projects') or []))),
+        ('Probe', '; '.join(pack.get('key_probes') or []))
+    ):
+        if values:
+            lines.append(f"{label}: {values}")
+    return truncate_to_tokens('\n'.join(lines), CONTEXT_PACK_MAX_TOKENS)
+
+
+def save_context_pack(interview_id: int, pack: Dict[str, Any], source: str) -> InterviewContextPack:
+    """Store (or replace) the interview's pack; the caller commits."""
+    text = render_context_pack(pack)
+    row = db.session.get(InterviewContextPack, interview_id)
+    if row is None:
+        row = InterviewContextPack(interview_id=interview_id)
+        db.session.add(row)
+    row.source = source
+    row.pack = json.dumps(pack)
+    row.text = text
+    row.token_count = count_tokens(text)
+    return row
+
+
+def invalidate_context_pack(interview_id: int) -> None:
+    """Drop the pack after a document changes; the caller commits."""
+    InterviewContextPack.query.filter_by(interview_id=interview_id).delete()
+
+
+def get_context_pack(interview) -> InterviewContextPack:
+    """The interview's pack, built locally from its documents (and committed) if there is none."""
+    row = db.session.get(InterviewContextPack, interview.id)
+    if row is not None:
+        return row
+
+    documents = {doc.document_type: doc for doc in
+                 Document.query.filter_by(interview_id=interview.id).all()}
+    resume_text = documents['resume'].extracted_text if 'resume' in documents else ''
+    job_text = documents['job_listing'].extracted_text if 'job_listing' in documents else ''
+    row = save_context_pack(interview.id, pack_from_documents(resume_text, job_text, interview.position_title), 'local')
+    db.session.commit()
+    print(f"Built local context pack for interview {interview.id} ({row.token_count} tokens)")
+    return row
+
+
+def get_context_text(interview) -> str:
+    """Rendered context pack for prompts; empty if it cannot be built."""
+    try:
+        return get_context_pack(interview).text
+    except Exception as e:
+        # Most likely a concurrent request stored the pack first
+        db.session.rollback()
+        row = db.session.get(InterviewContextPack, interview.id)
+        if row is None:
+            print(f"Context pack unavailable for interview {interview.id}: {e}")
+        return row.text if row else ''
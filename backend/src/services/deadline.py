@@ -0,0 +1,98 @@
+"""
+Request-scoped deadlines for AI calls.
+
+A route opens a deadline scope; every LLM call made underneath it (directly, or
+on the AI executor) derives its HTTP timeout from the time that is left instead
+of waiting indefinitely. Multi-stage chains split the remaining budget with
+stage(), so a slow primary call cannot starve its fallback. Once the budget is
+spent, calls raise DeadlineExceeded immediately and the services drop to their
+local fallbacks (ContextualQuestionGenerator, _simple_star_analysis, ...).
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Do not start an LLM call with less time than this left; use the local fallback instead
+MIN_CALL_SECONDS = float(os.environ.get('AI_MIN_CALL_SECONDS', 1.0))
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised instead of issuing an AI call when the request's time budget is spent."""
+
+
+class Deadline:
+    def __init__(self, expires_at: float, name: str = 'request'):
+        self.expires_at = expires_at
+        self.name = name
+
+    @classmethod
+    def after(cls, seconds: float, name: str = 'request') -> 'Deadline':
+        return cls(time.monotonic() + seconds, name)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def child(self, name: str, fraction: float = 1.0, reserve: float = 0.0) -> 'Deadline':
+        """A sub-deadline for one stage: fraction of what is left after holding back reserve seconds."""
+        budget = max(self.remaining() - reserve, 0.0) * fraction
+        return Deadline(min(self.expires_at, time.monotonic() + budget), name)
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar('ai_deadline', default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left on the current deadline, or default when no deadline is set."""
+    deadline = current_deadline()
+    return deadline.remaining() if deadline is not None else default
+
+
+@contextmanager
+def deadline_scope(seconds: float, name: str = 'request') -> Iterator[Deadline]:
+    """Run the block under a deadline of seconds (never later than an enclosing deadline)."""
+    deadline = Deadline.after(seconds, name)
+    parent = current_deadline()
+    if parent is not None and parent.expires_at < deadline.expires_at:
+        deadline = Deadline(parent.expires_at, name)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+@contextmanager
+def stage(name: str, fraction: float = 1.0, reserve: float = 0.0) -> Iterator[Optional[Deadline]]:
+    """Give the block a share of the current deadline. No-op when no deadline is set."""
+    parent = current_deadline()
+    if parent is None:
+        yield None
+        return
+    token = _current_deadline.set(parent.child(name, fraction, reserve))
+    try:
+        yield _current_deadline.get()
+    finally:
+        _current_deadline.reset(token)
+
+
+def call_timeout(default: Optional[float] = None) -> Optional[float]:
+    """Timeout for the next AI call: the time left (capped by default), or default without a deadline.
+
+    Raises DeadlineExceeded when too little time is left to make the call worthwhile.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return default
+    remaining = deadline.remaining()
+    if remaining < MIN_CALL_SECONDS:
+        raise DeadlineExceeded(f"Deadline '{deadline.name}' exceeded ({remaining:.1f}s left)")
+    return min(remaining, default) if default else remaining
@@ -0,0 +1,199 @@
+"""
+Incremental interview rollup.
+
+Every saved response updates one row per interview: a short summary of the
+answer plus running score, confidence, STAR coverage and strength/improvement
+tallies. Completing the interview then only needs the rollup, so the final
+evaluation prompt stays the same size however long the interview ran, and
+without an LLM the evaluation is aggregated locally from the same numbers.
+"""
+import json
+import os
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from src.models.interview import db, InterviewRollup, Response
+from src.services.prompt_budget import truncate_to_tokens
+
+STAR_COMPONENTS = ('situation', 'task', 'action', 'result')
+
+# Latest per-response summaries kept in the rollup (and sent to the final evaluation)
+ROLLUP_MAX_SUMMARIES = int(os.environ.get('ROLLUP_MAX_SUMMARIES', 20))
+# Distinct strengths / improvements tallied per interview
+ROLLUP_MAX_TALLY_ITEMS = 30
+# Cap on the question and on each point in a summary
+ROLLUP_TEXT_MAX_TOKENS = 40
+
+NEXT_STEPS = {
+    'strong_hire': ['Schedule the next interview round', 'Check references'],
+    'hire': ['Schedule the next interview round'],
+    'maybe': ['Review the individual responses before deciding'],
+    'no_hire': ['Share feedback with the candidate']
+}
+
+
+def _load(value: Optional[str], default):
+    return json.loads(value) if value else default
+
+
+def _tally(counts: Dict[str, int], items: Any) -> Dict[str, int]:
+    counter = Counter(counts)
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, str) and item.strip():
+            counter[truncate_to_tokens(item.strip(), ROLLUP_TEXT_MAX_TOKENS)] += 1
+    return dict(counter.most_common(ROLLUP_MAX_TALLY_ITEMS))
+
+
+def summarize_response(response: Response) -> Dict[str, Any]:
+    """Compact summary of a saved response, built from its stored analysis."""
+    star = _load(response.star_analysis, {})
+    points = _load(response.summary_points, [])
+    return {
+        'question': truncate_to_tokens(response.question_text or '', ROLLUP_TEXT_MAX_TOKENS),
+        'score': round(response.evaluation_score * 100) if response.evaluation_score is not None else None,
+        'star': [c for c in STAR_COMPONENTS if isinstance(star.get(c), dict) and star[c].get('present')],
+        'points': [truncate_to_tokens(str(p), ROLLUP_TEXT_MAX_TOKENS) for p in points[:2]]
+    }
+
+
+def _add_response(row: InterviewRollup, response: Response, analysis: Optional[Dict[str, Any]] = None) -> None:
+    summary = summarize_response(response)
+    row.response_count = (row.response_count or 0) + 1
+    if response.evaluation_score is not None:
+        row.score_total = (row.score_total or 0.0) + response.evaluation_score
+        row.score_count = (row.score_count or 0) + 1
+    if response.confidence_score is not None:
+        row.confidence_total = (row.confidence_total or 0.0) + response.confidence_score
+        row.confidence_count = (row.confidence_count or 0) + 1
+
+    star_counts = _load(row.star_counts, {})
+    for component in summary['star']:
+        star_counts[component] = star_counts.get(component, 0) + 1
+    row.star_counts = json.dumps(star_counts)
+
+    if analysis:
+        evaluation = analysis.get('evaluation') or {}
+        row.strengths = json.dumps(_tally(_load(row.strengths, {}),
+                                          analysis.get('strengths') or evaluation.get('strengths')))
+        row.improvements = json.dumps(_tally(_load(row.improvements, {}),
+                                             analysis.get('improvements') or evaluation.get('areas_for_improvement')))
+
+    summaries = _load(row.summaries, []) + [summary]
+    row.summaries = json.dumps(summaries[-ROLLUP_MAX_SUMMARIES:])
+
+
+def _add_responses(row: InterviewRollup, interview_id: int, exclude: Optional[Response] = None) -> None:
+    with db.session.no_autoflush:
+        responses = Response.query.filter_by(interview_id=interview_id).order_by(Response.timestamp).all()
+    for response in responses:
+        if response is not exclude:
+            _add_response(row, response)
+
+
+def _rebuild_rollup(interview_id: int, exclude: Optional[Response] = None) -> InterviewRollup:
+    """Build the rollup from the interview's saved responses (for interviews saved before rollups),
+    leaving out exclude, the response about to be recorded."""
+    row = InterviewRollup(interview_id=interview_id, response_count=0, score_total=0.0, score_count=0,
+                          confidence_total=0.0, confidence_count=0)
+    _add_responses(row, interview_id, exclude)
+    db.session.add(row)
+    return row
+
+
+def record_response(interview_id: int, response: Response, analysis: Dict[str, Any]) -> InterviewRollup:
+    """Fold a newly saved response into the interview's rollup; the caller commits."""
+    # The response may be pending in the session; flushing it here would count it in a rebuild as well
+    with db.session.no_autoflush:
+        row = db.session.get(InterviewRollup, interview_id)
+        if row is None:
+            row = _rebuild_rollup(interview_id, exclude=response)
+    _add_response(row, response, analysis)
+    return row
+
+
+def refresh_rollup(interview_id: int) -> Optional[InterviewRollup]:
+    """Recount an existing rollup from the interview's stored responses after they changed; the caller commits.
+
+    Strength and improvement tallies come from each response's analysis at save time, which the
+    stored rows do not keep, so they are left as they are.
+    """
+    row = db.session.get(InterviewRollup, interview_id)
+    if row is None:
+        return None  # get_rollup builds it from the responses when it is first needed
+    row.response_count, row.score_total, row.score_count = 0, 0.0, 0
+    row.confidence_total, row.confidence_count = 0.0, 0
+    row.star_counts = row.summaries = None
+    _add_responses(row, interview_id)
+    return row
+
+
+def get_rollup(interview) -> InterviewRollup:
+    """The interview's rollup, rebuilt from its responses (and committed) if there is none."""
+    row = db.session.get(InterviewRollup, interview.id)
+    if row is None:
+        row = _rebuild_rollup(interview.id)
+        db.session.commit()
+        print(f"Rebuilt rollup for interview {interview.id} ({row.response_count} responses)")
+    return row
+
+
+def rollup_payload(row: InterviewRollup) -> Dict[str, Any]:
+    """Bounded view of the rollup for the final evaluation prompt and local aggregation."""
+    data = row.to_dict()
+    count = data['response_count'] or 0
+    return {
+        'response_count': count,
+        'average_score': round(data['average_score'] * 100) if data['average_score'] is not None else None,
+        'average_confidence': round(data['average_confidence'] * 100) if data['average_confidence'] is not None else None,
+        'star_coverage': {c: round(data['star_counts'].get(c, 0) / count, 2) if count else 0.0
+                          for c in STAR_COMPONENTS},
+        'top_strengths': [s for s, _ in Counter(data['strengths']).most_common(5)],
+        'top_improvements': [s for s, _ in Counter(data['improvements']).most_common(5)],
+        'responses': data['summaries'],
+        'responses_omitted': max(0, count - len(data['summaries']))
+    }
+
+
+def _recommendation(score: float) -> str:
+    if score >= 80:
+        return 'strong_hire'
+    if score >= 65:
+        return 'hire'
+    if score >= 50:
+        return 'maybe'
+    return 'no_hire'
+
+
+def local_final_evaluation(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Final evaluation aggregated from a rollup payload without an LLM."""
+    count = payload.get('response_count') or 0
+    coverage = payload.get('star_coverage') or {}
+    star_score = round(sum(coverage.get(c, 0.0) for c in STAR_COMPONENTS) / len(STAR_COMPONENTS) * 100)
+    answer_score = payload.get('average_score')
+    overall = answer_score if answer_score is not None else star_score
+
+    category_scores = {'answer_quality': answer_score or 0, 'star_completeness': star_score}
+    if payload.get('average_confidence') is not None:
+        category_scores['confidence'] = payload['average_confidence']
+
+    weak = [c for c in STAR_COMPONENTS if coverage.get(c, 0.0) < 0.5]
+    areas = list(payload.get('top_improvements') or [])[:3]
+    if count and weak:
+        areas.append(f"Answers often lacked the {', '.join(weak)} part of STAR")
+
+    recommendation = _recommendation(overall) if count else 'maybe'
+    coverage_text = ', '.join(f"{c} {round(coverage.get(c, 0.0) * 100)}%" for c in STAR_COMPONENTS)
+    summary = (f"Evaluated from {count} response{'s' if count != 1 else ''} with an average score of "
+               f"{overall}/100 and STAR coverage of {coverage_text}." if count
+               else "No responses were recorded for this interview.")
+
+    return {
+        'overall_score': overall if count else 0,
+        'category_scores': category_scores,
+        'strengths': list(payload.get('top_strengths') or [])[:4],
+        'areas_for_development': areas,
+        'recommendation': recommendation,
+        'key_insights': [f"STAR coverage across answers: {coverage_text}"] if count else [],
+        'next_steps': list(NEXT_STEPS[recommendation]),
+        'summary': summary
+    }
@@ -0,0 +1,125 @@
+"""
+Background job execution for long-running AI work.
+
+Jobs are recorded in the analysis_job table so their status survives across
+requests (and is visible to every gunicorn worker), while the work itself runs
+on a small thread pool inside the app context.
+
+The pool is in-process, so a job whose worker was restarted or recycled is
+never finished. A queued or running job older than JOB_STALE_SECONDS (from
+its start, or its creation while queued) is taken to be orphaned: it is
+marked failed when next looked at and no longer counts as active.
+"""
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from src.models.interview import db, AnalysisJob
+from src.services.telemetry import telemetry
+
+ACTIVE_STATUSES = ('queued', 'running')
+# Well past ANALYZE_JOB_DEADLINE_SECONDS plus a wait in the queue
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', 15 * 60))
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = 2, stale_seconds: float = JOB_STALE_SECONDS):
+        self.max_workers = max_workers
+        self.stale_seconds = stale_seconds
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        return self._executor
+
+    def expire_if_stale(self, job: AnalysisJob) -> bool:
+        """Mark an active job failed if it is too old to still be running; the caller commits."""
+        if job.status not in ACTIVE_STATUSES:
+            return False
+        since = job.started_at or job.created_at
+        if since is None or datetime.utcnow() - since < timedelta(seconds=self.stale_seconds):
+            return False
+        print(f"Job {job.id} {job.status} since {since.isoformat()}; marking it failed")
+        job.status = 'failed'
+        job.error = 'Job was abandoned (its worker stopped before it finished)'
+        job.completed_at = datetime.utcnow()
+        return True
+
+    def active_job(self, interview_id: int, job_type: str) -> Optional[AnalysisJob]:
+        """Return the queued/running job of this type for the interview, if any (stale ones are failed)."""
+        jobs = AnalysisJob.query.filter(
+            AnalysisJob.interview_id == interview_id,
+            AnalysisJob.job_type == job_type,
+            AnalysisJob.status.in_(ACTIVE_STATUSES)
+        ).order_by(AnalysisJob.created_at.desc()).all()
+        expired = [job for job in jobs if self.expire_if_stale(job)]
+        if expired:
+            db.session.commit()
+        return next((job for job in jobs if job not in expired), None)
+
+    def submit(self, interview_id: int, job_type: str,
+               work: Callable[[Callable[[str, int], None]], Any]) -> AnalysisJob:
+        """Queue work(report_progress) and return its job record.
+
+        Must be called inside an app context. report_progress(stage, percent)
+        may be called by the work function to publish progress.
+        """
+        from flask import current_app
+        app = current_app._get_current_object()
+
+        job = AnalysisJob(id=str(uuid.uuid4()), interview_id=interview_id, job_type=job_type,
+                          status='queued', stage='queued', progress=0)
+        db.session.add(job)
+        db.session.commit()
+
+        self._get_executor().submit(self._run, app, job.id, work)
+        return job
+
+    def _run(self, app, job_id: str, work) -> None:
+        with app.app_context():
+            job = db.session.get(AnalysisJob, job_id)
+            if job is None:
+                return
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            def report_progress(stage: str, progress: int) -> None:
+                try:
+                    # Separate session so the work's pending changes are neither flushed nor rolled back
+                    with Session(db.engine) as session:
+                        session.query(AnalysisJob).filter_by(id=job_id).update({'stage': stage, 'progress': progress})
+                        session.commit()
+                except Exception as e:
+                    print(f"Job {job_id} progress update failed: {e}")
+
+            try:
+                with telemetry.route_scope(f"job:{job.job_type}"):
+                    result = work(report_progress)
+                db.session.refresh(job)
+                job.status = 'completed'
+                job.stage = 'completed'
+                job.progress = 100
+                job.result = json.dumps(result)
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+                db.session.rollback()
+                db.session.refresh(job)
+                job.status = 'failed'
+                job.error = str(e)
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+
+
+job_runner = JobRunner(max_workers=int(os.environ.get('JOB_WORKERS', 2)))
@@ -0,0 +1,144 @@
+"""
+Incremental JSON scanner for streamed LLM output.
+
+Token deltas are fed in as they arrive; whenever a value at one of the watched
+paths is complete (e.g. star_breakdown.situation or follow_up_questions[1]) it
+is decoded and returned right away, long before the whole document is closed.
+Text before the root value (markdown fences, prose) and after it is ignored.
+"""
+import json
+from typing import Any, Iterable, List, Tuple
+
+WILDCARD = '*'
+
+_WHITESPACE = ' \t\r\n'
+_SCALAR_TERMINATORS = ',}]' + _WHITESPACE
+
+
+def path_matches(pattern: Tuple, path: Tuple) -> bool:
+    """Return True if path matches pattern ('*' matches any key or index)."""
+    if len(pattern) != len(path):
+        return False
+    return all(p == WILDCARD or p == k for p, k in zip(pattern, path))
+
+
+class IncrementalJSONScanner:
+    def __init__(self, watch: Iterable[Tuple] = ()):
+        self.watch = [tuple(p) for p in watch]
+        self.buffer = ''
+        self.done = False
+        self._pos = 0
+        self._stack = []  # open containers: {'kind', 'path', 'start', 'key', 'expect', 'index'}
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._value_start = None  # start offset of the string/scalar being read
+        self._value_path = None
+        self._scalar = False
+
+    @property
+    def started(self) -> bool:
+        """Whether the root value has been opened."""
+        return self.done or bool(self._stack)
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple, Any]]:
+        """Consume a chunk of text and return (path, value) for each watched value completed by it."""
+        events = []
+        if not chunk or self.done:
+            return events
+        self.buffer += chunk
+        buffer = self.buffer
+
+        while self._pos < len(buffer) and not self.done:
+            ch = buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1]['key'] = json.loads(buffer[self._value_start:self._pos + 1])
+                        self._stack[-1]['expect'] = 'colon'
+                    else:
+                        self._end_value(self._value_path, self._value_start, self._pos + 1, events)
+                    self._value_start = None
+                self._pos += 1
+                continue
+
+            if self._scalar:
+                if ch not in _SCALAR_TERMINATORS:
+                    self._pos += 1
+                    continue
+                self._scalar = False
+                self._end_value(self._value_path, self._value_start, self._pos, events)
+                self._value_start = None
+                # fall through so the terminator itself is processed
+
+            if not self._stack and ch not in '{[':
+                # Outside the root value: skip fences and prose
+                self._pos += 1
+                continue
+
+            if ch in _WHITESPACE:
+                pass
+            elif ch == '"':
+                top = self._stack[-1]
+                self._in_string = True
+                self._string_is_key = top['kind'] == 'object' and top['expect'] == 'key'
+                self._value_start = self._pos
+                self._value_path = None if self._string_is_key else self._child_path()
+            elif ch in '{[':
+                path = self._child_path() if self._stack else ()
+                self._stack.append({
+                    'kind': 'object' if ch == '{' else 'array',
+                    'path': path,
+                    'start': self._pos,
+                    'key': None,
+                    'expect': 'key',
+                    'index': 0
+                })
+            elif ch in '}]':
+                frame = self._stack.pop()
+                self._end_value(frame['path'], frame['start'], self._pos + 1, events)
+                if not self._stack:
+                    self.done = True
+            elif ch == ':':
+                self._stack[-1]['expect'] = 'value'
+            elif ch == ',':
+                top = self._stack[-1]
+                if top['kind'] == 'object':
+                    top['expect'] = 'key'
+                else:
+                    top['index'] += 1
+            else:
+                self._scalar = True
+                self._value_start = self._pos
+                self._value_path = self._child_path()
+            self._pos += 1
+
+        return events
+
+    def _child_path(self) -> Tuple:
+        top = self._stack[-1]
+        if top['kind'] == 'object':
+            return top['path'] + (top['key'],)
+        return top['path'] + (top['index'],)
+
+    def _end_value(self, path, start, end, events) -> None:
+        if path is None or not any(path_matches(pattern, path) for pattern in self.watch):
+            return
+        try:
+            events.append((path, json.loads(self.buffer[start:end])))
+        except ValueError:
+            pass
+
+    def result(self) -> Any:
+        """Decode the complete root value once the stream has finished."""
+        start = min((i for i in (self.buffer.find('{'), self.buffer.find('[')) if i >= 0), default=-1)
+        if start < 0:
+            raise ValueError('No JSON value found in stream')
+        value, _ = json.JSONDecoder().raw_decode(self.buffer, start)
+        return value
@@ -0,0 +1,122 @@
+"""
+Per-session state for live STAR analysis.
+
+The live panel re-posts the whole growing transcript every time the candidate
+pauses. Instead of re-analyzing it from scratch, each (interview, question)
+session remembers what has already been analyzed and only the new text is sent
+to the analyzer. Deltas too small to change the breakdown are answered from the
+stored result without any LLM call.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class LiveAnalysisSession:
+    def __init__(self, question_text: str):
+        self.question_text = question_text
+        self.analyzed_text = ''
+        self.result = None
+        self.analyzer_calls = 0
+        self.skipped_updates = 0
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+
+class LiveAnalysisStore:
+    def __init__(self, ai_service, min_delta_words: int = 8, max_sessions: int = 500,
+                 ttl_seconds: int = 2 * 3600):
+        self.ai_service = ai_service
+        self.min_delta_words = min_delta_words
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def session_key(interview_id: int, question_id: Optional[int], question_text: str) -> Tuple:
+        if question_id:
+            return (interview_id, f"id:{question_id}")
+        digest = hashlib.sha1((question_text or '').strip().lower().encode('utf-8')).hexdigest()
+        return (interview_id, f"text:{digest}")
+
+    def analyze(self, interview_id: int, question_id: Optional[int], question_text: str,
+                response_text: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return (star_result, info) for the transcript so far, analyzing only what is new."""
+        key = self.session_key(interview_id, question_id, question_text)
+        session = self._get_session(key, question_text)
+
+        # The same question can be hit concurrently (double clicks, overlapping silence timers)
+        with session.lock:
+            text = response_text.strip()
+            if session.result is None or not text.startswith(session.analyzed_text):
+                # First update, or the transcript was edited rather than extended
+                mode = 'full'
+                result = self.ai_service.analyze_response_star(question_text, text)
+                session.analyzer_calls += 1
+            else:
+                delta = text[len(session.analyzed_text):].strip()
+                if len(delta.split()) < self.min_delta_words:
+                    session.skipped_updates += 1
+                    return session.result, self._info(session, 'skipped', delta)
+                mode = 'delta'
+                result = self.ai_service.analyze_response_star_delta(question_text, session.result, delta, text)
+                session.analyzer_calls += 1
+
+            session.result = result
+            session.analyzed_text = text
+            session.updated_at = time.time()
+            return result, self._info(session, mode, text if mode == 'full' else delta)
+
+    def reset(self, interview_id: int, question_id: Optional[int] = None, question_text: str = '') -> None:
+        """Forget the live state for a question (e.g. once its response has been saved)."""
+        with self._lock:
+            for key in {self.session_key(interview_id, question_id, question_text),
+                        self.session_key(interview_id, None, question_text)}:
+                self._sessions.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            'active_sessions': len(sessions),
+            'analyzer_calls': sum(s.analyzer_calls for s in sessions),
+            'skipped_updates': sum(s.skipped_updates for s in sessions),
+            'min_delta_words': self.min_delta_words
+        }
+
+    def _get_session(self, key: Tuple, question_text: str) -> LiveAnalysisSession:
+        now = time.time()
+        with self._lock:
+            for stale_key in [k for k, s in self._sessions.items() if now - s.updated_at > self.ttl_seconds]:
+                del self._sessions[stale_key]
+
+            session = self._sessions.get(key)
+            if session is None:
+                session = LiveAnalysisSession(question_text)
+                self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    @staticmethod
+    def _info(session: LiveAnalysisSession, mode: str, analyzed_text: str) -> Dict[str, Any]:
+        return {
+            'mode': mode,
+            'analyzed_words': len(analyzed_text.split()),
+            'analyzer_calls': session.analyzer_calls,
+            'skipped_updates': session.skipped_updates
+        }
+
+
+def create_live_analysis_store(ai_service) -> LiveAnalysisStore:
+    return LiveAnalysisStore(
+        ai_service,
+        min_delta_words=int(os.environ.get('LIVE_ANALYSIS_MIN_DELTA_WORDS', 8)),
+        max_sessions=int(os.environ.get('LIVE_ANALYSIS_MAX_SESSIONS', 500)),
+        ttl_seconds=int(os.environ.get('LIVE_ANALYSIS_TTL_SECONDS', 2 * 3600))
+    )
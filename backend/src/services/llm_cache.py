@@ -0,0 +1,231 @@
+"""
+Content-addressed cache for LLM results.
+
+Keys are a hash of (operation, prompt template version, model, normalized inputs),
+so re-running analysis on byte-identical documents returns the stored result
+instead of paying for another completion. Two tiers are used: an in-process LRU
+and a persistent table (LLMCacheEntry) shared by every worker.
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from src.services.telemetry import telemetry
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text: Any) -> str:
+    """Collapse whitespace so cosmetic differences do not change the cache key."""
+    if text is None:
+        return ''
+    if not isinstance(text, str):
+        text = json.dumps(text, sort_keys=True)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+class LLMCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: int = 7 * 24 * 3600,
+                 db_max_rows: int = 5000, persistent: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_max_rows = db_max_rows
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._writes_since_prune = 0
+        self._stats = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'expired': 0,
+        }
+
+    @staticmethod
+    def make_key(operation: str, prompt_version: str, model: str, *inputs: Any) -> str:
+        """Build a content-addressed key for an LLM call."""
+        payload = json.dumps({
+            'operation': operation,
+            'prompt_version': prompt_version,
+            'model': model,
+            'inputs': [normalize_text(i) for i in inputs],
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        value = self._lookup(key)
+        telemetry.note_cache(value is not None)
+        return value
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+                self._stats['expired'] += 1
+
+        value = self._db_get(key, now)
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['db_hits'] += 1
+        self._remember(key, value, now)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, operation: str = '', model: str = '') -> None:
+        """Store a value in both tiers."""
+        if value is None:
+            return
+        now = datetime.utcnow()
+        self._remember(key, value, now)
+        with self._lock:
+            self._stats['writes'] += 1
+        self._db_set(key, value, operation, model, now)
+
+    def clear(self) -> None:
+        """Drop the in-process tier (the persistent tier is left untouched)."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['db_hits']) / lookups, 3) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        stats['persistent'] = self.persistent
+        return stats
+
+    def _expiry(self, now: datetime) -> Optional[datetime]:
+        return now + timedelta(seconds=self.ttl_seconds) if self.ttl_seconds > 0 else None
+
+    def _remember(self, key: str, value: Any, now: datetime) -> None:
+        with self._lock:
+            self._memory[key] = (self._expiry(now), copy.deepcopy(value))
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _db_available(self) -> bool:
+        if not self.persistent:
+            return False
+        try:
+            from flask import has_app_context
+            return has_app_context()
+        except Exception:
+            return False
+
+    def _db_session(self):
+        """Open a session independent of the request's db.session so cache
+        commits never flush or roll back a route's pending changes."""
+        from sqlalchemy.orm import Session
+        from src.models.interview import db
+        return Session(db.engine, expire_on_commit=False)
+
+    def _db_get(self, key: str, now: datetime) -> Optional[Any]:
+        if not self._db_available():
+            return None
+        try:
+            from src.models.interview import LLMCacheEntry
+            with self._db_session() as session:
+                row = session.get(LLMCacheEntry, key)
+                if row is None:
+                    return None
+                if row.expires_at is not None and row.expires_at <= now:
+                    session.delete(row)
+                    session.commit()
+                    with self._lock:
+                        self._stats['expired'] += 1
+                    return None
+                row.hit_count = (row.hit_count or 0) + 1
+                row.last_accessed_at = now
+                value = json.loads(row.value)
+                session.commit()
+                return value
+        except Exception as e:
+            print(f"LLM cache read failed: {e}")
+            return None
+
+    def _db_set(self, key: str, value: Any, operation: str, model: str, now: datetime) -> None:
+        if not self._db_available():
+            return
+        try:
+            from src.models.interview import LLMCacheEntry
+            with self._db_session() as session:
+                row = session.get(LLMCacheEntry, key)
+                if row is None:
+                    row = LLMCacheEntry(cache_key=key, operation=operation or 'unknown', model=model or 'unknown')
+                    session.add(row)
+                row.value = json.dumps(value)
+                row.created_at = now
+                row.last_accessed_at = now
+                row.expires_at = self._expiry(now)
+                session.commit()
+        except Exception as e:
+            print(f"LLM cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._writes_since_prune += 1
+            should_prune = self._writes_since_prune >= 50
+            if should_prune:
+                self._writes_since_prune = 0
+        if should_prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete expired rows and trim the table to db_max_rows (least recently used first)."""
+        if not self._db_available():
+            return 0
+        try:
+            from src.models.interview import LLMCacheEntry
+            with self._db_session() as session:
+                removed = session.query(LLMCacheEntry).filter(
+                    LLMCacheEntry.expires_at.isnot(None),
+                    LLMCacheEntry.expires_at <= datetime.utcnow()
+                ).delete(synchronize_session=False)
+
+                overflow = session.query(LLMCacheEntry).count() - self.db_max_rows
+                if overflow > 0:
+                    stale_keys = [row.cache_key for row in session.query(LLMCacheEntry.cache_key)
+                                  .order_by(LLMCacheEntry.last_accessed_at.asc())
+                                  .limit(overflow)]
+                    removed += session.query(LLMCacheEntry).filter(
+                        LLMCacheEntry.cache_key.in_(stale_keys)
+                    ).delete(synchronize_session=False)
+                session.commit()
+
+            with self._lock:
+                self._stats['evictions'] += removed
+            return removed
+        except Exception as e:
+            print(f"LLM cache prune failed: {e}")
+            return 0
+
+
+# Process-wide cache shared by all AI services
+llm_cache = LLMCache(
+    max_entries=int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 256)),
+    ttl_seconds=int(os.environ.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600)),
+    db_max_rows=int(os.environ.get('LLM_CACHE_DB_MAX_ROWS', 5000)),
+    persistent=os.environ.get('LLM_CACHE_PERSISTENT', 'true').lower() != 'false'
+)
@@ -0,0 +1,283 @@
+"""
+Process-wide registry of pooled LLM provider clients.
+
+The AI services call complete() / stream(), which run on the provider selected
+in settings (ai_provider: 'openai' or 'aws_nova' for Bedrock), falling back to
+whichever provider has credentials.
+
+Every AI service shares one OpenAI client (one keep-alive HTTP connection pool)
+and one Bedrock runtime client instead of constructing its own, so live calls
+stop paying a TLS handshake each time. Each provider also has a concurrency cap,
+and every call gets a timeout: LLM_CALL_TIMEOUT, or less when the request's
+deadline (services/deadline.py) leaves less time. Calls to a model whose
+circuit breaker (services/circuit_breaker.py) is open fail immediately. Each
+call's latency, time to first token and token usage go to services/telemetry.py.
+
+When keys change through /settings/api-keys the registry builds a new set of
+clients and swaps it in atomically; in-flight calls finish on the old clients.
+
+For offline benchmarking, LLM_MOCK_URL points every OpenAI client at the local
+mock server (services/mock_llm_server.py), and LLM_RECORD_FIXTURES records real
+responses for the mock to replay.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.services.circuit_breaker import circuit_breakers
+from src.services.deadline import DeadlineExceeded, call_timeout, current_deadline
+from src.services.llm_fixtures import FixtureRecorder
+from src.services.llm_providers import BedrockProvider, ChatResult, LLMProvider, OpenAIProvider
+from src.services.telemetry import telemetry
+
+MOCK_API_KEY = 'mock-key'
+
+# Settings ai_provider value -> provider name
+PROVIDER_ALIASES = {'openai': 'openai', 'aws_nova': 'bedrock', 'bedrock': 'bedrock'}
+
+
+class _ClientSet:
+    """Immutable snapshot of the clients built for one key configuration."""
+
+    def __init__(self, keys: Dict[str, Any], openai_client=None, bedrock_client=None):
+        self.keys = keys
+        self.openai = openai_client
+        self.bedrock = bedrock_client
+        self.providers = {}
+        if openai_client is not None:
+            self.providers['openai'] = OpenAIProvider(openai_client)
+        if bedrock_client is not None:
+            self.providers['bedrock'] = BedrockProvider(bedrock_client)
+
+
+class LLMClientRegistry:
+    def __init__(self, max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 60.0, concurrency: Optional[Dict[str, int]] = None,
+                 slot_timeout: float = 30.0, call_timeout: float = 60.0, mock_url: Optional[str] = None,
+                 record_fixtures_path: Optional[str] = None):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.slot_timeout = slot_timeout
+        self.call_timeout = call_timeout
+        self.mock_url = mock_url
+        self.recorder = FixtureRecorder(record_fixtures_path) if record_fixtures_path else None
+        self.concurrency = concurrency or {'openai': 8, 'bedrock': 4}
+        self._semaphores = {provider: threading.BoundedSemaphore(limit)
+                            for provider, limit in self.concurrency.items()}
+        self._lock = threading.Lock()
+        self._clients = None
+        self._probe_clients = {}  # (provider, credentials) -> client, for settings connection tests
+
+    def configure(self, keys: Dict[str, Any]) -> None:
+        """Rebuild all provider clients for a new key configuration."""
+        clients = _ClientSet(
+            dict(keys),
+            openai_client=self._build_openai(keys.get('openai')),
+            bedrock_client=self._build_bedrock(keys.get('aws_access_key'), keys.get('aws_secret_key'),
+                                               keys.get('aws_region'))
+        )
+        with self._lock:
+            self._clients = clients
+            self._probe_clients.clear()
+        print(f"LLM clients configured - OpenAI: {bool(clients.openai)}, Bedrock: {bool(clients.bedrock)}")
+
+    def _current(self) -> _ClientSet:
+        clients = self._clients
+        if clients is None:
+            # Lazily pick up the keys loaded by the settings module at startup
+            from src.routes.settings import get_current_api_keys
+            self.configure(get_current_api_keys())
+            clients = self._clients
+        return clients
+
+    def keys(self) -> Dict[str, Any]:
+        return self._current().keys
+
+    def openai_client(self):
+        """The shared OpenAI client, or None if no key is configured."""
+        return self._current().openai
+
+    def bedrock_client(self):
+        """The shared Bedrock runtime client, or None if AWS credentials are not configured."""
+        return self._current().bedrock
+
+    def probe_openai_client(self, api_key: str):
+        """Pooled client for an arbitrary key (used by the settings connection test)."""
+        if api_key == self.keys().get('openai') and self.openai_client() is not None:
+            return self.openai_client()
+        return self._probe_client(('openai', api_key), lambda: self._build_openai(api_key))
+
+    def probe_bedrock_client(self, access_key: str, secret_key: str, region: str):
+        """Pooled Bedrock client for arbitrary credentials (used by the settings connection test)."""
+        keys = self.keys()
+        if ((access_key, secret_key, region) == (keys.get('aws_access_key'), keys.get('aws_secret_key'), keys.get('aws_region'))
+                and self.bedrock_client() is not None):
+            return self.bedrock_client()
+        return self._probe_client(('bedrock', access_key, secret_key, region),
+                                  lambda: self._build_bedrock(access_key, secret_key, region, raise_errors=True))
+
+    def _probe_client(self, cache_key, build):
+        with self._lock:
+            client = self._probe_clients.get(cache_key)
+        if client is None:
+            client = build()
+            with self._lock:
+                if len(self._probe_clients) >= 8:
+                    self._probe_clients.clear()
+                self._probe_clients[cache_key] = client
+        return client
+
+    @contextmanager
+    def slot(self, provider: str, timeout: Optional[float] = None):
+        """Hold one of the provider's concurrency slots for the duration of a call."""
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            yield
+            return
+        wait = self.slot_timeout if timeout is None else min(timeout, self.slot_timeout)
+        if not semaphore.acquire(timeout=wait):
+            raise RuntimeError(f"Timed out waiting for a {provider} concurrency slot")
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def active_provider(self) -> Optional[LLMProvider]:
+        """The provider selected in settings, or any configured one; None when there is none."""
+        clients = self._current()
+        preferred = PROVIDER_ALIASES.get(clients.keys.get('ai_provider'), 'openai')
+        if preferred in clients.providers:
+            return clients.providers[preferred]
+        return next(iter(clients.providers.values()), None)
+
+    def available(self, model: str) -> bool:
+        """Whether a call for model would be attempted (a provider is configured and its breaker admits calls)."""
+        provider = self.active_provider()
+        return provider is not None and circuit_breakers.available(provider.name, provider.resolve_model(model))
+
+    def model_id(self, model: str) -> str:
+        """'provider/model' that a request for model would run on, for cache keys."""
+        provider = self.active_provider()
+        return f"{provider.name}/{provider.resolve_model(model)}" if provider else model
+
+    def _prepare(self, model: str):
+        provider = self.active_provider()
+        if provider is None:
+            raise RuntimeError("No LLM provider is configured")
+        timeout = call_timeout(self.call_timeout)
+        if current_deadline() is not None and isinstance(provider, OpenAIProvider):
+            provider = provider.without_retries()
+        return provider, provider.resolve_model(model), timeout
+
+    def complete(self, model: str, messages: List[Dict[str, str]], max_tokens: Optional[int] = None,
+                 temperature: Optional[float] = None,
+                 response_format: Optional[Dict[str, Any]] = None) -> ChatResult:
+        """Run a chat completion on the active provider within its concurrency cap and circuit breaker."""
+        provider, resolved_model, timeout = self._prepare(model)
+        started = time.perf_counter()
+        try:
+            with circuit_breakers.guard(provider.name, resolved_model), self.slot(provider.name, timeout):
+                result = provider.complete(messages, resolved_model, max_tokens=max_tokens, temperature=temperature,
+                                           response_format=response_format, timeout=call_timeout(timeout))
+        except Exception as e:
+            telemetry.record_llm_call(provider.name, resolved_model, started, None, None, error=e)
+            raise
+        telemetry.record_llm_call(provider.name, resolved_model, started, None, result.usage)
+        if self.recorder:
+            self.recorder.record(resolved_model, messages, result.content)
+        return result
+
+    def stream(self, model: str, messages: List[Dict[str, str]], max_tokens: Optional[int] = None,
+               temperature: Optional[float] = None, response_format: Optional[Dict[str, Any]] = None,
+               usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        """Stream text deltas from the active provider, holding a concurrency slot until the stream ends."""
+        provider, resolved_model, timeout = self._prepare(model)
+        usage = {} if usage is None else usage
+        started = time.perf_counter()
+        first_token_at = None
+        try:
+            with circuit_breakers.guard(provider.name, resolved_model), self.slot(provider.name, timeout):
+                deltas = provider.stream(messages, resolved_model, max_tokens=max_tokens, temperature=temperature,
+                                         response_format=response_format, timeout=call_timeout(timeout), usage=usage)
+                deadline = current_deadline()
+                parts = []
+                try:
+                    for text in deltas:
+                        # The HTTP timeout only bounds each read, so check the overall deadline per delta
+                        if deadline is not None and deadline.expired():
+                            raise DeadlineExceeded(f"Deadline '{deadline.name}' exceeded while streaming")
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        parts.append(text)
+                        yield text
+                    if self.recorder:
+                        self.recorder.record(resolved_model, messages, ''.join(parts))
+                finally:
+                    deltas.close()
+        except Exception as e:
+            telemetry.record_llm_call(provider.name, resolved_model, started, first_token_at, usage, error=e)
+            raise
+        except GeneratorExit:
+            # The consumer stopped reading early; the call itself went fine
+            telemetry.record_llm_call(provider.name, resolved_model, started, first_token_at, usage)
+            raise
+        telemetry.record_llm_call(provider.name, resolved_model, started, first_token_at, usage)
+
+    def _build_openai(self, api_key: Optional[str]):
+        if self.mock_url:
+            # The mock server accepts any key, so mock mode works without a real one
+            api_key = api_key or MOCK_API_KEY
+        if not api_key:
+            return None
+        try:
+            import httpx
+            from openai import OpenAI, DefaultHttpxClient
+            http_client = DefaultHttpxClient(limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ))
+            return OpenAI(api_key=api_key, http_client=http_client, base_url=self.mock_url or None)
+        except Exception as e:
+            print(f"Failed to initialize OpenAI client: {e}")
+            return None
+
+    def _build_bedrock(self, access_key: Optional[str], secret_key: Optional[str],
+                       region: Optional[str], raise_errors: bool = False):
+        if not access_key or not secret_key:
+            return None
+        try:
+            import boto3
+            from botocore.config import Config
+            return boto3.client(
+                'bedrock-runtime',
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region or 'us-east-1',
+                config=Config(max_pool_connections=self.max_connections, tcp_keepalive=True,
+                              connect_timeout=10, read_timeout=self.call_timeout,
+                              retries={'max_attempts': 2, 'mode': 'standard'})
+            )
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Failed to initialize Bedrock client: {e}")
+            return None
+
+
+llm_clients = LLMClientRegistry(
+    max_connections=int(os.environ.get('LLM_HTTP_MAX_CONNECTIONS', 20)),
+    max_keepalive_connections=int(os.environ.get('LLM_HTTP_MAX_KEEPALIVE', 10)),
+    keepalive_expiry=float(os.environ.get('LLM_HTTP_KEEPALIVE_EXPIRY', 60)),
+    concurrency={
+        'openai': int(os.environ.get('LLM_MAX_CONCURRENCY_OPENAI', 8)),
+        'bedrock': int(os.environ.get('LLM_MAX_CONCURRENCY_BEDROCK', 4))
+    },
+    slot_timeout=float(os.environ.get('LLM_SLOT_TIMEOUT', 30)),
+    call_timeout=float(os.environ.get('LLM_CALL_TIMEOUT', 60)),
+    mock_url=os.environ.get('LLM_MOCK_URL') or None,
+    record_fixtures_path=os.environ.get('LLM_RECORD_FIXTURES') or None
+)
@@ -0,0 +1,51 @@
+"""
+Recorded LLM responses for offline replay.
+
+Set LLM_RECORD_FIXTURES=<path.jsonl> to append every completion the app
+receives to a fixture file; the mock LLM server (services/mock_llm_server.py)
+replays them for requests with the same model and messages.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def fixture_key(model: str, messages: List[Dict[str, Any]]) -> str:
+    """Identify a request by its model and messages."""
+    payload = json.dumps({'model': model, 'messages': messages}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FixtureRecorder:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, model: str, messages: List[Dict[str, Any]], content: Optional[str]) -> None:
+        if content is None:
+            return
+        entry = {
+            'key': fixture_key(model, messages),
+            'model': model,
+            'prompt_preview': (messages[-1].get('content') or '')[:200] if messages else '',
+            'content': content
+        }
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+        except OSError as e:
+            print(f"Failed to record LLM fixture: {e}")
+
+
+def load_fixtures(path: str) -> Dict[str, str]:
+    """Load a fixture file into {fixture key: response content}; later entries win."""
+    fixtures = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            fixtures[entry['key']] = entry['content']
+    return fixtures
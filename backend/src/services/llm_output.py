@@ -0,0 +1,362 @@
+"""
+Typed parsing of LLM JSON output.
+
+Completions are decoded with json.JSONDecoder.raw_decode starting at the first
+'{' or '[' (so markdown fences and prose around the JSON are skipped without a
+regex scan over the whole text), validated against the schemas in
+structured_output.py and turned into the dataclasses below. Output cut off by
+max_tokens is salvaged by closing it after its last complete value. Every
+parse is counted in telemetry by output type and result, so malformed output
+shows up in /api/monitoring/metrics instead of silently becoming canned data.
+
+StreamingOutputParser does the same for streamed completions on top of
+IncrementalJSONScanner, and gives up early when a stream produces no JSON.
+"""
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+
+from src.services.json_stream import IncrementalJSONScanner
+from src.services.structured_output import (
+    COMBINED_ANALYSIS_SHAPE_SCHEMA, DOCUMENT_ANALYSIS_SCHEMA, FINAL_EVALUATION_SCHEMA, QUESTION_SCHEMA,
+    STAR_ANALYSIS_SCHEMA, validate_schema
+)
+from src.services.telemetry import telemetry
+
+STAR_COMPONENTS = ('situation', 'task', 'action', 'result')
+
+# raw_decode attempts before giving up on a completion with stray braces in its preamble
+MAX_DECODE_ATTEMPTS = 8
+# Streamed text allowed before the root value opens
+MAX_STREAM_PREAMBLE = 2000
+
+_decoder = json.JSONDecoder()
+
+T = TypeVar('T')
+
+
+class ParseError(ValueError):
+    """LLM output could not be turned into the expected structure.
+
+    kind is 'no_json' (no JSON value found), 'invalid_json' or 'schema'.
+    """
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def _string_list(value: Any) -> List[str]:
+    if not isinstance(value, list):
+        return []
+    return [str(item) for item in value if isinstance(item, (str, int, float)) and str(item).strip()]
+
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def salvage_truncated(text: str, start: int) -> Optional[str]:
+    """Close JSON that was cut off mid-document after its last complete value.
+
+    Returns None when nothing was cut off or nothing can be kept.
+    """
+    stack = []  # [closer, expecting_key]
+    in_string = is_key = escape = scalar = False
+    safe_end, safe_closers = None, ''
+
+    def mark(end):
+        nonlocal safe_end, safe_closers
+        safe_end, safe_closers = end, ''.join(frame[0] for frame in reversed(stack))
+
+    for pos in range(start, len(text)):
+        ch = text[pos]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if not is_key:
+                    mark(pos + 1)
+            continue
+        if scalar:
+            if ch not in ',}] \t\r\n':
+                continue
+            scalar = False
+            mark(pos)
+        if ch in ' \t\r\n':
+            continue
+        if ch == '"':
+            in_string = True
+            is_key = bool(stack) and stack[-1][0] == '}' and stack[-1][1]
+        elif ch in '{[':
+            stack.append(['}' if ch == '{' else ']', ch == '{'])
+            mark(pos + 1)
+        elif ch in '}]':
+            if not stack:
+                return None
+            stack.pop()
+            if not stack:
+                return None  # the document is complete, so it was not truncated
+            mark(pos + 1)
+        elif ch == ':':
+            stack[-1][1] = False
+        elif ch == ',':
+            if stack and stack[-1][0] == '}':
+                stack[-1][1] = True
+        else:
+            scalar = True
+
+    if safe_end is None:
+        return None
+    return text[start:safe_end] + safe_closers
+
+
+def decode_json(content: str, openers: str = '{[') -> Tuple[Any, bool]:
+    """Decode the first JSON value in content that starts with one of openers.
+
+    Returns (value, salvaged). Raises ParseError when there is none.
+    """
+    if not content:
+        raise ParseError('no_json', 'Empty completion')
+    starts = sorted(i for i in (content.find(ch) for ch in openers) if i >= 0)
+    if not starts:
+        raise ParseError('no_json', 'No JSON value in completion')
+
+    position = starts[0]
+    last_error = None
+    for _ in range(MAX_DECODE_ATTEMPTS):
+        try:
+            value, _end = _decoder.raw_decode(content, position)
+            return value, False
+        except ValueError as e:
+            last_error = e
+        if position == starts[0]:
+            repaired = salvage_truncated(content, position)
+            if repaired is not None:
+                try:
+                    return json.loads(repaired), True
+                except ValueError:
+                    pass
+        next_positions = [i for i in (content.find(ch, position + 1) for ch in openers) if i >= 0]
+        if not next_positions:
+            break
+        position = min(next_positions)
+    raise ParseError('invalid_json', f"Invalid JSON in completion: {last_error}")
+
+
+def _check(value: Any, schema: Dict[str, Any]) -> None:
+    errors = validate_schema(value, schema)
+    if errors:
+        raise ParseError('schema', f"Schema validation failed: {'; '.join(errors[:3])}")
+
+
+@dataclass
+class InterviewQuestion:
+    text: str
+    category: str = 'behavioral'
+    rationale: str = ''
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'InterviewQuestion':
+        _check(value, QUESTION_SCHEMA)
+        return cls(text=value['text'].strip(), category=value.get('category') or 'behavioral',
+                   rationale=value.get('rationale') or '')
+
+
+@dataclass
+class QuestionList:
+    output_name: ClassVar[str] = 'question_list'
+    openers: ClassVar[str] = '[{'
+
+    questions: List[InterviewQuestion]
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'QuestionList':
+        if isinstance(value, dict):
+            value = value.get('questions')
+        if not isinstance(value, list):
+            raise ParseError('schema', 'Expected a list of questions')
+        questions = []
+        for item in value:
+            try:
+                questions.append(InterviewQuestion.from_value(item))
+            except ParseError:
+                continue  # keep the usable questions
+        if not questions:
+            raise ParseError('schema', 'No valid questions in completion')
+        return cls(questions=questions)
+
+    def to_list(self, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        return [asdict(q) for q in self.questions[:limit]]
+
+
+@dataclass
+class DocumentAnalysis:
+    output_name: ClassVar[str] = 'document_analysis'
+    openers: ClassVar[str] = '{'
+
+    candidate_profile: Dict[str, Any]
+    job_requirements: Dict[str, Any]
+    match_analysis: Dict[str, Any]
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'DocumentAnalysis':
+        _check(value, DOCUMENT_ANALYSIS_SCHEMA)
+        return cls(candidate_profile=_dict(value['candidate_profile']),
+                   job_requirements=_dict(value['job_requirements']),
+                   match_analysis=_dict(value['match_analysis']))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class CombinedAnalysis:
+    output_name: ClassVar[str] = 'combined_analysis'
+    openers: ClassVar[str] = '{'
+
+    analysis: DocumentAnalysis
+    questions: QuestionList
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'CombinedAnalysis':
+        _check(value, COMBINED_ANALYSIS_SHAPE_SCHEMA)
+        return cls(analysis=DocumentAnalysis.from_value(value['analysis']),
+                   questions=QuestionList.from_value(value['questions']))
+
+    def to_dict(self, num_questions: Optional[int] = None) -> Dict[str, Any]:
+        return {'analysis': self.analysis.to_dict(), 'questions': self.questions.to_list(num_questions)}
+
+
+@dataclass
+class StarComponent:
+    present: bool = False
+    content: Optional[str] = None
+    quality: str = 'missing'
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'StarComponent':
+        value = _dict(value)
+        content = value.get('content')
+        present = bool(value.get('present', bool(content)))
+        return cls(present=present, content=content if isinstance(content, str) and content else None,
+                   quality=value.get('quality') or ('adequate' if present else 'missing'))
+
+
+@dataclass
+class StarAnalysis:
+    output_name: ClassVar[str] = 'star_analysis'
+    openers: ClassVar[str] = '{'
+
+    star_breakdown: Dict[str, StarComponent]
+    missing_components: List[str] = field(default_factory=list)
+    follow_up_questions: List[str] = field(default_factory=list)
+    strengths: List[str] = field(default_factory=list)
+    improvements: List[str] = field(default_factory=list)
+    overall_quality: Optional[str] = None
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'StarAnalysis':
+        _check(value, STAR_ANALYSIS_SCHEMA)
+        breakdown = _dict(value['star_breakdown'])
+        return cls(
+            star_breakdown={component: StarComponent.from_value(breakdown.get(component))
+                            for component in STAR_COMPONENTS},
+            missing_components=_string_list(value.get('missing_components')),
+            follow_up_questions=_string_list(value.get('follow_up_questions')),
+            strengths=_string_list(value.get('strengths')),
+            improvements=_string_list(value.get('improvements')),
+            overall_quality=value.get('overall_quality') or None
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class FinalEvaluation:
+    output_name: ClassVar[str] = 'final_evaluation'
+    openers: ClassVar[str] = '{'
+
+    overall_score: float
+    recommendation: str
+    category_scores: Dict[str, float] = field(default_factory=dict)
+    strengths: List[str] = field(default_factory=list)
+    areas_for_development: List[str] = field(default_factory=list)
+    key_insights: List[str] = field(default_factory=list)
+    next_steps: List[str] = field(default_factory=list)
+    summary: str = ''
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'FinalEvaluation':
+        _check(value, FINAL_EVALUATION_SCHEMA)
+        return cls(
+            overall_score=value['overall_score'],
+            recommendation=value['recommendation'],
+            category_scores={k: v for k, v in _dict(value.get('category_scores')).items()
+                             if isinstance(v, (int, float)) and not isinstance(v, bool)},
+            strengths=_string_list(value.get('strengths')),
+            areas_for_development=_string_list(value.get('areas_for_development')),
+            key_insights=_string_list(value.get('key_insights')),
+            next_steps=_string_list(value.get('next_steps')),
+            summary=value.get('summary') or ''
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _record(output_name: str, result: str) -> None:
+    telemetry.note_parse(output_name, result)
+
+
+def parse_llm_output(content: str, output_type: Type[T]) -> T:
+    """Decode a completion into output_type, raising ParseError (and counting it) on failure."""
+    try:
+        value, salvaged = decode_json(content, output_type.openers)
+        parsed = output_type.from_value(value)
+    except ParseError as e:
+        _record(output_type.output_name, e.kind)
+        raise
+    _record(output_type.output_name, 'salvaged' if salvaged else 'ok')
+    return parsed
+
+
+def parse_json_value(content: str, output_name: str, openers: str = '{[') -> Any:
+    """Decode a completion that has no typed struct; counted under output_name like the typed parses."""
+    try:
+        value, salvaged = decode_json(content, openers)
+    except ParseError as e:
+        _record(output_name, e.kind)
+        raise
+    _record(output_name, 'salvaged' if salvaged else 'ok')
+    return value
+
+
+class StreamingOutputParser:
+    """Incrementally decode a streamed completion into output_type.
+
+    feed() returns (path, value) for each watched value as soon as it is complete,
+    and raises ParseError once the stream has run MAX_STREAM_PREAMBLE characters
+    without opening a JSON value, so the caller can stop paying for the stream.
+    finish() parses the whole buffer like parse_llm_output.
+    """
+
+    def __init__(self, output_type: Type[T], watch: Iterable[Tuple] = (),
+                 max_preamble: int = MAX_STREAM_PREAMBLE):
+        self.output_type = output_type
+        self.scanner = IncrementalJSONScanner(watch)
+        self.max_preamble = max_preamble
+
+    def feed(self, delta: str) -> List[Tuple[Tuple, Any]]:
+        events = self.scanner.feed(delta)
+        if not self.scanner.started and len(self.scanner.buffer) > self.max_preamble:
+            _record(self.output_type.output_name, 'no_json')
+            raise ParseError('no_json', f"No JSON value in the first {self.max_preamble} streamed characters")
+        return events
+
+    def finish(self) -> T:
+        return parse_llm_output(self.scanner.buffer, self.output_type)
@@ -0,0 +1,227 @@
+"""
+Provider-agnostic chat completion interface.
+
+The AI services describe a call once (messages, a model tier named by its
+OpenAI model, JSON output) and the active provider turns it into an OpenAI
+chat completion or an AWS Bedrock Converse request. Bedrock maps the OpenAI
+model names onto Bedrock models: fast ones (gpt-3.5, *-mini) onto
+BEDROCK_FAST_MODEL and the rest onto BEDROCK_SMART_MODEL.
+"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+BEDROCK_FAST_MODEL = os.environ.get('BEDROCK_FAST_MODEL', 'amazon.nova-lite-v1:0')
+BEDROCK_SMART_MODEL = os.environ.get('BEDROCK_SMART_MODEL', 'amazon.nova-pro-v1:0')
+# Mark the end of the (static) system prompt as a Bedrock prompt cache point; needs a model that supports caching
+BEDROCK_PROMPT_CACHING = os.environ.get('BEDROCK_PROMPT_CACHING', 'false').lower() == 'true'
+
+_CODE_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*(.*?)\s*```\s*$', re.DOTALL)
+# Streamed text that may yet turn out to be the closing fence
+_CLOSING_FENCE_TAIL_RE = re.compile(r'[\s`]*$')
+
+
+class ChatResult:
+    """Text of a completion plus the provider, model and token usage that produced it."""
+
+    def __init__(self, content: str, provider: str, model: str, usage: Optional[Dict[str, int]] = None):
+        self.content = content
+        self.provider = provider
+        self.model = model
+        self.usage = usage or {}
+
+
+class LLMProvider:
+    name = 'base'
+
+    def resolve_model(self, model: str) -> str:
+        return model
+
+    def complete(self, messages: List[Dict[str, str]], model: str, max_tokens: Optional[int] = None,
+                 temperature: Optional[float] = None, response_format: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None) -> ChatResult:
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict[str, str]], model: str, max_tokens: Optional[int] = None,
+               temperature: Optional[float] = None, response_format: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None, usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        """Yield text deltas. usage, if given, is filled in once the provider reports it."""
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    name = 'openai'
+
+    def __init__(self, client):
+        self.client = client
+
+    def without_retries(self) -> 'OpenAIProvider':
+        """Same client with SDK retries off; each retry would get the full timeout and overrun a deadline."""
+        return OpenAIProvider(self.client.with_options(max_retries=0))
+
+    def _kwargs(self, messages, model, max_tokens, temperature, response_format, timeout):
+        kwargs = {'model': model, 'messages': messages}
+        if max_tokens is not None:
+            kwargs['max_tokens'] = max_tokens
+        if temperature is not None:
+            kwargs['temperature'] = temperature
+        if response_format is not None:
+            kwargs['response_format'] = response_format
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        return kwargs
+
+    @staticmethod
+    def _usage(raw) -> Dict[str, int]:
+        if raw is None:
+            return {}
+        details = getattr(raw, 'prompt_tokens_details', None)
+        return {
+            'prompt_tokens': raw.prompt_tokens or 0,
+            'completion_tokens': raw.completion_tokens or 0,
+            'cached_tokens': (getattr(details, 'cached_tokens', None) or 0) if details else 0
+        }
+
+    def complete(self, messages, model, max_tokens=None, temperature=None, response_format=None,
+                 timeout=None) -> ChatResult:
+        response = self.client.chat.completions.create(
+            **self._kwargs(messages, model, max_tokens, temperature, response_format, timeout))
+        return ChatResult(response.choices[0].message.content or '', self.name, model,
+                          self._usage(getattr(response, 'usage', None)))
+
+    def stream(self, messages, model, max_tokens=None, temperature=None, response_format=None,
+               timeout=None, usage=None) -> Iterator[str]:
+        kwargs = self._kwargs(messages, model, max_tokens, temperature, response_format, timeout)
+        stream = self.client.chat.completions.create(stream=True, stream_options={'include_usage': True}, **kwargs)
+        try:
+            for chunk in stream:
+                if getattr(chunk, 'usage', None) is not None and usage is not None:
+                    usage.update(self._usage(chunk.usage))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+
+
+class BedrockProvider(LLMProvider):
+    name = 'bedrock'
+
+    def __init__(self, client, fast_model: str = BEDROCK_FAST_MODEL, smart_model: str = BEDROCK_SMART_MODEL,
+                 prompt_caching: bool = BEDROCK_PROMPT_CACHING):
+        self.client = client
+        self.fast_model = fast_model
+        self.smart_model = smart_model
+        self.prompt_caching = prompt_caching
+
+    def resolve_model(self, model: str) -> str:
+        if model.startswith('gpt-3.5') or model.endswith('-mini'):
+            return self.fast_model
+        if model.startswith(('gpt-', 'o1', 'o3', 'o4')):
+            return self.smart_model
+        return model  # already a Bedrock model id
+
+    def _request(self, messages, model, max_tokens, temperature, response_format) -> Dict[str, Any]:
+        system = [{'text': m['content']} for m in messages if m['role'] == 'system']
+        if response_format is not None:
+            # Converse has no JSON mode, so ask for it in the system prompt
+            instruction = 'Respond with valid JSON only, without markdown code fences or any other text.'
+            schema = (response_format.get('json_schema') or {}).get('schema')
+            if schema:
+                instruction += f" The JSON must match this schema: {json.dumps(schema, separators=(',', ':'))}"
+            system.append({'text': instruction})
+        if system and self.prompt_caching:
+            system.append({'cachePoint': {'type': 'default'}})
+
+        conversation = [{'role': m['role'], 'content': [{'text': m['content']}]}
+                        for m in messages if m['role'] != 'system']
+        inference = {}
+        if max_tokens is not None:
+            inference['maxTokens'] = max_tokens
+        if temperature is not None:
+            inference['temperature'] = min(temperature, 1.0)
+
+        request = {'modelId': model, 'messages': conversation, 'inferenceConfig': inference}
+        if system:
+            request['system'] = system
+        return request
+
+    @staticmethod
+    def _usage(raw: Optional[Dict[str, int]]) -> Dict[str, int]:
+        raw = raw or {}
+        # inputTokens excludes cache reads and writes; count them in like OpenAI's prompt_tokens does
+        return {
+            'prompt_tokens': (raw.get('inputTokens', 0) + raw.get('cacheReadInputTokens', 0)
+                              + raw.get('cacheWriteInputTokens', 0)),
+            'completion_tokens': raw.get('outputTokens', 0),
+            'cached_tokens': raw.get('cacheReadInputTokens', 0)
+        }
+
+    @staticmethod
+    def _strip_fences(text: str) -> str:
+        match = _CODE_FENCE_RE.match(text)
+        return match.group(1) if match else text
+
+    @staticmethod
+    def _strip_stream_fences(deltas: Iterator[str]) -> Iterator[str]:
+        """_strip_fences for a streamed completion, holding back only text that may be part of a fence."""
+        buffer = ''
+        deltas = iter(deltas)
+        for delta in deltas:
+            buffer += delta
+            head = buffer.lstrip()
+            if not head or (len(head) < 3 and head == '`' * len(head)):
+                continue
+            if not head.startswith('```'):
+                yield buffer
+                yield from deltas
+                return
+            rest = head[3:]
+            if '\n' in rest or '{' in rest or '[' in rest:
+                break
+        else:
+            if buffer:
+                yield BedrockProvider._strip_fences(buffer)
+            return
+
+        tag = re.match(r'(?:json)?\s*', rest)
+        pending = rest[tag.end():]
+        for delta in deltas:
+            pending += delta
+            held = _CLOSING_FENCE_TAIL_RE.search(pending).start()
+            if held:
+                yield pending[:held]
+                pending = pending[held:]
+        closing = pending.rstrip()
+        if closing.endswith('```'):
+            closing = closing[:-3].rstrip()
+        if closing:
+            yield closing
+
+    def complete(self, messages, model, max_tokens=None, temperature=None, response_format=None,
+                 timeout=None) -> ChatResult:
+        # boto3 has no per-call timeout; the client's read_timeout bounds the call
+        response = self.client.converse(**self._request(messages, model, max_tokens, temperature, response_format))
+        text = ''.join(block.get('text', '') for block in response['output']['message']['content'])
+        if response_format is not None:
+            text = self._strip_fences(text)
+        return ChatResult(text, self.name, model, self._usage(response.get('usage')))
+
+    def stream(self, messages, model, max_tokens=None, temperature=None, response_format=None,
+               timeout=None, usage=None) -> Iterator[str]:
+        response = self.client.converse_stream(
+            **self._request(messages, model, max_tokens, temperature, response_format))
+        deltas = self._deltas(response['stream'], usage)
+        # Fenced JSON would keep the incremental scanner from finding the root value, as complete() strips them
+        yield from (self._strip_stream_fences(deltas) if response_format is not None else deltas)
+
+    def _deltas(self, events, usage) -> Iterator[str]:
+        for event in events:
+            if 'contentBlockDelta' in event:
+                text = event['contentBlockDelta']['delta'].get('text')
+                if text:
+                    yield text
+            elif 'metadata' in event and usage is not None:
+                usage.update(self._usage(event['metadata'].get('usage')))
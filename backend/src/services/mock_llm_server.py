@@ -0,0 +1,456 @@
+"""
+Local OpenAI-compatible stand-in for benchmarking the AI routes offline.
+
+Serves /v1/chat/completions (blocking and streaming) and the Batch API
+(/v1/files, /v1/batches) with configurable latency, per-token streaming delay
+and injected errors, and reports cached prompt tokens for repeated prompt
+prefixes the way OpenAI's prompt caching does. Responses come from a recorded
+fixture file when the request matches one (see services/llm_fixtures.py),
+otherwise from canned JSON shaped like what each AI service prompt asks for.
+
+Run from the backend directory:
+
+    python -m src.services.mock_llm_server --port 8089 --latency lognormal:-0.7:0.5 --seed 7
+
+then start the app with LLM_MOCK_URL=http://127.0.0.1:8089/v1 to point every
+OpenAI client at it. Settings can be changed at runtime via POST /mock/config.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Flask, Response as FlaskResponse, jsonify, request
+
+from src.services.llm_fixtures import fixture_key, load_fixtures
+from src.services.prompt_budget import count_tokens
+
+
+class LatencyModel:
+    """Latency distribution parsed from a spec string.
+
+    Specs: 'none', 'fixed:<s>', 'uniform:<low>:<high>', 'normal:<mean>:<stddev>',
+    'lognormal:<mu>:<sigma>' (seconds; samples are clamped at 0).
+    """
+
+    def __init__(self, spec: str = 'none'):
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        expected = {'none': 0, 'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if self.kind not in expected or len(self.params) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == 'none':
+            return 0.0
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params)
+        if self.kind == 'normal':
+            return max(rng.gauss(*self.params), 0.0)
+        return rng.lognormvariate(*self.params)
+
+
+class MockLLMConfig:
+    def __init__(self, latency: str = 'none', token_delay: float = 0.0, error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (429, 500, 503), timeout_rate: float = 0.0,
+                 hang_seconds: float = 120.0, seed: Optional[int] = None, fixtures_path: Optional[str] = None,
+                 batch_seconds: float = 0.0):
+        self.latency = LatencyModel(latency)
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.seed = seed
+        self.fixtures_path = fixtures_path
+        self.fixtures = load_fixtures(fixtures_path) if fixtures_path else {}
+        # How long a submitted batch stays in progress
+        self.batch_seconds = batch_seconds
+
+    def update(self, data: Dict[str, Any]) -> None:
+        if 'latency' in data:
+            self.latency = LatencyModel(data['latency'])
+        for field in ('token_delay', 'error_rate', 'timeout_rate', 'hang_seconds', 'batch_seconds'):
+            if field in data:
+                setattr(self, field, float(data[field]))
+        if 'error_statuses' in data:
+            self.error_statuses = tuple(int(s) for s in data['error_statuses'])
+        if data.get('fixtures_path'):
+            self.fixtures_path = data['fixtures_path']
+            self.fixtures = load_fixtures(self.fixtures_path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'latency': self.latency.spec,
+            'token_delay': self.token_delay,
+            'error_rate': self.error_rate,
+            'error_statuses': list(self.error_statuses),
+            'timeout_rate': self.timeout_rate,
+            'hang_seconds': self.hang_seconds,
+            'seed': self.seed,
+            'fixtures_path': self.fixtures_path,
+            'fixtures_loaded': len(self.fixtures),
+            'batch_seconds': self.batch_seconds
+        }
+
+
+_COUNT_RE = re.compile(r'\b(?:generate|create|write)\s+(\d+)', re.IGNORECASE)
+
+# Prompt caching as OpenAI does it: prefixes of at least 1024 tokens, matched in blocks
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_BLOCK_CHARS = 512
+PROMPT_CACHE_MAX_PREFIXES = 100000
+
+
+class PrefixCache:
+    """Remembers prompt prefixes and reports how many tokens of a prompt were seen before."""
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, messages: List[Dict[str, Any]], model: str) -> int:
+        text = ''.join(f"{m.get('role')}\n{m.get('content') or ''}\n" for m in messages)
+        digest = hashlib.sha256()
+        cached_chars = 0
+        with self._lock:
+            if len(self._seen) > PROMPT_CACHE_MAX_PREFIXES:
+                self._seen.clear()
+            for start in range(0, len(text) - PROMPT_CACHE_BLOCK_CHARS + 1, PROMPT_CACHE_BLOCK_CHARS):
+                digest.update(text[start:start + PROMPT_CACHE_BLOCK_CHARS].encode('utf-8'))
+                key = digest.copy().hexdigest()
+                if key in self._seen and cached_chars == start:
+                    cached_chars = start + PROMPT_CACHE_BLOCK_CHARS
+                self._seen.add(key)
+        tokens = count_tokens(text[:cached_chars], model) if cached_chars else 0
+        return tokens if tokens >= PROMPT_CACHE_MIN_TOKENS else 0
+
+
+def _question_list(prompt: str) -> List[Dict[str, str]]:
+    match = _COUNT_RE.search(prompt)
+    count = int(match.group(1)) if match else 5
+    categories = ['behavioral', 'technical', 'situational', 'cultural']
+    return [
+        {
+            'text': f"Mock question {i + 1}: tell me about a project where you applied the skills this role needs.",
+            'category': categories[i % len(categories)],
+            'rationale': 'Mock rationale'
+        }
+        for i in range(count)
+    ]
+
+
+def _document_analysis() -> Dict[str, Any]:
+    return {
+        'candidate_profile': {'key_skills': ['Python', 'SQL'], 'companies_worked': ['Mock Corp'],
+                              'notable_achievements': ['Shipped the mock platform'], 'projects': ['Mock Project']},
+        'job_requirements': {'required_skills': ['Python'], 'key_responsibilities': ['Build services']},
+        'match_analysis': {'matching_skills': ['Python'], 'missing_skills': ['Kubernetes'],
+                           'areas_to_probe': ['Scale of past systems']}
+    }
+
+
+def _star_component(present: bool) -> Dict[str, Any]:
+    return {'present': present, 'content': 'Mock extracted content' if present else None,
+            'quality': 'adequate' if present else 'missing'}
+
+
+def synthetic_content(messages: List[Dict[str, Any]]) -> str:
+    """Canned JSON shaped like the response each AI service prompt asks for."""
+    prompt = '\n'.join(m.get('content') or '' for m in messages)
+    lowered = prompt.lower()
+
+    if '"analysis"' in prompt and '"questions"' in prompt:
+        result = {'analysis': _document_analysis(), 'questions': _question_list(prompt)}
+    elif 'star_breakdown' in lowered or 'star analysis' in lowered:
+        result = {
+            'star_breakdown': {
+                'situation': _star_component(True),
+                'task': _star_component(True),
+                'action': _star_component(True),
+                'result': _star_component(False)
+            },
+            'missing_components': ['result'],
+            'follow_up_questions': ['What was the measurable outcome?', 'How did you know it worked?'],
+            'strengths': ['Clear context'],
+            'improvements': ['Quantify the result'],
+            'overall_quality': 'good'
+        }
+    elif 'star_analysis' in lowered:
+        result = {
+            'summary_points': ['Mock summary point'],
+            'star_analysis': {c: _star_component(c != 'result') for c in ('situation', 'task', 'action', 'result')},
+            'evaluation': {'relevance_score': 7, 'completeness_score': 6, 'specificity_score': 6, 'overall_score': 7,
+                           'strengths': ['Relevant example'], 'areas_for_improvement': ['Add metrics']},
+            'sentiment_analysis': {'confidence_level': 'medium', 'enthusiasm': 'medium', 'clarity': 'high'}
+        }
+    elif 'follow-up questions' in lowered and 'json array' in lowered:
+        result = ['What was the measurable outcome?', 'What would you do differently?']
+    elif 'final evaluation' in lowered:
+        result = {
+            'overall_score': 72,
+            'category_scores': {'technical_competency': 70, 'communication_skills': 75, 'cultural_fit': 72,
+                                'problem_solving': 70, 'leadership_potential': 65},
+            'strengths': ['Mock strength'], 'areas_for_development': ['Mock area'],
+            'recommendation': 'hire', 'key_insights': ['Mock insight'], 'next_steps': ['Mock next step'],
+            'summary': 'Mock summary of the candidate.'
+        }
+    elif 'available questions' in lowered:
+        result = {'matched': False, 'question_index': None, 'confidence': 0.0, 'exact_match': False}
+    elif _COUNT_RE.search(prompt) and 'question' in lowered:
+        result = _question_list(prompt)
+    elif 'candidate_profile' in lowered or 'resume' in lowered:
+        result = _document_analysis()
+    else:
+        result = {'result': 'mock'}
+    return json.dumps(result)
+
+
+def create_mock_llm_app(config: Optional[MockLLMConfig] = None) -> Flask:
+    config = config or MockLLMConfig()
+    app = Flask(__name__)
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+    stats = {'requests': 0, 'streamed': 0, 'fixture_hits': 0, 'synthetic': 0, 'errors_injected': 0, 'timeouts_injected': 0,
+             'batches': 0, 'batch_requests': 0}
+    stats_lock = threading.Lock()
+    prefix_cache = PrefixCache()
+    files: Dict[str, Dict[str, Any]] = {}
+    batches: Dict[str, Dict[str, Any]] = {}
+    batch_lock = threading.Lock()
+
+    def count(field: str) -> None:
+        with stats_lock:
+            stats[field] += 1
+
+    def draw() -> Tuple[float, float, float, int]:
+        # One locked draw per request keeps a seeded run reproducible
+        with rng_lock:
+            return (config.latency.sample(rng), rng.random(), rng.random(),
+                    rng.choice(config.error_statuses) if config.error_statuses else 500)
+
+    def completion_chunk(completion_id: str, model: str, delta: Dict[str, Any],
+                         finish_reason: Optional[str] = None) -> str:
+        chunk = {
+            'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+        }
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    def completion_content(model: str, messages: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        key = fixture_key(model, messages)
+        if key in config.fixtures:
+            count('fixture_hits')
+            content = config.fixtures[key]
+        else:
+            count('synthetic')
+            content = synthetic_content(messages)
+
+        prompt_tokens = sum(count_tokens(m.get('content') or '', model) for m in messages)
+        completion_tokens = count_tokens(content, model)
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                 'total_tokens': prompt_tokens + completion_tokens,
+                 'prompt_tokens_details': {'cached_tokens': prefix_cache.cached_tokens(messages, model)}}
+        return content, usage
+
+    @app.route('/v1/models', methods=['GET'])
+    def list_models():
+        return jsonify({'object': 'list', 'data': [
+            {'id': m, 'object': 'model', 'owned_by': 'mock'}
+            for m in ('gpt-3.5-turbo', 'gpt-4-turbo-preview', 'gpt-4o', 'gpt-4o-mini')
+        ]})
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(force=True)
+        model = body.get('model', 'gpt-3.5-turbo')
+        messages = body.get('messages', [])
+        count('requests')
+
+        latency, error_roll, timeout_roll, error_status = draw()
+        time.sleep(latency)
+        if timeout_roll < config.timeout_rate:
+            count('timeouts_injected')
+            time.sleep(config.hang_seconds)
+        if error_roll < config.error_rate:
+            count('errors_injected')
+            return jsonify({'error': {'message': f'Injected mock error ({error_status})', 'type': 'mock_error',
+                                      'code': str(error_status)}}), error_status
+
+        content, usage = completion_content(model, messages)
+        completion_tokens = usage['completion_tokens']
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+
+        if body.get('stream'):
+            count('streamed')
+            include_usage = (body.get('stream_options') or {}).get('include_usage')
+
+            def generate():
+                yield completion_chunk(completion_id, model, {'role': 'assistant', 'content': ''})
+                for piece in re.findall(r'\S+\s*|\s+', content):
+                    if config.token_delay:
+                        time.sleep(config.token_delay)
+                    yield completion_chunk(completion_id, model, {'content': piece})
+                yield completion_chunk(completion_id, model, {}, finish_reason='stop')
+                if include_usage:
+                    usage_chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                                   'model': model, 'choices': [], 'usage': usage}
+                    yield f"data: {json.dumps(usage_chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return FlaskResponse(generate(), mimetype='text/event-stream')
+
+        if config.token_delay:
+            time.sleep(config.token_delay * completion_tokens)
+        return jsonify({
+            'id': completion_id, 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': usage
+        })
+
+    def store_file(content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        files[file_id] = {'id': file_id, 'object': 'file', 'bytes': len(content), 'created_at': int(time.time()),
+                          'filename': filename, 'purpose': purpose, 'content': content}
+        return {k: v for k, v in files[file_id].items() if k != 'content'}
+
+    def run_batch(batch: Dict[str, Any]) -> None:
+        """Answer every request of a batch; failed lines go to the error file like OpenAI's."""
+        output, errors = [], []
+        for line in files[batch['input_file_id']]['content'].decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            count('batch_requests')
+            _latency, error_roll, _timeout_roll, error_status = draw()
+            record = {'id': f"batch_req_mock_{uuid.uuid4().hex[:12]}", 'custom_id': item.get('custom_id'), 'error': None}
+            body = item.get('body') or {}
+            if error_roll < config.error_rate:
+                count('errors_injected')
+                record['response'] = {'status_code': error_status, 'request_id': uuid.uuid4().hex,
+                                      'body': {'error': {'message': f'Injected mock error ({error_status})',
+                                                         'type': 'mock_error'}}}
+                errors.append(record)
+                continue
+            model = body.get('model', 'gpt-3.5-turbo')
+            content, usage = completion_content(model, body.get('messages', []))
+            record['response'] = {'status_code': 200, 'request_id': uuid.uuid4().hex, 'body': {
+                'id': f"chatcmpl-mock-{uuid.uuid4().hex[:12]}", 'object': 'chat.completion',
+                'created': int(time.time()), 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                'usage': usage
+            }}
+            output.append(record)
+
+        def jsonl(records):
+            return ''.join(json.dumps(r) + '\n' for r in records).encode('utf-8')
+
+        batch['output_file_id'] = store_file(jsonl(output), f"{batch['id']}_output.jsonl", 'batch_output')['id'] if output else None
+        batch['error_file_id'] = store_file(jsonl(errors), f"{batch['id']}_error.jsonl", 'batch_output')['id'] if errors else None
+        batch['request_counts'] = {'total': len(output) + len(errors), 'completed': len(output), 'failed': len(errors)}
+        batch['status'] = 'completed'
+        batch['completed_at'] = int(time.time())
+
+    @app.route('/v1/files', methods=['POST'])
+    def upload_file():
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': {'message': 'file is required', 'type': 'invalid_request_error'}}), 400
+        return jsonify(store_file(upload.read(), upload.filename or 'upload.jsonl', request.form.get('purpose', 'batch')))
+
+    @app.route('/v1/files/<file_id>/content', methods=['GET'])
+    def file_content(file_id):
+        if file_id not in files:
+            return jsonify({'error': {'message': f'No such file: {file_id}', 'type': 'invalid_request_error'}}), 404
+        return FlaskResponse(files[file_id]['content'], mimetype='application/octet-stream')
+
+    @app.route('/v1/batches', methods=['POST'])
+    def create_batch():
+        body = request.get_json(force=True)
+        if body.get('input_file_id') not in files:
+            return jsonify({'error': {'message': 'Unknown input_file_id', 'type': 'invalid_request_error'}}), 400
+        count('batches')
+        batch_id = f"batch_mock_{uuid.uuid4().hex[:12]}"
+        with batch_lock:
+            batches[batch_id] = {
+                'id': batch_id, 'object': 'batch', 'endpoint': body.get('endpoint', '/v1/chat/completions'),
+                'input_file_id': body['input_file_id'], 'completion_window': body.get('completion_window', '24h'),
+                'status': 'in_progress', 'created_at': int(time.time()), 'in_progress_at': int(time.time()),
+                'output_file_id': None, 'error_file_id': None, 'metadata': body.get('metadata'),
+                'request_counts': {'total': 0, 'completed': 0, 'failed': 0}, 'errors': None,
+                '_ready_at': time.time() + config.batch_seconds
+            }
+            return jsonify({k: v for k, v in batches[batch_id].items() if not k.startswith('_')})
+
+    @app.route('/v1/batches/<batch_id>', methods=['GET'])
+    def retrieve_batch(batch_id):
+        with batch_lock:
+            batch = batches.get(batch_id)
+            if batch is None:
+                return jsonify({'error': {'message': f'No such batch: {batch_id}', 'type': 'invalid_request_error'}}), 404
+            # Batches are answered lazily, on the first poll after batch_seconds
+            if batch['status'] == 'in_progress' and time.time() >= batch['_ready_at']:
+                run_batch(batch)
+            return jsonify({k: v for k, v in batch.items() if not k.startswith('_')})
+
+    @app.route('/mock/stats', methods=['GET'])
+    def get_stats():
+        with stats_lock:
+            return jsonify({'stats': dict(stats), 'config': config.to_dict()})
+
+    @app.route('/mock/config', methods=['POST'])
+    def update_config():
+        try:
+            config.update(request.get_json(force=True) or {})
+        except (ValueError, OSError) as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'config': config.to_dict()})
+
+    return app
+
+
+def start_mock_llm_server(config: Optional[MockLLMConfig] = None, host: str = '127.0.0.1',
+                          port: int = 0) -> Tuple[Any, str]:
+    """Serve the mock on a background thread. Returns (server, base_url); call server.shutdown() to stop."""
+    from werkzeug.serving import make_server
+    server = make_server(host, port, create_mock_llm_app(config), threaded=True)
+    threading.Thread(target=server.serve_forever, name='mock-llm', daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible mock server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', default='none', help="none | fixed:S | uniform:LO:HI | normal:MEAN:SD | lognormal:MU:SIGMA")
+    parser.add_argument('--token-delay', type=float, default=0.0, help='seconds per streamed token')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-statuses', default='429,500,503')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='fraction of requests that hang')
+    parser.add_argument('--hang-seconds', type=float, default=120.0)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--fixtures', help='JSONL file recorded with LLM_RECORD_FIXTURES')
+    parser.add_argument('--batch-seconds', type=float, default=0.0, help='seconds a Batch API job stays in progress')
+    args = parser.parse_args()
+
+    config = MockLLMConfig(
+        latency=args.latency, token_delay=args.token_delay, error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_statuses.split(',') if s),
+        timeout_rate=args.timeout_rate, hang_seconds=args.hang_seconds, seed=args.seed,
+        fixtures_path=args.fixtures, batch_seconds=args.batch_seconds
+    )
+    print(f"Mock LLM server on http://{args.host}:{args.port}/v1 with {config.to_dict()}")
+    create_mock_llm_app(config).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Token-budgeted prompt assembly.
+
+Prompt inputs (resume, job listing, transcripts, ...) are added as named sections
+with a priority and an optional per-section cap. The builder counts tokens,
+applies the caps, and if the total still exceeds the budget trims the lowest
+priority sections first. Cuts land on a sentence or line boundary where
+possible, so sections are not chopped mid-sentence. Each build logs the prompt
+size per section.
+"""
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to a character-based estimate
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = ' [...]'
+
+# Default input budgets (tokens) per operation; override with PROMPT_BUDGET_<OPERATION>
+DEFAULT_BUDGETS = {
+    'analyze_documents': 5000,
+    'generate_interview_questions': 1500,
+    'generate_direct_questions': 2500,
+    'analyze_response': 2500,
+    'analyze_response_star': 3000,
+    'generate_follow_up_questions': 1500,
+    'generate_final_evaluation': 6000,
+}
+
+_SENTENCE_END_RE = re.compile(r'[.!?](?:\s|$)|\n')
+_encoders = {}
+
+
+def _encoder(model: str):
+    if tiktoken is None:
+        return None
+    if model not in _encoders:
+        try:
+            _encoders[model] = tiktoken.encoding_for_model(model)
+        except Exception:
+            _encoders[model] = tiktoken.get_encoding('cl100k_base')
+    return _encoders[model]
+
+
+def count_tokens(text: str, model: str = 'gpt-4-turbo-preview') -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate ~4 characters per token."""
+    if not text:
+        return 0
+    encoder = _encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = 'gpt-4-turbo-preview') -> str:
+    """Cut text to at most max_tokens, preferring to end on a sentence or line boundary."""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    encoder = _encoder(model)
+    marker_tokens = count_tokens(TRUNCATION_MARKER, model)
+    keep = max(max_tokens - marker_tokens, 1)
+    if encoder is not None:
+        cut = encoder.decode(encoder.encode(text)[:keep])
+    else:
+        cut = text[:keep * CHARS_PER_TOKEN]
+
+    # Back off to the last sentence end if it does not throw away too much
+    boundaries = [m.end() for m in _SENTENCE_END_RE.finditer(cut)]
+    if boundaries and boundaries[-1] >= len(cut) * 0.7:
+        cut = cut[:boundaries[-1]]
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+def budget_for(operation: str) -> int:
+    env_value = os.environ.get(f'PROMPT_BUDGET_{operation.upper()}')
+    if env_value:
+        return int(env_value)
+    return DEFAULT_BUDGETS.get(operation, 3000)
+
+
+class PromptBuilder:
+    def __init__(self, operation: str, budget_tokens: Optional[int] = None,
+                 model: str = 'gpt-4-turbo-preview'):
+        self.operation = operation
+        self.budget_tokens = budget_tokens if budget_tokens is not None else budget_for(operation)
+        self.model = model
+        self.sections: List[Dict[str, Any]] = []
+        self.report: Dict[str, Any] = {}
+
+    def add(self, name: str, text: Any, priority: int = 1, max_tokens: Optional[int] = None,
+            min_tokens: int = 0) -> 'PromptBuilder':
+        """Add a section. Higher priority sections are trimmed last."""
+        text = '' if text is None else str(text)
+        self.sections.append({
+            'name': name,
+            'text': text,
+            'priority': priority,
+            'max_tokens': max_tokens,
+            'min_tokens': min_tokens,
+            'original_tokens': count_tokens(text, self.model)
+        })
+        return self
+
+    def build(self) -> Dict[str, str]:
+        """Return {section name: text that fits the budget} and record the size report."""
+        for section in self.sections:
+            section['tokens'] = section['original_tokens']
+            if section['max_tokens'] is not None and section['tokens'] > section['max_tokens']:
+                section['tokens'] = section['max_tokens']
+
+        overflow = sum(s['tokens'] for s in self.sections) - self.budget_tokens
+        for section in sorted(self.sections, key=lambda s: s['priority']):
+            if overflow <= 0:
+                break
+            reducible = section['tokens'] - section['min_tokens']
+            if reducible <= 0:
+                continue
+            cut = min(reducible, overflow)
+            section['tokens'] -= cut
+            overflow -= cut
+
+        rendered = {}
+        for section in self.sections:
+            if section['tokens'] < section['original_tokens']:
+                rendered[section['name']] = truncate_to_tokens(section['text'], section['tokens'], self.model)
+            else:
+                rendered[section['name']] = section['text']
+
+        self.report = {
+            'operation': self.operation,
+            'budget_tokens': self.budget_tokens,
+            'total_tokens': sum(count_tokens(text, self.model) for text in rendered.values()),
+            'estimated': tiktoken is None,
+            'sections': {
+                s['name']: {
+                    'tokens': count_tokens(rendered[s['name']], self.model),
+                    'original_tokens': s['original_tokens'],
+                    'truncated': s['tokens'] < s['original_tokens']
+                }
+                for s in self.sections
+            }
+        }
+        summary = ', '.join(
+            f"{name} {info['tokens']}/{info['original_tokens']}{' truncated' if info['truncated'] else ''}"
+            for name, info in self.report['sections'].items()
+        )
+        print(f"Prompt {self.operation}: {self.report['total_tokens']} input tokens of {self.budget_tokens} ({summary})")
+        return rendered
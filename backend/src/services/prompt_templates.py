@@ -0,0 +1,48 @@
+"""
+Prompt templates laid out for provider-side prefix caching.
+
+OpenAI caches the longest previously seen prompt prefix (in 128-token steps
+once it is at least 1024 tokens long), and Bedrock does the same up to a cache
+point. Both only help when the unchanging part of a prompt comes first, so a
+template renders, in order:
+
+1. the system message: instructions and the output schema/examples, identical
+   on every call of the template;
+2. the per-interview context (the context pack), identical across the calls
+   of one interview;
+3. the per-call delta: the question, the response text, counts.
+
+Cached prompt tokens are read from each response's usage and recorded by
+telemetry (llm_tokens{kind="cached"} and llm_prompt_cache_requests_total).
+"""
+from typing import Dict, List
+
+from src.services.prompt_budget import count_tokens
+
+
+class PromptTemplate:
+    def __init__(self, name: str, instructions: str, output_format: str = '', delta: str = '',
+                 context_label: str = 'Context'):
+        """delta is a str.format template filled with the per-call fields; the other parts are static."""
+        self.name = name
+        self.system = instructions.strip()
+        if output_format:
+            self.system += '\n\n' + output_format.strip()
+        self.delta = delta.strip()
+        self.context_label = context_label
+
+    def messages(self, context: str = '', **fields) -> List[Dict[str, str]]:
+        """Chat messages for one call: static system message, then context, then the delta."""
+        parts = []
+        if context:
+            parts.append(f"{self.context_label}:\n{context}")
+        parts.append(self.delta.format(**fields))
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": '\n\n'.join(parts)}
+        ]
+
+    @property
+    def static_tokens(self) -> int:
+        """Tokens in the static prefix shared by every call of this template."""
+        return count_tokens(self.system)
@@ -0,0 +1,159 @@
+"""
+Local question embeddings for matching paraphrased questions.
+
+Interviewers rarely read a prepared question word for word, and a paraphrase
+can share too few terms for the BM25 index (question_index.py) to match it.
+Each question is therefore also embedded as a hashed n-gram vector: its
+content terms, adjacent term pairs and the character trigrams of each term
+(so "challenge" and "challenging" overlap) are hashed into a fixed number of
+signed dimensions and L2-normalized. No model or network is needed, and a
+spoken utterance embeds in well under a millisecond.
+
+Vectors are stored in question_embedding when questions are saved, so
+detection only loads them into a matrix; matching is one matrix-vector
+product of cosine similarities and a top-k selection with NumPy.
+"""
+import os
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.models.interview import db, Question, QuestionEmbedding
+from src.services.question_terms import content_terms
+
+# Bump when the features (term normalization in question_terms.py included) or dimensions change;
+# stored vectors of other versions are recomputed
+EMBEDDER_VERSION = 'hashed-ngram/v2'
+EMBEDDING_DIMENSIONS = 1024  # a power of two
+# Cosine similarity a paraphrase needs to count as a match
+QUESTION_EMBEDDING_MIN_SIMILARITY = float(os.environ.get('QUESTION_EMBEDDING_MIN_SIMILARITY', 0.35))
+# Lead the best question needs over the runner-up; closer calls are left unmatched
+QUESTION_EMBEDDING_MIN_MARGIN = float(os.environ.get('QUESTION_EMBEDDING_MIN_MARGIN', 0.05))
+
+TERM_WEIGHT = 1.0
+PAIR_WEIGHT = 0.7
+
+
+def term_features(term: str) -> Iterator[Tuple[str, float]]:
+    yield f"w:{term}", TERM_WEIGHT
+    padded = f"#{term}#"
+    trigrams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+    # Trigrams of one term together weigh as much as the term itself
+    weight = 1.0 / len(trigrams) ** 0.5
+    for trigram in trigrams:
+        yield f"c:{trigram}", weight
+
+
+def pair_feature(first: str, second: str) -> Tuple[str, float]:
+    return f"p:{first} {second}", PAIR_WEIGHT
+
+
+def feature_slot(feature: str, weight: float) -> Tuple[int, float]:
+    """The dimension a feature hashes to and its signed weight there."""
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h & (EMBEDDING_DIMENSIONS - 1), (weight if (h >> 16) & 1 else -weight)
+
+
+def _features(terms: List[str]) -> Iterator[Tuple[str, float]]:
+    for term in terms:
+        yield from term_features(term)
+    for first, second in zip(terms, terms[1:]):
+        yield pair_feature(first, second)
+
+
+def embed_texts(texts: Sequence[str]) -> np.ndarray:
+    """L2-normalized float32 vectors, one row per text (all zeros for a text without content terms)."""
+    vectors = np.zeros((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature, weight in _features(content_terms(text)):
+            index, signed = feature_slot(feature, weight)
+            vectors[row, index] += signed
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def store_question_embeddings(questions: Iterable[Question]) -> None:
+    """Embed questions (already flushed, so they have ids) and stage their vectors; the caller commits."""
+    questions = list(questions)
+    if not questions:
+        return
+    vectors = embed_texts([q.text for q in questions])
+    for question, vector in zip(questions, vectors):
+        db.session.merge(QuestionEmbedding(question_id=question.id, embedder=EMBEDDER_VERSION,
+                                           dimensions=EMBEDDING_DIMENSIONS, vector=vector.tobytes()))
+
+
+def load_question_vectors(interview_id: int, questions: Sequence[Tuple[int, str]]) -> np.ndarray:
+    """Stored vectors for (id, text) questions in order; missing or outdated ones are embedded and stored."""
+    rows = db.session.query(QuestionEmbedding.question_id, QuestionEmbedding.vector).join(
+        Question, Question.id == QuestionEmbedding.question_id).filter(
+        Question.interview_id == interview_id, QuestionEmbedding.embedder == EMBEDDER_VERSION).all()
+    stored = {row.question_id: row.vector for row in rows}
+
+    matrix = np.zeros((len(questions), EMBEDDING_DIMENSIONS), dtype=np.float32)
+    missing = []
+    for i, (question_id, _) in enumerate(questions):
+        if question_id in stored:
+            matrix[i] = np.frombuffer(stored[question_id], dtype=np.float32)
+        else:
+            missing.append(i)
+    if missing:
+        # Questions saved before embeddings existed
+        vectors = embed_texts([questions[i][1] for i in missing])
+        for i, vector in zip(missing, vectors):
+            matrix[i] = vector
+            db.session.merge(QuestionEmbedding(question_id=questions[i][0], embedder=EMBEDDER_VERSION,
+                                               dimensions=EMBEDDING_DIMENSIONS, vector=vector.tobytes()))
+        db.session.commit()
+        print(f"Embedded {len(missing)} questions for interview {interview_id}")
+    return matrix
+
+
+class SemanticQuestionIndex:
+    def __init__(self, keys: Sequence[Any], matrix: np.ndarray):
+        """keys label the rows of matrix, the questions' embedding vectors."""
+        self.keys = list(keys)
+        self.matrix = matrix
+
+    @classmethod
+    def from_texts(cls, questions: Sequence[Tuple[Any, str]]) -> 'SemanticQuestionIndex':
+        return cls([key for key, _ in questions], embed_texts([text for _, text in questions]))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, text: str, k: int = 3) -> List[Dict[str, Any]]:
+        """Top-k questions by cosine similarity, best first, as {'key', 'score', 'confidence', 'exact_match'}."""
+        if not self.keys or k <= 0:
+            return []
+        return self.rank(self.matrix @ embed_texts([text])[0], k)
+
+    def rank(self, similarities: np.ndarray, k: int = 3) -> List[Dict[str, Any]]:
+        """Top-k of precomputed cosine similarities (one per question), best first."""
+        k = min(k, len(self.keys))
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [{'key': self.keys[i], 'score': round(float(similarities[i]), 4),
+                 'confidence': round(max(0.0, min(0.95, float(similarities[i]))), 3), 'exact_match': False}
+                for i in top if similarities[i] > 0]
+
+    def best_match(self, text: str, k: int = 3,
+                   min_similarity: float = QUESTION_EMBEDDING_MIN_SIMILARITY) -> Tuple[Optional[Dict[str, Any]],
+                                                                                      List[Dict[str, Any]]]:
+        """(the most similar question at or above min_similarity or None, the top-k ranked matches)."""
+        return self.pick(self.search(text, max(k, 2)), k, min_similarity)
+
+    @staticmethod
+    def pick(matches: List[Dict[str, Any]], k: int = 3,
+             min_similarity: float = QUESTION_EMBEDDING_MIN_SIMILARITY) -> Tuple[Optional[Dict[str, Any]],
+                                                                                List[Dict[str, Any]]]:
+        """Apply the similarity and margin thresholds to ranked matches (at least two when available)."""
+        if not matches or matches[0]['score'] < min_similarity:
+            return None, matches[:k]
+        if len(matches) > 1 and matches[0]['score'] - matches[1]['score'] < QUESTION_EMBEDDING_MIN_MARGIN:
+            return None, matches[:k]
+        return matches[0], matches[:k]
@@ -0,0 +1,197 @@
+"""
+Per-interview BM25 index over question text for /detect-question.
+
+Each question is reduced to its content terms (stopwords such as "you", "a"
+and "the" dropped, plurals folded) and stored in an inverted index, so scoring
+spoken text only walks the postings of the terms it actually contains. Matches
+are ranked by BM25; the reported confidence is the share of the question's
+term weight (IDF) that was spoken, which stays in [0, 1] and means the same
+thing for short and long questions.
+
+Spoken text the BM25 index cannot place is matched against the questions'
+stored embedding vectors instead (question_embeddings.py), which catches
+paraphrases that share few exact terms.
+
+Indexes are built when an interview's questions are saved and cached per
+interview. Each lookup checks the interview's question count and newest id,
+so a worker that did not build the index (or questions added later) rebuilds
+it on first use.
+"""
+import math
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+
+from src.models.interview import db, Question
+from src.services.question_embeddings import SemanticQuestionIndex, load_question_vectors
+from src.services.question_terms import content_terms, normalized_text
+
+# Share of a question's term weight the spoken text must cover to count as a match
+QUESTION_MATCH_MIN_CONFIDENCE = float(os.environ.get('QUESTION_MATCH_MIN_CONFIDENCE', 0.5))
+# Fall back to the embedding index when no question matches lexically
+QUESTION_SEMANTIC_MATCHING = os.environ.get('QUESTION_SEMANTIC_MATCHING', 'true').lower() != 'false'
+QUESTION_INDEX_MAX_INTERVIEWS = int(os.environ.get('QUESTION_INDEX_MAX_INTERVIEWS', 500))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class QuestionIndex:
+    def __init__(self, questions: Sequence[Tuple[Any, str]]):
+        """questions are (key, text) pairs; search results refer to them by key."""
+        self.keys: List[Any] = []
+        self._normalized: List[str] = []
+        self._lengths: List[int] = []
+        self._terms: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        for key, text in questions:
+            doc = len(self.keys)
+            counts = Counter(content_terms(text))
+            self.keys.append(key)
+            self._normalized.append(normalized_text(text))
+            self._lengths.append(sum(counts.values()))
+            self._terms.append(len(counts))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((doc, tf))
+
+        count = len(self.keys)
+        self._average_length = (sum(self._lengths) / count) if count else 0.0
+        self._idf = {term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                     for term, postings in self._postings.items()}
+        # Total term weight of each question, the denominator of its confidence
+        self._weights = [0.0] * count
+        for term, postings in self._postings.items():
+            for doc, _ in postings:
+                self._weights[doc] += self._idf[term]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def postings(self, term: str) -> List[Tuple[int, int]]:
+        """(question position, term frequency) for each question containing term."""
+        return self._postings.get(term, [])
+
+    def idf(self, term: str) -> float:
+        return self._idf.get(term, 0.0)
+
+    def confidence(self, doc: int, covered: float, hits: int) -> float:
+        """Confidence for the question at position doc given the IDF weight and number of its terms spoken."""
+        confidence = min(0.95, covered / self._weights[doc])
+        # One shared word says little when the question has more to match
+        if hits < min(2, self._terms[doc]):
+            confidence = min(confidence, 0.3)
+        return confidence
+
+    def search(self, text: str, k: int = 3) -> List[Dict[str, Any]]:
+        """Top-k questions for text, best first, as {'key', 'score', 'confidence', 'exact_match'}."""
+        scores: Dict[int, float] = {}
+        covered: Dict[int, float] = {}
+        hits: Dict[int, int] = {}
+        for term in set(content_terms(text)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for doc, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc] / self._average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                covered[doc] = covered.get(doc, 0.0) + idf
+                hits[doc] = hits.get(doc, 0) + 1
+
+        normalized = None
+        results = []
+        for doc in sorted(scores, key=scores.get, reverse=True)[:max(k, 0)]:
+            if normalized is None:
+                normalized = normalized_text(text)
+            exact = normalized == self._normalized[doc]
+            confidence = 1.0 if exact else self.confidence(doc, covered[doc], hits[doc])
+            results.append({'key': self.keys[doc], 'score': round(scores[doc], 4),
+                            'confidence': round(confidence, 3), 'exact_match': exact})
+        return results
+
+    def best_match(self, text: str, k: int = 3,
+                   min_confidence: float = QUESTION_MATCH_MIN_CONFIDENCE) -> Tuple[Optional[Dict[str, Any]],
+                                                                                   List[Dict[str, Any]]]:
+        """(the best match above min_confidence or None, the top-k ranked matches)."""
+        matches = self.search(text, k)
+        # The top BM25 score can belong to a long question only partly spoken; pick by coverage among the top-k
+        best = max(matches, key=lambda m: (m['confidence'], m['score']), default=None)
+        if best is None or best['confidence'] < min_confidence:
+            return None, matches
+        return best, matches
+
+
+def match_question(lexical: QuestionIndex, semantic: SemanticQuestionIndex, text: str,
+                   k: int = 3) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], Optional[str]]:
+    """(best match or None, top-k ranked matches, 'lexical' / 'semantic' / None for no match)."""
+    best, matches = lexical.best_match(text, k)
+    if best is not None:
+        return best, matches, 'lexical'
+    if QUESTION_SEMANTIC_MATCHING:
+        best, semantic_matches = semantic.best_match(text, k)
+        if best is not None:
+            return best, semantic_matches, 'semantic'
+        matches = matches or semantic_matches
+    return None, matches, None
+
+
+class QuestionIndexStore:
+    """BM25 and embedding indexes per interview, keyed on the interview's question count and newest id."""
+
+    def __init__(self, max_interviews: int = QUESTION_INDEX_MAX_INTERVIEWS):
+        self.max_interviews = max_interviews
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    @staticmethod
+    def _signature(interview_id: int) -> Tuple[int, Optional[int]]:
+        count, newest = db.session.query(func.count(Question.id), func.max(Question.id)).filter(
+            Question.interview_id == interview_id).one()
+        return count, newest
+
+    def build(self, interview_id: int) -> Tuple[QuestionIndex, SemanticQuestionIndex]:
+        """(Re)build the interview's indexes from its saved questions and their stored vectors."""
+        rows = db.session.query(Question.id, Question.text).filter(
+            Question.interview_id == interview_id).order_by(Question.id).all()
+        questions = [(row.id, row.text) for row in rows]
+        indexes = (QuestionIndex(questions),
+                   SemanticQuestionIndex([row.id for row in rows], load_question_vectors(interview_id, questions)))
+        signature = (len(rows), rows[-1].id if rows else None)
+        with self._lock:
+            self._indexes[interview_id] = (signature, indexes)
+            self._indexes.move_to_end(interview_id)
+            while len(self._indexes) > self.max_interviews:
+                self._indexes.popitem(last=False)
+            self.builds += 1
+        return indexes
+
+    def get(self, interview_id: int) -> Tuple[QuestionIndex, SemanticQuestionIndex]:
+        signature = self._signature(interview_id)
+        with self._lock:
+            cached = self._indexes.get(interview_id)
+            if cached and cached[0] == signature:
+                self._indexes.move_to_end(interview_id)
+                return cached[1]
+        return self.build(interview_id)
+
+    def match(self, interview_id: int, text: str,
+              k: int = 3) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], Optional[str]]:
+        """Match text against the interview's questions; see match_question."""
+        return match_question(*self.get(interview_id), text, k)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            indexes = [lexical for _, (lexical, _) in self._indexes.values()]
+        return {
+            'cached_interviews': len(indexes),
+            'indexed_questions': sum(len(index) for index in indexes),
+            'semantic_matching': QUESTION_SEMANTIC_MATCHING,
+            'builds': self.builds
+        }
+
+
+question_indexes = QuestionIndexStore()
@@ -0,0 +1,218 @@
+"""
+Streaming question detection over the interviewer's running transcript.
+
+Instead of the frontend deciding what to post to /detect-question, the
+transcript can be sent chunk by chunk as it is recognized. Each stream keeps a
+sliding window of the last TRANSCRIPT_WINDOW_TERMS content terms, and the match
+state of every question is kept up to date incrementally: a term entering or
+leaving the window only touches the questions in its BM25 postings (their
+covered term weight) and the embedding dimensions its features hash to (the
+window vector, its norm and its dot products with the question vectors). A
+chunk therefore costs work proportional to its own length, however long the
+transcript has run.
+
+When a question clears the same thresholds /detect-question uses, a
+question_detected event is emitted, the question is not detected again on the
+stream, and the window starts over.
+"""
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.question_embeddings import (
+    EMBEDDING_DIMENSIONS, SemanticQuestionIndex, feature_slot, pair_feature, term_features
+)
+from src.services.question_index import (
+    QUESTION_MATCH_MIN_CONFIDENCE, QUESTION_SEMANTIC_MATCHING, QuestionIndex, question_indexes
+)
+from src.services.question_terms import content_terms
+
+TRANSCRIPT_WINDOW_TERMS = int(os.environ.get('TRANSCRIPT_WINDOW_TERMS', 40))
+TRANSCRIPT_STREAM_MAX_SESSIONS = int(os.environ.get('TRANSCRIPT_STREAM_MAX_SESSIONS', 500))
+TRANSCRIPT_STREAM_TTL_SECONDS = int(os.environ.get('TRANSCRIPT_STREAM_TTL_SECONDS', 2 * 3600))
+
+# A chunk's trailing word, which the next chunk may continue
+_trailing_word = re.compile(r'\S+$')
+
+
+class TranscriptWindow:
+    def __init__(self, lexical: QuestionIndex, semantic: SemanticQuestionIndex,
+                 window_terms: int = TRANSCRIPT_WINDOW_TERMS):
+        self.lexical = lexical
+        self.semantic = semantic
+        self.window_terms = window_terms
+        # Question vectors by dimension, so a feature update reads one contiguous row
+        self._columns = np.ascontiguousarray(semantic.matrix.T, dtype=np.float64)
+        self.detected = set()
+        self.pending = ''
+        self.clear()
+
+    def clear(self) -> None:
+        """Empty the window (after a detection), keeping the detected questions and any pending word."""
+        self.terms = deque()
+        self.counts = Counter()
+        self.covered: Dict[int, float] = {}
+        self.hits: Dict[int, int] = {}
+        self.vector = np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float64)
+        self.norm2 = 0.0
+        self.dots = np.zeros(len(self.semantic), dtype=np.float64)
+
+    def feed(self, text: str, final: bool = False) -> List[Dict[str, Any]]:
+        """Consume the next chunk of transcript; return the questions detected in it."""
+        text = self.pending + text
+        self.pending = ''
+        if not final:
+            trailing = _trailing_word.search(text)
+            if trailing:
+                self.pending = trailing.group()
+                text = text[:trailing.start()]
+
+        touched = set()
+        terms = content_terms(text)
+        for term in terms:
+            self._push(term, touched)
+            if len(self.terms) > self.window_terms:
+                self._pop()
+        if not terms:
+            return []
+        event = self._detect(touched)
+        return [event] if event else []
+
+    def _push(self, term: str, touched: set) -> None:
+        if self.counts[term] == 0:
+            idf = self.lexical.idf(term)
+            for doc, _ in self.lexical.postings(term):
+                self.covered[doc] = self.covered.get(doc, 0.0) + idf
+                self.hits[doc] = self.hits.get(doc, 0) + 1
+                touched.add(doc)
+        self.counts[term] += 1
+
+        for feature, weight in term_features(term):
+            self._add_feature(feature, weight)
+        if self.terms:
+            self._add_feature(*pair_feature(self.terms[-1], term))
+        self.terms.append(term)
+
+    def _pop(self) -> None:
+        term = self.terms.popleft()
+        self.counts[term] -= 1
+        if self.counts[term] == 0:
+            del self.counts[term]
+            idf = self.lexical.idf(term)
+            for doc, _ in self.lexical.postings(term):
+                self.covered[doc] -= idf
+                self.hits[doc] -= 1
+
+        for feature, weight in term_features(term):
+            self._add_feature(feature, -weight)
+        if self.terms:
+            feature, weight = pair_feature(term, self.terms[0])
+            self._add_feature(feature, -weight)
+
+    def _add_feature(self, feature: str, weight: float) -> None:
+        index, delta = feature_slot(feature, weight)
+        self.norm2 += 2 * self.vector[index] * delta + delta * delta
+        self.vector[index] += delta
+        self.dots += self._columns[index] * delta
+
+    def _detect(self, touched: set) -> Optional[Dict[str, Any]]:
+        best = None
+        for doc in touched:
+            key = self.lexical.keys[doc]
+            if key in self.detected or self.hits.get(doc, 0) == 0:
+                continue
+            confidence = self.lexical.confidence(doc, self.covered[doc], self.hits[doc])
+            if confidence >= QUESTION_MATCH_MIN_CONFIDENCE and (best is None or confidence > best['confidence']):
+                best = {'key': key, 'confidence': round(confidence, 3), 'match_method': 'lexical'}
+
+        if best is None and QUESTION_SEMANTIC_MATCHING and len(self.semantic) and self.norm2 > 1e-9:
+            similarities = self.dots / math.sqrt(self.norm2)
+            for i, key in enumerate(self.semantic.keys):
+                if key in self.detected:
+                    similarities[i] = -1.0
+            match, _ = SemanticQuestionIndex.pick(self.semantic.rank(similarities, 2), 1)
+            if match:
+                best = {'key': match['key'], 'confidence': match['confidence'], 'match_method': 'semantic'}
+
+        if best is None:
+            return None
+        self.detected.add(best['key'])
+        self.clear()
+        return dict(best, event='question_detected')
+
+
+class TranscriptStreamSession:
+    def __init__(self):
+        self.window: Optional[TranscriptWindow] = None
+        self.chunks = 0
+        self.detections = 0
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+
+class TranscriptStreamStore:
+    def __init__(self, max_sessions: int = TRANSCRIPT_STREAM_MAX_SESSIONS,
+                 ttl_seconds: int = TRANSCRIPT_STREAM_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def feed(self, interview_id: int, stream_id: str, text: str,
+             final: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Feed a chunk of the interview's transcript; return (detection events, stream info)."""
+        lexical, semantic = question_indexes.get(interview_id)
+        session = self._get_session((interview_id, stream_id))
+        with session.lock:
+            window = session.window
+            if window is None or window.lexical is not lexical:
+                # First chunk, or the questions changed: same transcript state, new indexes
+                session.window = TranscriptWindow(lexical, semantic)
+                if window is not None:
+                    session.window.detected = window.detected
+                    session.window.pending = window.pending
+                window = session.window
+            events = window.feed(text, final)
+            session.chunks += 1
+            session.detections += len(events)
+            session.updated_at = time.time()
+            info = {'chunks': session.chunks, 'detections': session.detections, 'window_terms': len(window.terms)}
+        return events, info
+
+    def reset(self, interview_id: int, stream_id: str) -> None:
+        with self._lock:
+            self._sessions.pop((interview_id, stream_id), None)
+
+    def _get_session(self, key: Tuple) -> TranscriptStreamSession:
+        now = time.time()
+        with self._lock:
+            for stale_key in [k for k, s in self._sessions.items() if now - s.updated_at > self.ttl_seconds]:
+                del self._sessions[stale_key]
+
+            session = self._sessions.get(key)
+            if session is None:
+                session = TranscriptStreamSession()
+                self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            'active_streams': len(sessions),
+            'chunks': sum(s.chunks for s in sessions),
+            'detections': sum(s.detections for s in sessions),
+            'window_terms': TRANSCRIPT_WINDOW_TERMS
+        }
+
+
+transcript_streams = TranscriptStreamStore()
@@ -0,0 +1,53 @@
+"""
+Term normalization shared by the question matchers (question_index.py and
+question_embeddings.py).
+"""
+import re
+from typing import List
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+herself him himself his i if in into is it its itself just me more most my myself no nor not now of off on once
+only or other our ours ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were what when where which
+while who whom why how will with would you your yours yourself yourselves can't don't i'm it's let's that's what's
+you're you've you'd you'll okay ok so um uh like
+""".split())
+
+# Speech recognition spells out numbers that prepared questions write as digits
+NUMBER_WORDS = {'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5', 'six': '6', 'seven': '7',
+                'eight': '8', 'nine': '9', 'ten': '10', 'twenty': '20', 'thirty': '30', 'ninety': '90'}
+
+_word_pattern = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def content_terms(text: str) -> List[str]:
+    """Lowercased words of text without stopwords, with plurals, possessives and verb endings folded."""
+    terms = []
+    for word in _word_pattern.findall((text or '').lower()):
+        if word in STOPWORDS:
+            continue
+        if word in NUMBER_WORDS:
+            terms.append(NUMBER_WORDS[word])
+            continue
+        if word.endswith("'s"):
+            word = word[:-2]
+        elif len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        # Fold common endings: challenge, challenged and challenging all become "challeng", stressful "stress"
+        if len(word) > 6 and word.endswith('ing'):
+            word = word[:-3]
+        elif len(word) > 5 and word.endswith('ed'):
+            word = word[:-2]
+        elif len(word) > 6 and word.endswith('ful'):
+            word = word[:-3]
+        elif len(word) > 5 and word.endswith('e'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def normalized_text(text: str) -> str:
+    """Lowercased words of text joined by single spaces, for exact-match checks."""
+    return ' '.join(_word_pattern.findall((text or '').lower()))
@@ -0,0 +1,58 @@
+"""
+Tokenized view of a candidate response shared by the local analyses.
+
+The text is segmented into sentences and tagged with STAR components once
+(services/star_keywords.py). Everything downstream refers to sentences by
+(start, end) character offsets into the original text rather than re-splitting,
+lowercasing or joining copies of it: STAR components are lists of sentence
+spans, summary points are the leading sentence spans, and word counts for
+quality assessment are taken over spans in place. Text is only sliced out when
+a result is returned, and results carry the offsets alongside it.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from src.services.star_keywords import StarKeywordMatcher, star_matcher
+
+Span = Tuple[int, int]
+
+# Sentences returned as summary points
+SUMMARY_POINTS = 3
+# Sentences joined into a STAR component's content
+COMPONENT_SENTENCES = 2
+
+_word_pattern = re.compile(r'\S+')
+
+
+class ResponseDocument:
+    def __init__(self, text: str, matcher: StarKeywordMatcher = star_matcher):
+        self.text = text
+        self.sentences: List[Span] = []
+        self.components: Dict[str, List[Span]] = {component: [] for component in matcher.components}
+        for start, end, found in matcher.sentences(text):
+            self.sentences.append((start, end))
+            for component in found:
+                self.components[component].append((start, end))
+        self.word_count = self.count_words((0, len(text)))
+
+    def count_words(self, span: Span) -> int:
+        """Whitespace-separated words inside span, counted without slicing."""
+        return sum(1 for _ in _word_pattern.finditer(self.text, span[0], span[1]))
+
+    def component_spans(self, component: str, limit: int = COMPONENT_SENTENCES) -> List[Span]:
+        return self.components.get(component, [])[:limit]
+
+    def summary_spans(self, limit: int = SUMMARY_POINTS) -> List[Span]:
+        return self.sentences[:limit]
+
+    def slice(self, span: Span) -> str:
+        return self.text[span[0]:span[1]]
+
+    def excerpt(self, spans: List[Span], separator: str = '. ') -> Optional[str]:
+        """The spans' text joined for display, or None when there are none."""
+        return separator.join(self.slice(span) for span in spans) if spans else None
+
+
+def shift_spans(spans: List[Span], offset: int) -> List[List[int]]:
+    """Spans moved by offset characters, e.g. from a delta into the full transcript."""
+    return [[start + offset, end + offset] for start, end in spans]
@@ -0,0 +1,87 @@
+"""
+Single-flight coalescing for identical in-flight AI calls.
+
+When the same (interview, operation, input) is requested again while a call is
+still running - a double click, or the silence timer firing twice - the later
+callers wait for the first call and share its result instead of issuing another
+upstream request.
+"""
+import copy
+import hashlib
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = defaultdict(lambda: {'calls': 0, 'executed': 0, 'coalesced': 0, 'errors': 0})
+
+    @staticmethod
+    def make_key(interview_id: Any, operation: str, *inputs: Any) -> Tuple[Any, str, str]:
+        """Key a call by interview, operation and a hash of its inputs."""
+        digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return (interview_id, operation, digest)
+
+    def do(self, key: Tuple[Any, str, str], fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per in-flight key. Returns (result, shared).
+
+        shared is True when this caller received the result of a call started by
+        another caller. Exceptions raised by fn propagate to every caller.
+        """
+        operation = key[1]
+        with self._lock:
+            self._stats[operation]['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats[operation]['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats[operation]['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # Callers may mutate what they get back, so followers receive their own copy
+            return copy.deepcopy(call.result), True
+
+        try:
+            result = fn()
+            # Snapshot before the leader's caller can mutate its copy
+            call.result = copy.deepcopy(result)
+            return result, False
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._stats[operation]['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {op: dict(counts) for op, counts in self._stats.items()}
+            in_flight = len(self._calls)
+        return {'in_flight': in_flight, 'operations': operations}
+
+
+# Process-wide coalescing layer in front of the AI services
+single_flight = SingleFlight()
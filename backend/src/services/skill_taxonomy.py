@@ -0,0 +1,123 @@
+"""
+Skill taxonomy shared by the keyword extraction helpers.
+
+The taxonomy (data/skill_taxonomy.json, or the JSON file named by
+SKILL_TAXONOMY_PATH) lists canonical skills with a category and synonyms, e.g.
+Kubernetes with "k8s". It is compiled once at import into a trie over
+normalized tokens, so matching a document is one tokenizing pass plus a walk
+bounded by the longest synonym: linear in the text however many skills the
+taxonomy holds. Matches follow token boundaries ("Java" does not match inside
+"JavaScript"), take the longest synonym at each position and come back as
+canonical names with character offsets.
+
+Names and synonyms match case-insensitively, except the terms listed under an
+entry's "exact", which must appear exactly as written (for skills whose names
+are also common words, such as Go or Swift).
+"""
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'skill_taxonomy.json')
+SKILL_TAXONOMY_PATH = os.environ.get('SKILL_TAXONOMY_PATH', DEFAULT_TAXONOMY_PATH)
+
+# Categories reported as technologies (the rest are practices and methodologies)
+TECHNOLOGY_CATEGORIES = ('language', 'frontend', 'backend', 'mobile', 'database', 'cloud', 'devops', 'data', 'ml',
+                         'testing')
+
+# A token is a run of letters and digits, keeping '+' and '#' (C++, C#) and inner or leading dots (Node.js, .NET)
+_token_pattern = re.compile(r'\.?[A-Za-z0-9](?:[A-Za-z0-9+#]|\.(?=[A-Za-z0-9]))*')
+# Trie key holding the terms that end at a node; never a token
+_END = ''
+
+
+class SkillMatch(NamedTuple):
+    skill: str
+    category: str
+    start: int
+    end: int
+
+
+class SkillTaxonomy:
+    def __init__(self, entries: Iterable[Dict[str, Any]]):
+        self.categories: Dict[str, str] = {}
+        self._trie: Dict[str, Any] = {}
+        for number, entry in enumerate(entries, 1):
+            name = str(entry.get('name') or '').strip()
+            if not name:
+                raise ValueError(f"Skill taxonomy entry {number} has no name")
+            self.categories[name] = entry.get('category') or 'other'
+            exact = [str(term) for term in entry.get('exact') or []]
+            terms = [name] + [str(term) for term in entry.get('synonyms') or []]
+            for term in terms:
+                if term not in exact:
+                    self._add(term, name, None)
+            for term in exact:
+                self._add(term, name, term)
+
+    @classmethod
+    def load(cls, path: str) -> 'SkillTaxonomy':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['skills'] if isinstance(data, dict) else data)
+
+    def _add(self, term: str, skill: str, exact: Optional[str]) -> None:
+        tokens = [token.lower() for token in _token_pattern.findall(term)]
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, []).append((skill, exact))
+
+    def find(self, text: str) -> List[SkillMatch]:
+        """Every skill mention in text, in order, as canonical names with character offsets."""
+        tokens = [(m.start(), m.end(), m.group().lower()) for m in _token_pattern.finditer(text or '')]
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node = self._trie
+            best = None
+            j = i
+            while j < len(tokens) and tokens[j][2] in node:
+                node = node[tokens[j][2]]
+                for skill, exact in node.get(_END, ()):
+                    if exact is None or text[tokens[i][0]:tokens[j][1]] == exact:
+                        best = (j, skill)
+                        break
+                j += 1
+            if best is None:
+                i += 1
+                continue
+            j, skill = best
+            matches.append(SkillMatch(skill, self.categories[skill], tokens[i][0], tokens[j][1]))
+            i = j + 1
+        return matches
+
+    def skills(self, text: str, categories: Optional[Iterable[str]] = None) -> List[str]:
+        """Distinct canonical skills mentioned in text, in order of first mention."""
+        wanted = set(categories) if categories is not None else None
+        found = []
+        for match in self.find(text):
+            if match.skill not in found and (wanted is None or match.category in wanted):
+                found.append(match.skill)
+        return found
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+
+def _load_taxonomy() -> SkillTaxonomy:
+    try:
+        taxonomy = SkillTaxonomy.load(SKILL_TAXONOMY_PATH)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if SKILL_TAXONOMY_PATH == DEFAULT_TAXONOMY_PATH:
+            raise
+        print(f"Could not load skill taxonomy from {SKILL_TAXONOMY_PATH} ({e}); using the bundled taxonomy")
+        taxonomy = SkillTaxonomy.load(DEFAULT_TAXONOMY_PATH)
+    print(f"Skill taxonomy loaded: {len(taxonomy)} skills")
+    return taxonomy
+
+
+skill_taxonomy = _load_taxonomy()
@@ -0,0 +1,62 @@
+"""
+Keyword-based STAR detection shared by the local fallbacks.
+
+All component keywords are compiled into one case-insensitive alternation,
+together with the sentence terminators, so a single finditer pass over the
+response both splits it into sentences and tags each sentence with the STAR
+components its keywords point to. The sentences back ResponseDocument
+(services/response_document.py), which the local fallbacks answer every live
+request from while the LLM circuit breaker is open.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, Iterator, Tuple
+
+STAR_KEYWORDS = {
+    'situation': ('situation', 'when', 'time', 'project', 'company', 'team', 'context', 'background'),
+    'task': ('task', 'responsibility', 'goal', 'objective', 'needed', 'required', 'assigned', 'role'),
+    'action': ('action', 'did', 'implemented', 'created', 'developed', 'led', 'managed', 'approached', 'decided'),
+    'result': ('result', 'outcome', 'achieved', 'improved', 'increased', 'successful', 'impact', 'saved', 'reduced')
+}
+
+
+class StarKeywordMatcher:
+    def __init__(self, keywords: Dict[str, Iterable[str]] = STAR_KEYWORDS):
+        self.components = tuple(keywords)
+        self._components_of: Dict[str, Tuple[str, ...]] = {}
+        for component, words in keywords.items():
+            for word in words:
+                word = word.lower()
+                self._components_of[word] = self._components_of.get(word, ()) + (component,)
+        # Longest first so a keyword is never cut short by one of its prefixes; a plural 's' also matches
+        alternation = '|'.join(re.escape(w) for w in sorted(self._components_of, key=len, reverse=True))
+        self._pattern = re.compile(rf"(?P<end>[.!?]+)|\b(?P<keyword>{alternation})s?\b", re.IGNORECASE)
+
+    def sentences(self, text: str) -> Iterator[Tuple[int, int, FrozenSet[str]]]:
+        """Yield (start, end, components) for every sentence of text.
+
+        start and end are character offsets into text, without surrounding
+        whitespace or the terminator; components are the STAR components the
+        sentence's keywords point to (possibly none).
+        """
+        sentence_start = 0
+        found = set()
+        for match in self._pattern.finditer(text):
+            if match.lastgroup == 'end':
+                yield from self._close(text, sentence_start, match.start(), found)
+                sentence_start = match.end()
+                found = set()
+            else:
+                found.update(self._components_of[match.group('keyword').lower()])
+        yield from self._close(text, sentence_start, len(text), found)
+
+    @staticmethod
+    def _close(text: str, start: int, end: int, found: set) -> Iterator[Tuple[int, int, FrozenSet[str]]]:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            yield start, end, frozenset(found)
+
+
+star_matcher = StarKeywordMatcher()
@@ -0,0 +1,171 @@
+"""
+Response schemas for structured LLM output and a small validator for them.
+
+The validator covers the JSON Schema subset the schemas below use (type,
+required, properties, items, minItems, minLength, enum), which is enough to
+reject malformed completions cheaply without pulling in a schema library.
+"""
+from typing import Any, Dict, List
+
+QUESTION_SCHEMA = {
+    'type': 'object',
+    'required': ['text', 'category'],
+    'properties': {
+        'text': {'type': 'string', 'minLength': 10},
+        'category': {'type': 'string'},
+        'rationale': {'type': 'string'}
+    }
+}
+
+DOCUMENT_ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'required': ['candidate_profile', 'job_requirements', 'match_analysis'],
+    'properties': {
+        'candidate_profile': {
+            'type': 'object',
+            'properties': {
+                'key_skills': {'type': 'array', 'items': {'type': 'string'}},
+                'companies_worked': {'type': 'array', 'items': {'type': 'string'}},
+                'notable_achievements': {'type': 'array', 'items': {'type': 'string'}},
+                'projects': {'type': 'array', 'items': {'type': 'string'}}
+            }
+        },
+        'job_requirements': {
+            'type': 'object',
+            'properties': {
+                'required_skills': {'type': 'array', 'items': {'type': 'string'}},
+                'key_responsibilities': {'type': 'array', 'items': {'type': 'string'}}
+            }
+        },
+        'match_analysis': {
+            'type': 'object',
+            'properties': {
+                'matching_skills': {'type': 'array', 'items': {'type': 'string'}},
+                'missing_skills': {'type': 'array', 'items': {'type': 'string'}},
+                'areas_to_probe': {'type': 'array', 'items': {'type': 'string'}}
+            }
+        }
+    }
+}
+
+COMBINED_ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'required': ['analysis', 'questions'],
+    'properties': {
+        'analysis': DOCUMENT_ANALYSIS_SCHEMA,
+        'questions': {'type': 'array', 'minItems': 1, 'items': QUESTION_SCHEMA}
+    }
+}
+
+# Top-level shape of a combined completion; its parts are validated separately so that
+# invalid questions are dropped rather than failing the analysis with them
+COMBINED_ANALYSIS_SHAPE_SCHEMA = {
+    'type': 'object',
+    'required': ['analysis', 'questions'],
+    'properties': {
+        'analysis': {'type': 'object'},
+        'questions': {'type': 'array'}
+    }
+}
+
+QUESTION_LIST_SCHEMA = {'type': 'array', 'minItems': 1, 'items': QUESTION_SCHEMA}
+
+STAR_COMPONENT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'present': {'type': 'boolean'},
+        'content': {'type': 'string'},
+        'quality': {'type': 'string'}
+    }
+}
+
+STAR_ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'required': ['star_breakdown'],
+    'properties': {
+        'star_breakdown': {
+            'type': 'object',
+            'properties': {component: STAR_COMPONENT_SCHEMA for component in ('situation', 'task', 'action', 'result')}
+        },
+        'missing_components': {'type': 'array', 'items': {'type': 'string'}},
+        'follow_up_questions': {'type': 'array', 'items': {'type': 'string'}},
+        'strengths': {'type': 'array', 'items': {'type': 'string'}},
+        'improvements': {'type': 'array', 'items': {'type': 'string'}},
+        'overall_quality': {'type': 'string'}
+    }
+}
+
+FINAL_EVALUATION_SCHEMA = {
+    'type': 'object',
+    'required': ['overall_score', 'recommendation'],
+    'properties': {
+        'overall_score': {'type': 'number'},
+        'category_scores': {'type': 'object'},
+        'strengths': {'type': 'array', 'items': {'type': 'string'}},
+        'areas_for_development': {'type': 'array', 'items': {'type': 'string'}},
+        'recommendation': {'type': 'string'},
+        'key_insights': {'type': 'array', 'items': {'type': 'string'}},
+        'next_steps': {'type': 'array', 'items': {'type': 'string'}},
+        'summary': {'type': 'string'}
+    }
+}
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'boolean': bool,
+    'integer': int,
+    'number': (int, float),
+    'null': type(None)
+}
+
+
+def validate_schema(value: Any, schema: Dict[str, Any], path: str = '$') -> List[str]:
+    """Return a list of validation errors (empty when value matches schema)."""
+    errors = []
+    expected = schema.get('type')
+    if expected:
+        python_type = _TYPES[expected]
+        # bool is a subclass of int, but true/false are not numbers in JSON
+        if not isinstance(value, python_type) or (expected in ('integer', 'number') and isinstance(value, bool)):
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+
+    if 'enum' in schema and value not in schema['enum']:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+
+    if isinstance(value, str) and len(value) < schema.get('minLength', 0):
+        errors.append(f"{path}: shorter than {schema['minLength']} characters")
+
+    if isinstance(value, dict):
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f"{path}: missing required property '{key}'")
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value and value[key] is not None:
+                errors.extend(validate_schema(value[key], subschema, f"{path}.{key}"))
+
+    if isinstance(value, list):
+        if len(value) < schema.get('minItems', 0):
+            errors.append(f"{path}: fewer than {schema['minItems']} items")
+        if 'items' in schema:
+            for index, item in enumerate(value):
+                errors.extend(validate_schema(item, schema['items'], f"{path}[{index}]"))
+
+    return errors
+
+
+def supports_json_schema(model: str) -> bool:
+    """Whether the model accepts response_format={'type': 'json_schema'} (gpt-4o family and later)."""
+    return model.startswith(('gpt-4o', 'gpt-4.1', 'gpt-5', 'o1', 'o3', 'o4'))
+
+
+def response_format_for(model: str, name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Strongest structured-output mode the model supports: a JSON schema or plain JSON mode.
+
+    The schema is sent non-strict since strict mode requires every property to be
+    listed as required; the response is validated locally either way.
+    """
+    if supports_json_schema(model):
+        return {'type': 'json_schema', 'json_schema': {'name': name, 'schema': schema, 'strict': False}}
+    return {'type': 'json_object'}
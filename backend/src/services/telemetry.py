@@ -0,0 +1,362 @@
+"""
+Telemetry for AI work: LLM call latency, time to first token, token counts,
+cost, cache hits and fallbacks, aggregated per route and operation.
+
+The route comes from the Flask endpoint that started the work (or the job type
+for background jobs) and is carried in a context variable, so calls made on the
+AI executor are attributed to the request that submitted them. The operation is
+the AI service method, set by the @instrumented decorator. Everything is held
+in process and exposed in Prometheus text format at /api/monitoring/metrics;
+each gunicorn worker reports its own series.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+# USD per million (prompt, completion) tokens, matched by model id prefix; override with LLM_PRICES_JSON
+DEFAULT_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-4': (30.00, 60.00),
+    'gpt-3.5-turbo': (0.50, 1.50),
+    'amazon.nova-micro': (0.035, 0.14),
+    'amazon.nova-lite': (0.06, 0.24),
+    'amazon.nova-pro': (0.80, 3.20),
+}
+
+# Share of the prompt price charged for prompt tokens served from the provider's prefix cache
+CACHED_PROMPT_PRICE_RATIO = float(os.environ.get('LLM_CACHED_PROMPT_PRICE_RATIO', 0.5))
+
+_INF_LABEL = 'le="+Inf"'
+
+_current_route = contextvars.ContextVar('ai_route', default=None)
+_current_operation = contextvars.ContextVar('ai_operation', default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_number(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Sequence[str], amount: float = 1.0) -> None:
+        key = tuple(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> str:
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}")
+        return '\n'.join(lines)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels: Sequence[str], value: float) -> None:
+        key = tuple(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                le = 'le="%s"' % _format_number(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, _INF_LABEL)} {values[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_number(values[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {values[-1]}")
+        return '\n'.join(lines)
+
+
+class _OperationRecord:
+    """What happened during one instrumented operation."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.llm_successes = 0
+        self.cache_hit = False
+        self.fallback_reason = None
+
+
+def fallback_reason(error: Optional[BaseException]) -> str:
+    """Short label for why an operation fell back to local output."""
+    if error is None:
+        return 'parse_error'
+    from src.services.circuit_breaker import CircuitOpenError
+    from src.services.deadline import DeadlineExceeded
+    if isinstance(error, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(error, DeadlineExceeded):
+        return 'deadline'
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return 'timeout'
+    if isinstance(error, ValueError):
+        return 'parse_error'  # llm_output.ParseError and json.JSONDecodeError
+    return 'error'
+
+
+class Telemetry:
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float]]] = None, enabled: bool = True):
+        self.enabled = enabled
+        # Longest prefix first so 'gpt-4o-mini' is not priced as 'gpt-4o'
+        self.prices = sorted((prices or DEFAULT_PRICES).items(), key=lambda item: -len(item[0]))
+        call_labels = ('route', 'operation', 'provider', 'model')
+        op_labels = ('route', 'operation')
+        self.llm_duration = Histogram('llm_request_duration_seconds',
+                                      'Wall time of LLM calls, including streamed reads', call_labels, LATENCY_BUCKETS)
+        self.llm_ttft = Histogram('llm_time_to_first_token_seconds',
+                                  'Time until the first text arrived (the whole response for non-streamed calls)',
+                                  call_labels, LATENCY_BUCKETS)
+        self.llm_tokens = Histogram('llm_tokens', 'Tokens per LLM call', call_labels + ('kind',), TOKEN_BUCKETS)
+        self.llm_requests = Counter('llm_requests_total', 'LLM calls by outcome', call_labels + ('status',))
+        self.llm_cost = Counter('llm_cost_usd_total', 'Estimated LLM spend in USD', call_labels)
+        self.prompt_cache = Counter('llm_prompt_cache_requests_total',
+                                    'LLM calls by whether part of the prompt came from the provider prefix cache',
+                                    call_labels + ('result',))
+        self.prompt_cache_duration = Histogram('llm_request_duration_by_prompt_cache_seconds',
+                                               'Wall time of LLM calls split by provider prefix cache hit or miss',
+                                               call_labels + ('prompt_cache',), LATENCY_BUCKETS)
+        self.operation_duration = Histogram('ai_operation_duration_seconds',
+                                            'Wall time of AI service operations by how they were answered',
+                                            op_labels + ('outcome',), LATENCY_BUCKETS)
+        self.cache_lookups = Counter('ai_cache_lookups_total', 'LLM result cache lookups', op_labels + ('result',))
+        self.fallbacks = Counter('ai_fallbacks_total', 'Operations answered by a local fallback',
+                                 op_labels + ('reason',))
+        self.output_parses = Counter('llm_output_parses_total', 'Parses of LLM JSON output by result',
+                                     op_labels + ('output', 'result'))
+        self._metrics = [self.llm_duration, self.llm_ttft, self.llm_tokens, self.llm_requests, self.llm_cost,
+                         self.prompt_cache, self.prompt_cache_duration, self.operation_duration, self.cache_lookups, self.fallbacks, self.output_parses]
+
+    # Context
+
+    @contextmanager
+    def route_scope(self, route: str) -> Iterator[None]:
+        token = _current_route.set(route)
+        try:
+            yield
+        finally:
+            _current_route.reset(token)
+
+    def init_app(self, app) -> None:
+        """Attribute AI work done while handling a request to its Flask endpoint."""
+        from flask import g, request
+
+        @app.before_request
+        def _set_route():
+            g._telemetry_route_token = _current_route.set(request.endpoint or 'unknown')
+
+        @app.teardown_request
+        def _reset_route(error=None):
+            token = g.pop('_telemetry_route_token', None)
+            if token is not None:
+                try:
+                    _current_route.reset(token)
+                except ValueError:
+                    pass  # torn down in a different context than it was set in
+
+    def _labels(self) -> Tuple[str, str]:
+        record = _current_operation.get()
+        return (_current_route.get() or 'none', record.name if record else 'unknown')
+
+    def instrumented(self, operation: str) -> Callable:
+        """Decorator timing an AI service method and classifying how it was answered.
+
+        The outcome is 'cache' when the result came from the LLM cache, 'fallback'
+        when note_fallback() was called, 'llm' when a model call produced it and
+        'local' when no model call was needed.
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                record = _OperationRecord(operation)
+                token = _current_operation.set(record)
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    _current_operation.reset(token)
+                    self._finish_operation(record, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def instrumented_stream(self, operation: str) -> Callable:
+        """Like instrumented, for generator methods; timing ends when the generator is exhausted or closed."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    yield from fn(*args, **kwargs)
+                    return
+                record = _OperationRecord(operation)
+                started = time.perf_counter()
+                generator = fn(*args, **kwargs)
+                try:
+                    while True:
+                        # Set the operation only around each step; a generator may resume in another context
+                        token = _current_operation.set(record)
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            return
+                        finally:
+                            _current_operation.reset(token)
+                        yield item
+                finally:
+                    generator.close()
+                    self._finish_operation(record, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def _finish_operation(self, record: _OperationRecord, elapsed: float) -> None:
+        route = _current_route.get() or 'none'
+        if record.cache_hit:
+            outcome = 'cache'
+        elif record.fallback_reason is not None:
+            outcome = 'fallback'
+        elif record.llm_successes:
+            outcome = 'llm'
+        else:
+            outcome = 'local'
+        self.operation_duration.observe((route, record.name, outcome), elapsed)
+
+    # Recording
+
+    def note_cache(self, hit: bool) -> None:
+        """Record an LLM cache lookup for the current operation."""
+        if not self.enabled:
+            return
+        record = _current_operation.get()
+        if record is not None and hit:
+            record.cache_hit = True
+        self.cache_lookups.inc(self._labels() + ('hit' if hit else 'miss',))
+
+    def note_fallback(self, error: Optional[BaseException] = None, reason: Optional[str] = None) -> None:
+        """Record that the current operation is answering with a local fallback.
+
+        The reason is taken from error, or is 'parse_error' (the model's output was unusable)
+        when neither is given; pass reason='unavailable' when no model call was attempted.
+        """
+        if not self.enabled:
+            return
+        reason = reason or fallback_reason(error)
+        record = _current_operation.get()
+        if record is not None:
+            if record.fallback_reason is not None:
+                return
+            record.fallback_reason = reason
+        self.fallbacks.inc(self._labels() + (reason,))
+
+    def note_parse(self, output: str, result: str) -> None:
+        """Record a parse of LLM output ('ok', 'salvaged', 'no_json', 'invalid_json' or 'schema')."""
+        if self.enabled:
+            self.output_parses.inc(self._labels() + (output, result))
+
+    def record_llm_call(self, provider: str, model: str, started: float, first_token_at: Optional[float],
+                        usage: Optional[Dict[str, int]], error: Optional[BaseException] = None) -> None:
+        """Record one LLM call. started/first_token_at are time.perf_counter() values."""
+        if not self.enabled:
+            return
+        labels = self._labels() + (provider, model)
+        now = time.perf_counter()
+        if error is not None:
+            status = fallback_reason(error)
+            self.llm_requests.inc(labels + (status,))
+            if status != 'circuit_open':  # an open breaker rejects without calling the provider
+                self.llm_duration.observe(labels, now - started)
+            return
+
+        record = _current_operation.get()
+        if record is not None:
+            record.llm_successes += 1
+        self.llm_requests.inc(labels + ('ok',))
+        self.llm_duration.observe(labels, now - started)
+        self.llm_ttft.observe(labels, (first_token_at or now) - started)
+        usage = usage or {}
+        for kind in ('prompt_tokens', 'completion_tokens', 'cached_tokens'):
+            if kind in usage:
+                self.llm_tokens.observe(labels + (kind.replace('_tokens', ''),), usage[kind])
+        if 'cached_tokens' in usage:
+            prompt_cache = 'hit' if usage['cached_tokens'] else 'miss'
+            self.prompt_cache.inc(labels + (prompt_cache,))
+            self.prompt_cache_duration.observe(labels + (prompt_cache,), now - started)
+        cost = self.cost(model, usage)
+        if cost:
+            self.llm_cost.inc(labels, cost)
+
+    def cost(self, model: str, usage: Dict[str, int]) -> float:
+        for prefix, (prompt_price, completion_price) in self.prices:
+            if model.startswith(prefix):
+                # prompt_tokens includes the cached ones, which are billed at a discount
+                cached = min(usage.get('cached_tokens', 0), usage.get('prompt_tokens', 0))
+                return ((usage.get('prompt_tokens', 0) - cached * (1 - CACHED_PROMPT_PRICE_RATIO)) * prompt_price
+                        + usage.get('completion_tokens', 0) * completion_price) / 1_000_000
+        return 0.0
+
+    def render_prometheus(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+def _load_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(DEFAULT_PRICES)
+    override = os.environ.get('LLM_PRICES_JSON')
+    if override:
+        try:
+            prices.update({model: tuple(price) for model, price in json.loads(override).items()})
+        except Exception as e:
+            print(f"Ignoring invalid LLM_PRICES_JSON: {e}")
+    return prices
+
+
+telemetry = Telemetry(prices=_load_prices(), enabled=os.environ.get('AI_TELEMETRY_ENABLED', 'true').lower() != 'false')
+instrumented = telemetry.instrumented
+instrumented_stream = telemetry.instrumented_stream
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from src.models.interview import db, Interview
+
+
+@pytest.fixture
+def app():
+    """A bare app on an in-memory SQLite database, with an app context pushed."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def interview(app):
+    interview = Interview(interviewer_name='Ada', interviewer_email='ada@example.com',
+                          candidate_name='Grace', position_title='Backend Engineer', status='active')
+    db.session.add(interview)
+    db.session.commit()
+    return interview
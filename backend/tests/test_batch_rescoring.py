@@ -0,0 +1,154 @@
+import json
+
+import pytest
+
+from src.models.interview import db, InterviewRollup, Response
+from src.services.batch_rescoring import BatchRescorer, Checkpoint
+from src.services.context_pack import save_context_pack
+from src.services.interview_rollup import record_response
+
+STRONG = {'star_breakdown': {c: {'present': True, 'content': f"{c} text", 'quality': 'strong'}
+                             for c in ('situation', 'task', 'action', 'result')}}
+
+
+class FakeBatchBackend:
+    """Batch API stand-in: batches finish when the test says so."""
+
+    def __init__(self):
+        self.batches = {}
+        self.files = {}
+
+    def submit(self, requests, metadata):
+        batch_id = f"batch-{len(self.batches) + 1}"
+        self.batches[batch_id] = {'requests': requests, 'status': 'in_progress'}
+        return {'batch_id': batch_id, 'input_file_id': f"{batch_id}-input"}
+
+    def finish(self, batch_id, status='completed', contents=None, errors=0):
+        """Finish a batch; contents maps custom_id to completion text (default: a strong STAR analysis)."""
+        batch = self.batches[batch_id]
+        if contents is None:
+            contents = {r['custom_id']: json.dumps(STRONG) for r in batch['requests']}
+        batch['status'] = status
+        self.files[f"{batch_id}-output"] = [
+            {'custom_id': custom_id, 'response': {'status_code': 200, 'body': {
+                'model': 'gpt-4-turbo-preview', 'usage': {'prompt_tokens': 100, 'completion_tokens': 50},
+                'choices': [{'message': {'content': content}}]}}}
+            for custom_id, content in contents.items()]
+        self.files[f"{batch_id}-errors"] = [{'custom_id': f"error-{i}"} for i in range(errors)]
+
+    def poll(self, batch_id):
+        status = self.batches[batch_id]['status']
+        done = status != 'in_progress'
+        return {'status': status, 'output_file_id': f"{batch_id}-output" if done else None,
+                'error_file_id': f"{batch_id}-errors" if done else None, 'request_counts': {}}
+
+    def read_results(self, file_id):
+        return self.files.get(file_id, []) if file_id else []
+
+    def submitted_ids(self):
+        return [r['custom_id'] for batch in self.batches.values() for r in batch['requests']]
+
+
+@pytest.fixture
+def responses(interview):
+    saved = []
+    for i in range(3):
+        response = Response(interview_id=interview.id, question_text=f"Question {i}",
+                            transcribed_text=f"Answer {i} about the billing migration.",
+                            star_analysis=json.dumps({}), evaluation_score=0.6)
+        db.session.add(response)
+        record_response(interview.id, response, {'strengths': ['Clear structure']})
+        db.session.commit()
+        saved.append(response)
+    return saved
+
+
+def _rescorer(backend, path, **kwargs):
+    return BatchRescorer(backend, Checkpoint(str(path)), batch_size=2, max_in_flight=1, poll_seconds=0, **kwargs)
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(responses, tmp_path):
+    backend = FakeBatchBackend()
+    checkpoint = tmp_path / 'rescore.json'
+
+    _rescorer(backend, checkpoint).run(wait=False)
+    assert list(backend.batches) == ['batch-1']
+
+    # Restarted while the batch is still running: it is polled, not resubmitted
+    _rescorer(backend, checkpoint).run(wait=False)
+    assert list(backend.batches) == ['batch-1']
+
+    backend.finish('batch-1')
+    _rescorer(backend, checkpoint).run(wait=False)
+    backend.finish('batch-2')
+    totals = _rescorer(backend, checkpoint).run(wait=False)
+
+    assert sorted(backend.submitted_ids()) == sorted(f"response-{r.id}" for r in responses)
+    assert totals['rescored'] == 3
+    assert totals['cost_usd'] > 0
+    assert all(b['status'] == 'written' for b in json.loads(checkpoint.read_text())['batches'])
+
+
+def test_write_back_keeps_scores_and_tallies(responses, tmp_path, interview):
+    backend = FakeBatchBackend()
+    rescorer = _rescorer(backend, tmp_path / 'rescore.json', limit=2)
+    rescorer.run(wait=False)
+    backend.finish('batch-1')
+    rescorer.run(wait=False)
+
+    rescored = db.session.get(Response, responses[0].id)
+    assert json.loads(rescored.star_analysis)['result']['quality'] == 'strong'
+    assert rescored.evaluation_score == 0.6
+
+    rollup = db.session.get(InterviewRollup, interview.id).to_dict()
+    assert rollup['response_count'] == 3
+    assert rollup['star_counts'] == {c: 2 for c in ('situation', 'task', 'action', 'result')}
+    assert rollup['strengths'] == {'Clear structure': 3}
+    assert rollup['average_score'] == pytest.approx(0.6)
+
+
+def test_requests_carry_the_context_pack(responses, tmp_path, interview):
+    save_context_pack(interview.id, {'job_requirements': {'job_title': 'Billing Platform Lead'}}, 'analysis')
+    db.session.commit()
+    backend = FakeBatchBackend()
+    _rescorer(backend, tmp_path / 'rescore.json').run(wait=False)
+
+    prompt = json.dumps(backend.batches['batch-1']['requests'][0]['body']['messages'])
+    assert 'Billing Platform Lead' in prompt
+
+
+def test_expired_batch_writes_the_finished_part(responses, tmp_path):
+    backend = FakeBatchBackend()
+    checkpoint = tmp_path / 'rescore.json'
+    rescorer = _rescorer(backend, checkpoint, limit=2)
+    rescorer.run(wait=False)
+    backend.finish('batch-1', status='expired',
+                   contents={f"response-{responses[0].id}": json.dumps(STRONG)}, errors=1)
+    totals = rescorer.run(wait=False)
+
+    assert totals['rescored'] == 1 and totals['failed'] == 1
+    assert json.loads(db.session.get(Response, responses[0].id).star_analysis)
+    assert json.loads(db.session.get(Response, responses[1].id).star_analysis) == {}
+    assert json.loads(checkpoint.read_text())['batches'][0]['status'] == 'expired'
+    # Nothing is resubmitted for the expired batch
+    assert len(backend.batches) == 1
+
+
+def test_unparseable_output_leaves_the_row_alone(responses, tmp_path):
+    backend = FakeBatchBackend()
+    rescorer = _rescorer(backend, tmp_path / 'rescore.json', limit=2)
+    rescorer.run(wait=False)
+    backend.finish('batch-1', contents={f"response-{responses[0].id}": 'I cannot rate this answer.',
+                                        f"response-{responses[1].id}": json.dumps(STRONG)})
+    totals = rescorer.run(wait=False)
+
+    assert totals['unparsed'] == 1 and totals['rescored'] == 1
+    assert json.loads(db.session.get(Response, responses[0].id).star_analysis) == {}
+
+
+def test_checkpoint_of_another_run_is_refused(responses, tmp_path):
+    checkpoint = tmp_path / 'rescore.json'
+    _rescorer(FakeBatchBackend(), checkpoint).run(wait=False)
+    with pytest.raises(ValueError):
+        _rescorer(FakeBatchBackend(), checkpoint, interview_id=99).run(wait=False)
+
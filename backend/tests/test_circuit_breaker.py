@@ -0,0 +1,52 @@
+import pytest
+
+from src.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from src.services.deadline import DeadlineExceeded
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _fail(breaker, error):
+    with pytest.raises(type(error)):
+        with breaker.guard():
+            raise error
+
+
+def test_opens_after_consecutive_provider_failures():
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+    _fail(breaker, ProviderError(503))
+    assert breaker.state == CLOSED
+    _fail(breaker, TimeoutError('slow'))
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_bad_requests_and_deadlines_do_not_count():
+    breaker = CircuitBreaker('test', failure_threshold=1)
+    _fail(breaker, ProviderError(400))
+    _fail(breaker, DeadlineExceeded('budget spent'))
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    _fail(breaker, ProviderError(500))
+    assert breaker.available()
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure(ProviderError(500))
+    assert breaker.state == OPEN
+
+    with breaker.guard():
+        pass
+    assert breaker.state == CLOSED
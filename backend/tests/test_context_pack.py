@@ -0,0 +1,142 @@
+import base64
+import io
+
+import pytest
+
+from src.models.interview import db, Document, InterviewContextPack
+from src.services import context_pack
+from src.services.context_pack import (
+    CONTEXT_PACK_MAX_TOKENS, get_context_text, pack_from_analysis, render_context_pack, save_context_pack
+)
+from src.services.prompt_budget import count_tokens
+
+RESUME = 'Senior engineer with 6 years of experience in Python, Flask, PostgreSQL and AWS. Led a team of 4.'
+JOB = 'Backend Engineer at Acme. Requirements: Python, Kubernetes, PostgreSQL, Kafka.'
+
+ANALYSIS = {
+    'candidate_profile': {'current_role': 'Senior engineer', 'experience_years': '6',
+                          'key_skills': ['Python', 'Flask'], 'companies_worked': ['Initech']},
+    'job_requirements': {'job_title': 'Backend Engineer', 'company_name': 'Acme',
+                         'required_skills': ['Python', 'Kubernetes']},
+    'match_analysis': {'areas_to_probe': ['On-call experience'], 'missing_skills': ['Kubernetes']},
+}
+
+
+@pytest.fixture
+def client(app, monkeypatch, tmp_path):
+    from src.routes import interview as interview_routes
+    from src.services.document_service_base64 import DocumentServiceBase64
+
+    # Keep uploads out of the source tree and URL fetches off the network
+    def save_uploaded_file(file, interview_id, document_type):
+        path = tmp_path / f"{document_type}_{file.filename}"
+        file.save(str(path))
+        return path.name, str(path)
+
+    def save_base64_file(base64_data, filename, interview_id, document_type):
+        path = tmp_path / f"{document_type}_{filename}"
+        path.write_bytes(base64.b64decode(base64_data))
+        return path.name, str(path), None
+
+    monkeypatch.setattr(interview_routes.document_service, 'save_uploaded_file', save_uploaded_file)
+    monkeypatch.setattr(interview_routes.document_service_base64, 'save_base64_file', save_base64_file)
+    monkeypatch.setattr(DocumentServiceBase64, 'process_url_content', lambda self, url: (JOB, None))
+    app.register_blueprint(interview_routes.interview_bp, url_prefix='/api')
+    return app.test_client()
+
+
+def _store_pack(interview):
+    save_context_pack(interview.id, pack_from_analysis(ANALYSIS, interview.position_title), 'analysis')
+    db.session.commit()
+
+
+def _pack_row(interview):
+    db.session.expire_all()
+    return db.session.get(InterviewContextPack, interview.id)
+
+
+def test_render_includes_the_role_skills_and_probes():
+    text = render_context_pack(pack_from_analysis(ANALYSIS))
+
+    assert text.splitlines()[0] == 'Role: Backend Engineer at Acme'
+    assert 'Required skills: Python, Kubernetes' in text
+    assert 'Probe: On-call experience; Gap: Kubernetes' in text
+
+
+def test_render_stays_within_the_token_budget():
+    long_items = [f"Skill number {i} with a fairly long description of what it covers" for i in range(40)]
+    analysis = {
+        'candidate_profile': {'key_skills': long_items, 'notable_achievements': long_items, 'projects': long_items},
+        'job_requirements': {'job_title': 'Engineer', 'required_skills': long_items,
+                             'key_responsibilities': long_items},
+        'match_analysis': {'areas_to_probe': long_items, 'missing_skills': long_items},
+    }
+
+    assert count_tokens(render_context_pack(pack_from_analysis(analysis))) <= CONTEXT_PACK_MAX_TOKENS
+
+
+def test_saved_pack_records_its_token_count(interview):
+    _store_pack(interview)
+
+    row = _pack_row(interview)
+    assert row.source == 'analysis'
+    assert row.token_count == count_tokens(row.text)
+
+
+def test_context_text_falls_back_to_a_local_build(interview):
+    db.session.add_all([
+        Document(interview_id=interview.id, document_type='resume', filename='resume.txt',
+                 file_path='resume.txt', extracted_text=RESUME),
+        Document(interview_id=interview.id, document_type='job_listing', filename='job.txt',
+                 file_path='job.txt', extracted_text=JOB),
+    ])
+    db.session.commit()
+
+    text = get_context_text(interview)
+
+    assert text.startswith('Role: ')
+    assert _pack_row(interview).source == 'local'
+    assert get_context_text(interview) == text
+
+
+def test_context_text_is_empty_when_no_pack_can_be_built(interview, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('extractor unavailable')
+    monkeypatch.setattr(context_pack, 'pack_from_documents', fail)
+
+    assert get_context_text(interview) == ''
+
+
+def test_document_upload_drops_the_pack(client, interview):
+    _store_pack(interview)
+
+    response = client.post(f'/api/interviews/{interview.id}/documents', data={
+        'document_type': 'resume',
+        'file': (io.BytesIO(RESUME.encode('utf-8')), 'resume.txt'),
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 201
+    assert _pack_row(interview) is None
+
+
+def test_base64_upload_drops_the_pack(client, interview):
+    _store_pack(interview)
+
+    response = client.post(f'/api/interviews/{interview.id}/documents-base64', json={
+        'document_type': 'resume',
+        'filename': 'resume.txt',
+        'file_data': base64.b64encode(RESUME.encode('utf-8')).decode('ascii'),
+    })
+
+    assert response.status_code == 201
+    assert _pack_row(interview) is None
+
+
+@pytest.mark.parametrize('route', ['job-url', 'job-url-enhanced'])
+def test_job_url_drops_the_pack(client, interview, route):
+    _store_pack(interview)
+
+    response = client.post(f'/api/interviews/{interview.id}/{route}', json={'url': 'https://example.com/jobs/1'})
+
+    assert response.status_code == 201
+    assert _pack_row(interview) is None
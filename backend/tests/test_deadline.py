@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from src.services import ai_executor
+from src.services.deadline import (
+    DeadlineExceeded, call_timeout, current_deadline, deadline_scope, remaining_time, stage
+)
+
+
+def test_without_a_deadline_calls_use_the_default_timeout():
+    assert current_deadline() is None
+    assert remaining_time(60) == 60
+    assert call_timeout(60) == 60
+
+    with stage('combined_analysis', fraction=0.5) as child:
+        assert child is None
+
+
+def test_call_timeout_is_capped_by_the_time_left():
+    with deadline_scope(10):
+        assert 9 < call_timeout() <= 10
+        assert call_timeout(5) == 5
+
+
+def test_nested_scope_never_outlives_its_parent():
+    with deadline_scope(2, 'outer') as outer:
+        with deadline_scope(30, 'inner') as inner:
+            assert inner.expires_at == outer.expires_at
+            assert inner.name == 'inner'
+        with deadline_scope(1) as shorter:
+            assert shorter.expires_at < outer.expires_at
+
+
+def test_stage_gets_its_fraction_after_the_reserve():
+    with deadline_scope(10):
+        with stage('analyze_documents', fraction=0.5, reserve=2) as child:
+            assert 3.5 < child.remaining() <= 4
+            assert current_deadline() is child
+        assert 9 < remaining_time() <= 10
+
+
+def test_spent_budget_refuses_new_calls():
+    with deadline_scope(0.2, 'analyze'):
+        with pytest.raises(DeadlineExceeded):
+            call_timeout(60)
+
+
+def test_executor_tasks_see_the_callers_deadline():
+    with deadline_scope(10, 'save_response') as deadline:
+        results, errors = ai_executor.run_concurrently({
+            'star': lambda: current_deadline(),
+            'evaluation': lambda: remaining_time(),
+        })
+
+    assert errors == {}
+    assert results['star'] is deadline
+    assert 0 < results['evaluation'] <= 10
+
+
+def test_executor_wait_ends_with_the_deadline():
+    with deadline_scope(0.2):
+        started = time.monotonic()
+        results, errors = ai_executor.run_concurrently({'slow': lambda: time.sleep(1)})
+
+    assert time.monotonic() - started < 0.9
+    assert results == {}
+    assert isinstance(errors['slow'], TimeoutError)
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from src.models.interview import db, InterviewRollup, Response
+from src.services.interview_rollup import (
+    get_rollup, local_final_evaluation, record_response, rollup_payload
+)
+
+STAR = {'situation': {'present': True}, 'task': {'present': True},
+        'action': {'present': False}, 'result': {'present': False}}
+
+
+def _response(interview, score=0.7, confidence=0.6, question='Tell me about a project'):
+    return Response(interview_id=interview.id, question_text=question, transcribed_text='We shipped it.',
+                    summary_points=json.dumps(['Shipped the project']), star_analysis=json.dumps(STAR),
+                    evaluation_score=score, confidence_score=confidence)
+
+
+def _save(interview, response, analysis=None):
+    # The same order as save_response: add, record, commit
+    db.session.add(response)
+    record_response(interview.id, response, analysis or {})
+    db.session.commit()
+
+
+def test_first_response_is_counted_once(interview):
+    _save(interview, _response(interview))
+
+    row = db.session.get(InterviewRollup, interview.id)
+    assert row.response_count == 1
+    assert len(json.loads(row.summaries)) == 1
+    assert row.score_count == 1
+
+
+def test_rebuild_counts_earlier_responses_and_the_new_one_once(interview):
+    # Responses saved before the interview had a rollup
+    db.session.add_all([_response(interview, 0.5), _response(interview, 0.9)])
+    db.session.commit()
+
+    _save(interview, _response(interview, 0.7))
+
+    row = db.session.get(InterviewRollup, interview.id)
+    assert row.response_count == 3
+    assert len(json.loads(row.summaries)) == 3
+    assert row.to_dict()['average_score'] == pytest.approx(0.7)
+
+
+def test_later_responses_accumulate(interview):
+    for score in (0.6, 0.8, 1.0):
+        _save(interview, _response(interview, score),
+              {'strengths': ['Clear structure'], 'improvements': ['Quantify results']})
+
+    payload = rollup_payload(get_rollup(interview))
+    assert payload['response_count'] == 3
+    assert payload['average_score'] == 80
+    assert payload['star_coverage'] == {'situation': 1.0, 'task': 1.0, 'action': 0.0, 'result': 0.0}
+    assert payload['top_strengths'] == ['Clear structure']
+    assert payload['responses_omitted'] == 0
+
+
+def test_get_rollup_rebuilds_missing_rollup(interview):
+    db.session.add_all([_response(interview, 0.4), _response(interview, 0.6)])
+    db.session.commit()
+
+    row = get_rollup(interview)
+    assert row.response_count == 2
+    assert db.session.get(InterviewRollup, interview.id) is row
+
+
+def test_local_final_evaluation_from_payload(interview):
+    _save(interview, _response(interview, 0.85))
+
+    evaluation = local_final_evaluation(rollup_payload(get_rollup(interview)))
+    assert evaluation['overall_score'] == 85
+    assert evaluation['recommendation'] == 'strong_hire'
+    assert any('action, result' in area for area in evaluation['areas_for_development'])
+
+
+def test_local_final_evaluation_without_responses():
+    evaluation = local_final_evaluation({'response_count': 0})
+    assert evaluation['overall_score'] == 0
+    assert evaluation['recommendation'] == 'maybe'
@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timedelta
+
+from src.models.interview import db, AnalysisJob
+from src.services.jobs import JobRunner
+
+
+def _job(interview, job_id, status, age_seconds, started=True):
+    moment = datetime.utcnow() - timedelta(seconds=age_seconds)
+    job = AnalysisJob(id=job_id, interview_id=interview.id, job_type='document_analysis', status=status,
+                      created_at=moment, started_at=moment if started else None)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _run_to_completion(runner, interview, work):
+    job_id = runner.submit(interview.id, 'document_analysis', work).id
+    runner._get_executor().shutdown(wait=True)
+    db.session.expire_all()
+    return db.session.get(AnalysisJob, job_id)
+
+
+def test_active_job_returns_recent_running_job(interview):
+    _job(interview, 'recent', 'running', 30)
+
+    assert JobRunner(stale_seconds=600).active_job(interview.id, 'document_analysis').id == 'recent'
+
+
+def test_orphaned_jobs_are_failed_and_not_active(interview):
+    _job(interview, 'orphan-running', 'running', 3600)
+    _job(interview, 'orphan-queued', 'queued', 3600, started=False)
+
+    assert JobRunner(stale_seconds=600).active_job(interview.id, 'document_analysis') is None
+    for job_id in ('orphan-running', 'orphan-queued'):
+        job = db.session.get(AnalysisJob, job_id)
+        assert job.status == 'failed'
+        assert job.completed_at is not None
+
+
+def test_finished_jobs_are_not_active(interview):
+    _job(interview, 'done', 'completed', 30)
+
+    assert JobRunner().active_job(interview.id, 'document_analysis') is None
+
+
+def test_finished_jobs_are_left_alone(interview):
+    job = _job(interview, 'done', 'completed', 3600)
+
+    assert JobRunner(stale_seconds=600).expire_if_stale(job) is False
+    assert job.status == 'completed'
+
+
+def test_submitted_work_completes_with_its_result(interview):
+    def work(report_progress):
+        report_progress('generating_questions', 60)
+        return {'questions': 7}
+
+    job = _run_to_completion(JobRunner(max_workers=1), interview, work)
+
+    assert (job.status, job.stage, job.progress) == ('completed', 'completed', 100)
+    assert json.loads(job.result) == {'questions': 7}
+    assert job.started_at is not None and job.completed_at is not None
+
+
+def test_failed_work_records_the_error(interview):
+    def work(report_progress):
+        raise RuntimeError('provider unavailable')
+
+    job = _run_to_completion(JobRunner(max_workers=1), interview, work)
+
+    assert job.status == 'failed'
+    assert job.error == 'provider unavailable'
@@ -0,0 +1,48 @@
+import json
+
+from src.services.json_stream import IncrementalJSONScanner, path_matches
+
+DOCUMENT = {'star_breakdown': {'situation': {'present': True, 'content': 'A "legacy" system\\n'},
+                               'task': {'present': False}},
+            'follow_up_questions': ['What changed?', 'Who {else} helped?'],
+            'score': 7.5}
+WATCH = [('star_breakdown', '*'), ('follow_up_questions', '*'), ('score',)]
+
+
+def _scan(text, size):
+    scanner = IncrementalJSONScanner(WATCH)
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(scanner.feed(text[start:start + size]))
+    return scanner, events
+
+
+def test_path_matches_wildcards():
+    assert path_matches(('a', '*'), ('a', 3))
+    assert not path_matches(('a', '*'), ('a',))
+    assert not path_matches(('a', 'b'), ('a', 'c'))
+
+
+def test_watched_values_are_emitted_whatever_the_chunking():
+    text = '```json\n' + json.dumps(DOCUMENT) + '\n```'
+    expected = [(('star_breakdown', 'situation'), DOCUMENT['star_breakdown']['situation']),
+                (('star_breakdown', 'task'), {'present': False}),
+                (('follow_up_questions', 0), 'What changed?'),
+                (('follow_up_questions', 1), 'Who {else} helped?'),
+                (('score',), 7.5)]
+    for size in (1, 3, 17, len(text)):
+        scanner, events = _scan(text, size)
+        assert events == expected
+        assert scanner.done
+
+
+def test_value_is_emitted_before_the_document_closes():
+    scanner = IncrementalJSONScanner(WATCH)
+    assert scanner.feed('{"follow_up_questions": ["What changed?"') == [(('follow_up_questions', 0), 'What changed?')]
+    assert not scanner.done
+
+
+def test_preamble_is_not_started():
+    scanner = IncrementalJSONScanner(WATCH)
+    scanner.feed('Sure, here is the analysis')
+    assert not scanner.started
@@ -0,0 +1,123 @@
+from src.services.ai_service_enhanced import EnhancedAIService
+from src.services.live_analysis import LiveAnalysisStore
+
+QUESTION = 'Tell me about a hard deadline'
+OPENING = 'At my last company our team had two weeks to migrate the billing system.'
+MORE = ' I split the work into daily milestones and paired with the database team on the riskiest steps.'
+
+
+class StubStarService:
+    """Records what the store sends; every result marks the components it has seen text for."""
+
+    def __init__(self):
+        self.full_calls = []
+        self.delta_calls = []
+
+    def analyze_response_star(self, question, response_text):
+        self.full_calls.append(response_text)
+        return {'star_breakdown': {'situation': {'present': True, 'content': response_text}}}
+
+    def analyze_response_star_delta(self, question, previous_result, new_text, full_text):
+        self.delta_calls.append((new_text, full_text))
+        merged = dict(previous_result['star_breakdown'])
+        merged['action'] = {'present': True, 'content': new_text}
+        return {'star_breakdown': merged}
+
+
+def _store(min_delta_words=8):
+    service = StubStarService()
+    return LiveAnalysisStore(service, min_delta_words=min_delta_words), service
+
+
+def test_first_update_analyzes_the_whole_transcript():
+    store, service = _store()
+    result, info = store.analyze(1, 10, QUESTION, OPENING)
+
+    assert service.full_calls == [OPENING]
+    assert info['mode'] == 'full'
+    assert result['star_breakdown']['situation']['present'] is True
+
+
+def test_extension_sends_only_the_new_text():
+    store, service = _store()
+    store.analyze(1, 10, QUESTION, OPENING)
+    result, info = store.analyze(1, 10, QUESTION, OPENING + MORE)
+
+    assert service.delta_calls == [(MORE.strip(), OPENING + MORE)]
+    assert info['mode'] == 'delta'
+    assert info['analyzed_words'] == len(MORE.split())
+    assert set(result['star_breakdown']) == {'situation', 'action'}
+
+
+def test_small_delta_is_answered_from_the_stored_result():
+    store, service = _store()
+    first, _ = store.analyze(1, 10, QUESTION, OPENING)
+    result, info = store.analyze(1, 10, QUESTION, OPENING + ' It was tight.')
+
+    assert result is first
+    assert info['mode'] == 'skipped'
+    assert info['skipped_updates'] == 1
+    assert service.delta_calls == []
+
+    # The skipped words are still pending and go out with the next large enough delta
+    store.analyze(1, 10, QUESTION, OPENING + ' It was tight.' + MORE)
+    assert service.delta_calls[0][0] == ('It was tight.' + MORE).strip()
+
+
+def test_edited_transcript_is_reanalyzed_in_full():
+    store, service = _store()
+    store.analyze(1, 10, QUESTION, OPENING)
+    _, info = store.analyze(1, 10, QUESTION, 'Actually, ' + OPENING)
+
+    assert info['mode'] == 'full'
+    assert len(service.full_calls) == 2
+
+
+def test_sessions_are_per_question_and_reset_forgets_them():
+    store, service = _store()
+    store.analyze(1, 10, QUESTION, OPENING)
+    store.analyze(1, 11, 'Another question', OPENING)
+    assert len(service.full_calls) == 2
+    assert store.stats()['active_sessions'] == 2
+
+    store.reset(1, 10, QUESTION)
+    _, info = store.analyze(1, 10, QUESTION, OPENING + MORE)
+    assert info['mode'] == 'full'
+
+
+def test_merge_keeps_prior_components_and_shifts_delta_spans():
+    previous = {
+        'star_breakdown': {
+            'situation': {'present': True, 'content': 'Two weeks to migrate billing', 'quality': 'adequate',
+                          'spans': [[0, 72]]},
+            'action': {'present': False, 'content': None, 'quality': 'missing', 'spans': []},
+        },
+        'strengths': ['Clear context'],
+        'summary_points': [OPENING],
+        'summary_spans': [[0, len(OPENING)]],
+    }
+    update = {
+        'star_breakdown': {
+            'situation': {'present': False, 'content': None, 'quality': 'missing', 'spans': []},
+            'action': {'present': True, 'content': 'Split the work into milestones', 'quality': 'strong',
+                       'spans': [[0, len(MORE.strip())]]},
+        },
+        'strengths': ['Concrete actions', 'Clear context'],
+        'follow_up_questions': ['What was the result?'],
+        'overall_quality': 'adequate',
+    }
+    full_text = OPENING + MORE
+
+    merged = EnhancedAIService()._merge_star_results(previous, update, MORE.strip(), full_text,
+                                                     recompute_quality=False)
+
+    breakdown = merged['star_breakdown']
+    assert breakdown['situation']['present'] is True
+    assert breakdown['situation']['quality'] == 'adequate'
+    assert breakdown['action']['quality'] == 'strong'
+    (start, end), = breakdown['action']['spans']
+    assert full_text[start:end] == MORE.strip()
+    assert merged['missing_components'] == ['task', 'result']
+    assert merged['strengths'] == ['Concrete actions', 'Clear context']
+    assert merged['follow_up_questions'] == ['What was the result?']
+    assert merged['overall_quality'] == 'adequate'
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from src.models.interview import db, LLMCacheEntry
+from src.services.llm_cache import LLMCache
+
+
+def test_key_ignores_whitespace_and_dict_order():
+    key = LLMCache.make_key('analyze_documents', 'v1', 'gpt-4', 'Senior  engineer\n at Acme ', {'a': 1, 'b': 2})
+    assert key == LLMCache.make_key('analyze_documents', 'v1', 'gpt-4', 'Senior engineer at Acme', {'b': 2, 'a': 1})
+
+
+def test_key_changes_with_operation_version_model_and_inputs():
+    base = LLMCache.make_key('analyze_documents', 'v1', 'gpt-4', 'resume')
+    assert base != LLMCache.make_key('generate_questions', 'v1', 'gpt-4', 'resume')
+    assert base != LLMCache.make_key('analyze_documents', 'v2', 'gpt-4', 'resume')
+    assert base != LLMCache.make_key('analyze_documents', 'v1', 'gpt-3.5-turbo', 'resume')
+    assert base != LLMCache.make_key('analyze_documents', 'v1', 'gpt-4', 'resume v2')
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = LLMCache(max_entries=2, persistent=False)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_hits_are_copies():
+    cache = LLMCache(persistent=False)
+    cache.set('k', {'questions': ['one']})
+    cache.get('k')['questions'].append('two')
+    assert cache.get('k') == {'questions': ['one']}
+
+
+def test_db_tier_reads_through_to_memory(app):
+    cache = LLMCache()
+    cache.set('k', {'score': 0.8}, operation='evaluate_response', model='gpt-4')
+    cache.clear()
+
+    assert cache.get('k') == {'score': 0.8}
+    assert cache.get('k') == {'score': 0.8}
+    stats = cache.stats()
+    assert (stats['db_hits'], stats['memory_hits']) == (1, 1)
+    assert db.session.get(LLMCacheEntry, 'k').hit_count == 1
+
+
+def test_expired_db_rows_are_misses_and_deleted(app):
+    cache = LLMCache()
+    cache.set('k', 'value')
+    cache.clear()
+    row = db.session.get(LLMCacheEntry, 'k')
+    row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    assert cache.get('k') is None
+    assert cache.stats()['expired'] == 1
+    db.session.expire_all()
+    assert db.session.get(LLMCacheEntry, 'k') is None
+
+
+def test_zero_ttl_never_expires(app):
+    cache = LLMCache(ttl_seconds=0)
+    cache.set('k', 'value')
+    assert db.session.get(LLMCacheEntry, 'k').expires_at is None
+
+
+def test_prune_drops_expired_rows_then_least_recently_used(app):
+    cache = LLMCache(db_max_rows=2)
+    now = datetime.utcnow()
+    for index, key in enumerate(['old', 'mid', 'new', 'expired']):
+        cache.set(key, key)
+        row = db.session.get(LLMCacheEntry, key)
+        row.last_accessed_at = now + timedelta(minutes=index)
+    db.session.get(LLMCacheEntry, 'expired').expires_at = now - timedelta(seconds=1)
+    db.session.commit()
+
+    assert cache.prune() == 2
+    db.session.expire_all()
+    assert sorted(row.cache_key for row in LLMCacheEntry.query.all()) == ['mid', 'new']
+
+
+def test_persistent_tier_needs_an_app_context():
+    cache = LLMCache()
+    cache.set('k', 'value')
+    cache.clear()
+    assert cache.get('k') is None
+    assert cache.prune() == 0
@@ -0,0 +1,88 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.llm_clients import LLMClientRegistry
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content='{"ok": true}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class FakeOpenAI:
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.chat = type('Chat', (), {})()
+        self.chat.completions = FakeCompletions()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = LLMClientRegistry(concurrency={'openai': 1}, slot_timeout=0.05)
+    monkeypatch.setattr(registry, '_build_openai', lambda api_key: FakeOpenAI(api_key) if api_key else None)
+    return registry
+
+
+def test_services_share_one_client_per_configuration(registry):
+    registry.configure({'openai': 'sk-one'})
+    client = registry.openai_client()
+
+    assert registry.openai_client() is client
+    result = registry.complete('gpt-4', [])
+    assert (result.content, result.provider, result.model) == ('{"ok": true}', 'openai', 'gpt-4')
+    (call,) = client.chat.completions.calls
+    assert (call['model'], call['messages']) == ('gpt-4', [])
+    assert call['timeout'] > 0
+
+    registry.configure({'openai': 'sk-two'})
+    assert registry.openai_client() is not client
+    assert registry.openai_client().api_key == 'sk-two'
+
+
+def test_calls_without_a_key_are_refused(registry):
+    registry.configure({})
+
+    assert registry.openai_client() is None
+    assert registry.active_provider() is None
+    with pytest.raises(RuntimeError):
+        registry.complete('gpt-4', [])
+
+
+def test_probe_clients_reuse_the_configured_or_a_cached_client(registry):
+    registry.configure({'openai': 'sk-one'})
+
+    assert registry.probe_openai_client('sk-one') is registry.openai_client()
+    probe = registry.probe_openai_client('sk-other')
+    assert probe.api_key == 'sk-other'
+    assert registry.probe_openai_client('sk-other') is probe
+
+
+def test_concurrency_slots_are_capped(registry):
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold_slot():
+        with registry.slot('openai'):
+            held.set()
+            release.wait(1)
+
+    worker = threading.Thread(target=hold_slot)
+    worker.start()
+    held.wait(1)
+    try:
+        with pytest.raises(RuntimeError):
+            with registry.slot('openai'):
+                pass
+    finally:
+        release.set()
+        worker.join()
+
+    with registry.slot('openai'):
+        pass
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from src.services.llm_output import (
+    CombinedAnalysis, FinalEvaluation, ParseError, QuestionList, StarAnalysis, StreamingOutputParser,
+    decode_json, parse_llm_output, salvage_truncated
+)
+
+ANALYSIS = {
+    'candidate_profile': {'key_skills': ['Python'], 'companies_worked': ['TechCorp']},
+    'job_requirements': {'required_skills': ['Python', 'Kubernetes']},
+    'match_analysis': {'matching_skills': ['Python'], 'missing_skills': ['Kubernetes']}
+}
+GOOD_QUESTION = {'text': 'Tell me about the microservices migration at TechCorp.', 'category': 'technical'}
+
+
+def test_decode_skips_fences_and_prose():
+    content = 'Here you go:\n```json\n{"a": [1, 2]}\n```\nHope that helps.'
+    assert decode_json(content) == ({'a': [1, 2]}, False)
+
+
+def test_decode_skips_stray_brace_in_preamble():
+    assert decode_json('Use {braces} carefully: {"a": 1}')[0] == {'a': 1}
+
+
+def test_decode_without_json_raises_no_json():
+    with pytest.raises(ParseError) as error:
+        decode_json('I cannot help with that.')
+    assert error.value.kind == 'no_json'
+
+
+def test_truncated_output_is_salvaged_after_last_complete_value():
+    assert salvage_truncated('{"a": [1, 2], "b": "cut', 0) == '{"a": [1, 2]}'
+    value, salvaged = decode_json('{"questions": [{"text": "one"}, {"text": "tw')
+    assert salvaged
+    # The unfinished question is closed empty, and QuestionList then drops it
+    assert value == {'questions': [{'text': 'one'}, {}]}
+
+
+def test_complete_json_is_not_salvaged():
+    assert salvage_truncated('{"a": 1}', 0) is None
+
+
+def test_question_list_drops_invalid_questions():
+    content = json.dumps([GOOD_QUESTION, {'text': 'Short?', 'category': 'technical'}, 'not a question'])
+    questions = parse_llm_output(content, QuestionList)
+    assert [q.text for q in questions.questions] == [GOOD_QUESTION['text']]
+
+
+def test_question_list_without_valid_questions_raises():
+    with pytest.raises(ParseError) as error:
+        parse_llm_output('[{"text": "Short?"}]', QuestionList)
+    assert error.value.kind == 'schema'
+
+
+def test_combined_analysis_keeps_analysis_when_a_question_is_invalid():
+    content = json.dumps({'analysis': ANALYSIS,
+                          'questions': [GOOD_QUESTION, {'text': 'Why?', 'category': 'behavioral'}, {'category': 'x'}]})
+    result = parse_llm_output(content, CombinedAnalysis).to_dict()
+    assert result['analysis']['match_analysis']['missing_skills'] == ['Kubernetes']
+    assert [q['text'] for q in result['questions']] == [GOOD_QUESTION['text']]
+
+
+def test_combined_analysis_requires_valid_analysis():
+    content = json.dumps({'analysis': {'candidate_profile': {}}, 'questions': [GOOD_QUESTION]})
+    with pytest.raises(ParseError):
+        parse_llm_output(content, CombinedAnalysis)
+
+
+def test_combined_analysis_limits_questions():
+    content = json.dumps({'analysis': ANALYSIS, 'questions': [GOOD_QUESTION] * 4})
+    assert len(parse_llm_output(content, CombinedAnalysis).to_dict(2)['questions']) == 2
+
+
+def test_star_analysis_fills_missing_components():
+    content = json.dumps({'star_breakdown': {'situation': {'content': 'A legacy billing system'}},
+                          'strengths': ['Specific', ' ']})
+    star = parse_llm_output(content, StarAnalysis)
+    assert star.star_breakdown['situation'].present
+    assert star.star_breakdown['situation'].quality == 'adequate'
+    assert not star.star_breakdown['result'].present
+    assert star.strengths == ['Specific']
+
+
+def test_final_evaluation_rejects_non_numeric_score():
+    with pytest.raises(ParseError) as error:
+        parse_llm_output('{"overall_score": "high", "recommendation": "hire"}', FinalEvaluation)
+    assert error.value.kind == 'schema'
+
+
+def test_streaming_parser_gives_up_without_json():
+    parser = StreamingOutputParser(StarAnalysis, max_preamble=20)
+    with pytest.raises(ParseError) as error:
+        parser.feed('Sorry, ' * 10)
+    assert error.value.kind == 'no_json'
+
+
+def test_streaming_parser_finishes_like_parse_llm_output():
+    parser = StreamingOutputParser(StarAnalysis)
+    content = json.dumps({'star_breakdown': {'action': {'present': True, 'content': 'Rewrote the importer'}}})
+    for start in range(0, len(content), 7):
+        parser.feed(content[start:start + 7])
+    assert parser.finish().star_breakdown['action'].content == 'Rewrote the importer'
@@ -0,0 +1,90 @@
+from src.services.llm_providers import BedrockProvider
+
+JSON_MODE = {'type': 'json_object'}
+
+
+class FakeBedrockClient:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.requests = []
+
+    def converse(self, **request):
+        self.requests.append(request)
+        return {'output': {'message': {'content': [{'text': chunk} for chunk in self.chunks]}},
+                'usage': {'inputTokens': 12, 'outputTokens': 5, 'cacheReadInputTokens': 8}}
+
+    def converse_stream(self, **request):
+        self.requests.append(request)
+        events = [{'contentBlockDelta': {'delta': {'text': chunk}}} for chunk in self.chunks]
+        events.append({'metadata': {'usage': {'inputTokens': 12, 'outputTokens': 5}}})
+        return {'stream': events}
+
+
+def _stream(chunks, response_format=JSON_MODE):
+    usage = {}
+    provider = BedrockProvider(FakeBedrockClient(chunks))
+    text = ''.join(provider.stream([{'role': 'user', 'content': 'hi'}], 'model', response_format=response_format,
+                                   usage=usage))
+    return text, usage
+
+
+def test_openai_model_names_map_onto_bedrock_tiers():
+    provider = BedrockProvider(None, fast_model='nova-lite', smart_model='nova-pro')
+
+    assert provider.resolve_model('gpt-3.5-turbo') == 'nova-lite'
+    assert provider.resolve_model('gpt-4o-mini') == 'nova-lite'
+    assert provider.resolve_model('gpt-4-turbo-preview') == 'nova-pro'
+    assert provider.resolve_model('amazon.nova-micro-v1:0') == 'amazon.nova-micro-v1:0'
+
+
+def test_request_moves_system_messages_and_asks_for_json():
+    client = FakeBedrockClient(['{}'])
+    schema = {'type': 'object', 'required': ['questions']}
+    BedrockProvider(client).complete(
+        [{'role': 'system', 'content': 'You are an interviewer.'}, {'role': 'user', 'content': 'hi'}],
+        'nova-pro', max_tokens=100, temperature=1.5,
+        response_format={'type': 'json_schema', 'json_schema': {'name': 'x', 'schema': schema}})
+
+    (request,) = client.requests
+    assert request['messages'] == [{'role': 'user', 'content': [{'text': 'hi'}]}]
+    assert request['system'][0] == {'text': 'You are an interviewer.'}
+    assert '{"type":"object","required":["questions"]}' in request['system'][1]['text']
+    assert request['inferenceConfig'] == {'maxTokens': 100, 'temperature': 1.0}
+
+
+def test_complete_strips_code_fences_in_json_mode():
+    provider = BedrockProvider(FakeBedrockClient(['```json\n{"a": 1}\n```']))
+
+    result = provider.complete([{'role': 'user', 'content': 'hi'}], 'nova-pro', response_format=JSON_MODE)
+
+    assert result.content == '{"a": 1}'
+    # Bedrock's inputTokens leave out cache reads; prompt_tokens counts them like OpenAI does
+    assert result.usage == {'prompt_tokens': 20, 'completion_tokens': 5, 'cached_tokens': 8}
+
+
+def test_prompt_caching_marks_the_end_of_the_system_prompt():
+    client = FakeBedrockClient(['{}'])
+    messages = [{'role': 'system', 'content': 'Static instructions'}, {'role': 'user', 'content': 'hi'}]
+
+    BedrockProvider(client, prompt_caching=True).complete(messages, 'nova-pro')
+    BedrockProvider(client, prompt_caching=False).complete(messages, 'nova-pro')
+
+    cached, uncached = client.requests
+    assert cached['system'] == [{'text': 'Static instructions'}, {'cachePoint': {'type': 'default'}}]
+    assert uncached['system'] == [{'text': 'Static instructions'}]
+
+
+def test_stream_strips_code_fences_in_json_mode():
+    text, usage = _stream(['``', '`js', 'on\n{"a": "x`', 'y"}', '\n`', '``\n'])
+    assert text == '{"a": "x`y"}'
+    assert usage['completion_tokens'] == 5
+
+
+def test_stream_passes_unfenced_json_through():
+    text, usage = _stream(['{"a"', ': 1}'])
+    assert text == '{"a": 1}'
+    assert usage['completion_tokens'] == 5
+
+
+def test_stream_keeps_fences_outside_json_mode():
+    assert _stream(['```\ncode\n```'], response_format=None)[0] == '```\ncode\n```'
@@ -0,0 +1,88 @@
+import json
+import random
+
+import pytest
+
+from src.services.llm_fixtures import FixtureRecorder, fixture_key, load_fixtures
+from src.services.mock_llm_server import LatencyModel, MockLLMConfig, create_mock_llm_app
+
+MESSAGES = [{'role': 'system', 'content': 'Respond with JSON only.'},
+            {'role': 'user', 'content': 'Analyze this resume and job listing'}]
+
+
+def _client(**config):
+    return create_mock_llm_app(MockLLMConfig(seed=7, **config)).test_client()
+
+
+def _complete(client, **body):
+    return client.post('/v1/chat/completions', json={'model': 'gpt-4o-mini', 'messages': MESSAGES, **body})
+
+
+def test_recorded_fixture_is_replayed_for_the_same_request(tmp_path):
+    path = str(tmp_path / 'fixtures.jsonl')
+    recorder = FixtureRecorder(path)
+    recorder.record('gpt-4o-mini', MESSAGES, '{"recorded": true}')
+    recorder.record('gpt-4o-mini', MESSAGES, None)
+    assert load_fixtures(path) == {fixture_key('gpt-4o-mini', MESSAGES): '{"recorded": true}'}
+
+    client = _client(fixtures_path=path)
+    body = _complete(client).get_json()
+    assert body['choices'][0]['message']['content'] == '{"recorded": true}'
+    assert body['usage']['completion_tokens'] > 0
+
+    other = _complete(client, model='gpt-4o').get_json()
+    assert other['choices'][0]['message']['content'] != '{"recorded": true}'
+    stats = client.get('/mock/stats').get_json()['stats']
+    assert (stats['fixture_hits'], stats['synthetic']) == (1, 1)
+
+
+def test_synthetic_content_matches_the_prompt_shape():
+    client = _client()
+    prompt = 'Write 3 questions. Return {"analysis": {...}, "questions": [...]}'
+
+    body = client.post('/v1/chat/completions', json={
+        'model': 'gpt-4o', 'messages': [{'role': 'user', 'content': prompt}]
+    }).get_json()
+
+    content = json.loads(body['choices'][0]['message']['content'])
+    assert set(content) == {'analysis', 'questions'}
+    assert len(content['questions']) == 3
+
+
+def test_streamed_chunks_rebuild_the_content():
+    client = _client()
+    blocking = json.loads(_complete(client).get_json()['choices'][0]['message']['content'])
+
+    lines = _complete(client, stream=True).get_data(as_text=True).split('\n\n')
+    events = [line[len('data: '):] for line in lines if line.startswith('data: ')]
+    assert events[-1] == '[DONE]'
+    pieces = [json.loads(event)['choices'][0]['delta'].get('content', '') for event in events[:-1]]
+    assert json.loads(''.join(pieces)) == blocking
+
+
+def test_injected_errors_use_the_configured_statuses():
+    client = _client(error_rate=1.0, error_statuses=(429,))
+
+    response = _complete(client)
+
+    assert response.status_code == 429
+    assert response.get_json()['error']['type'] == 'mock_error'
+
+
+def test_config_can_change_at_runtime():
+    client = _client()
+
+    assert client.post('/mock/config', json={'error_rate': 1, 'error_statuses': [503]}).status_code == 200
+    assert _complete(client).status_code == 503
+    assert client.post('/mock/config', json={'latency': 'gaussian:1'}).status_code == 400
+
+
+def test_latency_specs():
+    rng = random.Random(7)
+
+    assert LatencyModel('none').sample(rng) == 0.0
+    assert LatencyModel('fixed:0.25').sample(rng) == 0.25
+    assert 0.1 <= LatencyModel('uniform:0.1:0.2').sample(rng) <= 0.2
+    assert LatencyModel('normal:-5:0.1').sample(rng) == 0.0
+    with pytest.raises(ValueError):
+        LatencyModel('uniform:0.1')
@@ -0,0 +1,37 @@
+from src.services.prompt_budget import TRUNCATION_MARKER, PromptBuilder, count_tokens, truncate_to_tokens
+
+RESUME = ' '.join(f"Built service number {i} for the payments team." for i in range(200))
+
+
+def test_short_text_is_left_alone():
+    assert truncate_to_tokens('Hello there.', 50) == 'Hello there.'
+    assert truncate_to_tokens('Hello there.', 0) == ''
+
+
+def test_truncation_fits_and_ends_on_a_sentence():
+    cut = truncate_to_tokens(RESUME, 60)
+    assert count_tokens(cut) <= 60
+    assert cut.endswith('.' + TRUNCATION_MARKER)
+
+
+def test_lower_priority_sections_are_trimmed_first():
+    builder = PromptBuilder('test', budget_tokens=300)
+    sections = builder.add('question', 'Tell me about a project.', priority=3) \
+        .add('resume', RESUME, priority=1) \
+        .add('job', 'Senior backend engineer, Python and Kubernetes.', priority=2) \
+        .build()
+
+    assert sections['question'] == 'Tell me about a project.'
+    assert sections['job'].startswith('Senior backend engineer')
+    assert builder.report['sections']['resume']['truncated']
+    assert builder.report['total_tokens'] <= 300
+
+
+def test_max_and_min_tokens_per_section():
+    builder = PromptBuilder('test', budget_tokens=40)
+    sections = builder.add('resume', RESUME, priority=1, min_tokens=30) \
+        .add('notes', RESUME, priority=2, max_tokens=20) \
+        .build()
+    assert count_tokens(sections['notes']) <= 20
+    assert count_tokens(sections['resume']) <= 30
+    assert builder.report['sections']['resume']['tokens'] > 0
@@ -0,0 +1,38 @@
+from src.services.ai_service_enhanced import EnhancedAIService
+from src.services.prompt_budget import count_tokens
+from src.services.prompt_templates import PromptTemplate
+
+TEMPLATE = PromptTemplate(
+    'evaluate_response',
+    instructions="You are an interviewer. Score the answer.",
+    output_format='JSON format: {"score": number}',
+    delta="Question: {question}\nAnswer: {answer}",
+    context_label='Interview context'
+)
+
+
+def test_static_parts_form_the_system_message():
+    system, user = TEMPLATE.messages(question='Why us?', answer='Because.')
+
+    assert system == {'role': 'system',
+                      'content': 'You are an interviewer. Score the answer.\n\nJSON format: {"score": number}'}
+    assert user == {'role': 'user', 'content': 'Question: Why us?\nAnswer: Because.'}
+    assert TEMPLATE.static_tokens == count_tokens(system['content'])
+
+
+def test_context_comes_before_the_per_call_delta():
+    _, user = TEMPLATE.messages('Role: Backend Engineer', question='Why us?', answer='Because.')
+
+    assert user['content'] == 'Interview context:\nRole: Backend Engineer\n\nQuestion: Why us?\nAnswer: Because.'
+
+
+def test_star_prompts_share_a_prefix_across_calls():
+    service = EnhancedAIService()
+    first = service._star_messages('Tell me about a deadline', 'We shipped early.', 'Role: Backend Engineer')
+    second = service._star_messages('Describe a conflict', 'I talked to them.', 'Role: Backend Engineer')
+
+    assert first[0] == second[0]
+    user = first[1]['content']
+    assert user.index('Role: Backend Engineer') < user.index('Tell me about a deadline') < user.index('We shipped early.')
+    assert 'We shipped early.' not in first[0]['content']
+    assert first[1]['content'] != second[1]['content']
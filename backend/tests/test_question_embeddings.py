@@ -0,0 +1,34 @@
+import pytest
+
+from src.services.question_embeddings import SemanticQuestionIndex, embed_texts
+from src.services.question_index import QuestionIndex, match_question
+
+QUESTIONS = [
+    (1, 'Tell me about a time you handled a difficult stakeholder.'),
+    (2, 'How do you prioritize competing deadlines on a project?'),
+    (3, 'Describe the architecture of the payments platform you built.'),
+    (4, 'Tell me about a challenging situation at work.')
+]
+
+
+def test_semantic_index_catches_a_paraphrase():
+    lexical, semantic = QuestionIndex(QUESTIONS), SemanticQuestionIndex.from_texts(QUESTIONS)
+    best, _, method = match_question(lexical, semantic, 'what was the design of the payment platform')
+    assert (best['key'], method) == (3, 'semantic')
+
+
+def test_semantic_close_call_is_left_unmatched():
+    questions = [(1, 'Describe a project you led'), (2, 'Describe a project you joined')]
+    best, matches = SemanticQuestionIndex.from_texts(questions).best_match('describe a project')
+    assert best is None
+    assert len(matches) == 2
+
+
+def test_embeddings_are_normalized():
+    semantic = SemanticQuestionIndex.from_texts(QUESTIONS)
+    for row in semantic.matrix:
+        assert float(row @ row) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_text_without_content_terms_embeds_to_zeros():
+    assert not embed_texts(['So, um, what about you?']).any()
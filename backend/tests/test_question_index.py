@@ -0,0 +1,56 @@
+from src.models.interview import db, Question
+from src.services.question_index import QuestionIndex, QuestionIndexStore
+from src.services.question_terms import content_terms
+
+QUESTIONS = [
+    (1, 'Tell me about a time you handled a difficult stakeholder.'),
+    (2, 'How do you prioritize competing deadlines on a project?'),
+    (3, 'Describe the architecture of the payments platform you built.'),
+    (4, 'Tell me about a challenging situation at work.')
+]
+
+
+def test_content_terms_drop_stopwords_and_fold_endings():
+    assert content_terms("Tell me about the challenges you've faced") == ['tell', 'challeng', 'faced']
+    assert content_terms('Challenging, challenged') == ['challeng', 'challeng']
+    assert content_terms('three projects') == ['3', 'project']
+
+
+def test_exact_question_matches_with_full_confidence():
+    best, matches = QuestionIndex(QUESTIONS).best_match('How do you prioritize competing deadlines on a project?')
+    assert best['key'] == 2
+    assert best['exact_match'] and best['confidence'] == 1.0
+    assert matches[0]['key'] == 2
+
+
+def test_partial_question_matches_by_coverage():
+    best, _ = QuestionIndex(QUESTIONS).best_match('so how would you prioritize deadlines that compete')
+    assert best['key'] == 2
+    assert 0.5 <= best['confidence'] < 1.0
+
+
+def test_one_shared_word_is_not_a_match():
+    best, matches = QuestionIndex(QUESTIONS).best_match('Let me tell you about lunch')
+    assert best is None
+    assert all(m['confidence'] <= 0.3 for m in matches)
+
+
+def test_search_returns_top_k_best_first():
+    matches = QuestionIndex(QUESTIONS).search('tell me about a difficult situation', k=2)
+    assert len(matches) == 2
+    assert matches[0]['score'] >= matches[1]['score']
+
+
+def test_store_rebuilds_when_questions_change(interview):
+    store = QuestionIndexStore()
+    db.session.add(Question(interview_id=interview.id, text=QUESTIONS[0][1]))
+    db.session.commit()
+    first, _ = store.get(interview.id)
+    assert store.get(interview.id)[0] is first
+    assert store.builds == 1
+
+    db.session.add(Question(interview_id=interview.id, text=QUESTIONS[1][1]))
+    db.session.commit()
+    best, _, method = store.match(interview.id, QUESTIONS[1][1])
+    assert store.builds == 2
+    assert method == 'lexical' and db.session.get(Question, best['key']).text == QUESTIONS[1][1]
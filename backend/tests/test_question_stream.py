@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from src.models.interview import db, Question
+from src.services.question_embeddings import SemanticQuestionIndex
+from src.services.question_index import QuestionIndex
+from src.services.question_stream import TranscriptStreamStore, TranscriptWindow
+
+QUESTIONS = [
+    (1, 'Tell me about a time you handled a difficult stakeholder.'),
+    (2, 'How do you prioritize competing deadlines on a project?'),
+    (3, 'Describe the architecture of the payments platform you built.')
+]
+
+
+def _window(window_terms=40):
+    return TranscriptWindow(QuestionIndex(QUESTIONS), SemanticQuestionIndex.from_texts(QUESTIONS), window_terms)
+
+
+def _feed(window, chunks):
+    events = []
+    for chunk in chunks:
+        events.extend(window.feed(chunk))
+    return events
+
+
+def test_question_spoken_across_chunks_is_detected_once():
+    window = _window()
+    events = _feed(window, ['So, to start, how do you prior', 'itize competing dead', 'lines on a project? '])
+    assert [(e['key'], e['event'], e['match_method']) for e in events] == [(2, 'question_detected', 'lexical')]
+
+    # Asked again later in the interview, it is not reported a second time
+    assert _feed(window, ['Again: how do you prioritize competing deadlines on a project? ']) == []
+
+
+def test_trailing_word_waits_for_the_next_chunk_or_final():
+    window = _window()
+    assert window.feed('Next one: how do you prior') == []
+    assert window.pending == 'prior'
+    events = window.feed('itize competing deadlines', final=True)
+    assert [e['key'] for e in events] == [2]
+    assert window.pending == ''
+
+
+def test_window_is_cleared_after_a_detection():
+    window = _window()
+    _feed(window, ['Tell me about a time you handled a difficult stakeholder. '])
+    assert len(window.terms) == 0
+    assert window.norm2 == 0.0
+
+
+def test_small_talk_is_not_detected():
+    window = _window()
+    assert _feed(window, ['Thanks for joining today, ', 'can you hear me okay? ', 'Great, the weather is nice. ']) == []
+
+
+def test_window_keeps_only_the_latest_terms():
+    window = _window(window_terms=5)
+    _feed(window, ['alpha beta gamma delta epsilon zeta eta theta iota kappa '])
+    assert list(window.terms) == ['zeta', 'eta', 'theta', 'iota', 'kappa']
+
+
+def test_incremental_state_matches_a_recomputation():
+    window = _window(window_terms=8)
+    words = ('handled difficult architecture payments platform deadlines competing stakeholder project '
+             'prioritize built describe weather team').split()
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        assert window.feed(' '.join(rng.choice(words, size=3)) + ' ') is not None
+        vector = window.vector
+        assert window.norm2 == pytest.approx(float(vector @ vector), abs=1e-6)
+        np.testing.assert_allclose(window.dots, window.semantic.matrix.astype(np.float64) @ vector, atol=1e-6)
+        for doc, covered in window.covered.items():
+            spoken = [t for t in window.counts if any(d == doc for d, _ in window.lexical.postings(t))]
+            assert covered == pytest.approx(sum(window.lexical.idf(t) for t in spoken), abs=1e-9)
+            assert window.hits[doc] == len(spoken)
+
+
+def test_store_marks_streams_apart_and_resets(interview):
+    db.session.add_all([Question(interview_id=interview.id, text=text, order_index=i)
+                        for i, (_, text) in enumerate(QUESTIONS)])
+    db.session.commit()
+    streams = TranscriptStreamStore()
+
+    events, info = streams.feed(interview.id, 'a', 'How do you prioritize competing deadlines on a project? ')
+    assert len(events) == 1 and info['detections'] == 1
+    question = db.session.get(Question, events[0]['key'])
+    assert question.text.startswith('How do you prioritize')
+
+    # Another stream of the same interview has its own state
+    events, _ = streams.feed(interview.id, 'b', 'How do you prioritize competing deadlines on a project? ')
+    assert len(events) == 1
+
+    streams.reset(interview.id, 'a')
+    assert streams.stats()['active_streams'] == 1
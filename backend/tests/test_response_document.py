@@ -0,0 +1,59 @@
+from src.services.response_document import ResponseDocument, shift_spans
+
+TEXT = ("When I joined, the team had no tests. I was assigned to fix that. "
+        "I created a test harness and led the rollout. The outcome was fewer incidents.")
+
+
+def test_spans_slice_back_to_the_sentences():
+    document = ResponseDocument(TEXT)
+
+    assert [document.slice(span) for span in document.sentences] == [
+        'When I joined, the team had no tests',
+        'I was assigned to fix that',
+        'I created a test harness and led the rollout',
+        'The outcome was fewer incidents',
+    ]
+    assert all(TEXT[start:end] == document.slice((start, end)) for start, end in document.sentences)
+
+
+def test_components_refer_to_sentence_spans():
+    document = ResponseDocument(TEXT)
+
+    assert document.excerpt(document.component_spans('situation')) == 'When I joined, the team had no tests'
+    assert document.excerpt(document.component_spans('action')) == 'I created a test harness and led the rollout'
+    assert document.excerpt(document.component_spans('result')) == 'The outcome was fewer incidents'
+
+
+def test_component_and_summary_spans_are_limited():
+    text = 'The team grew. The team shipped. The team celebrated. The team rested.'
+    document = ResponseDocument(text)
+
+    assert len(document.component_spans('situation')) == 2
+    assert len(document.component_spans('situation', limit=3)) == 3
+    assert [document.slice(span) for span in document.summary_spans()] == [
+        'The team grew', 'The team shipped', 'The team celebrated'
+    ]
+
+
+def test_words_are_counted_in_place():
+    document = ResponseDocument(TEXT)
+
+    assert document.word_count == len(TEXT.split())
+    assert document.count_words(document.sentences[1]) == 6
+
+
+def test_missing_component_has_no_excerpt():
+    document = ResponseDocument('Nothing to see here')
+
+    assert document.component_spans('result') == []
+    assert document.excerpt([]) is None
+
+
+def test_shifted_delta_spans_slice_the_full_transcript():
+    earlier = 'We had a deadline. '
+    delta = 'I decided to cut scope. It worked.'
+    document = ResponseDocument(delta)
+    full_text = earlier + delta
+
+    shifted = shift_spans(document.sentences, len(earlier))
+    assert [full_text[start:end] for start, end in shifted] == ['I decided to cut scope', 'It worked']
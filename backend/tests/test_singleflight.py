@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+from src.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    key = flight.make_key(1, 'analyze', 'resume', 'job')
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'questions': ['q1']}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do(key, work)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flight.do(key, work)))
+    follower.start()
+    deadline = time.monotonic() + 5
+    while flight.stats()['operations']['analyze']['coalesced'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True]
+    # Followers get their own copy of the result
+    assert results[0][0] == results[1][0] and results[0][0] is not results[1][0]
+
+
+def test_sequential_calls_run_again_and_errors_propagate():
+    flight = SingleFlight()
+    key = flight.make_key(1, 'complete')
+    assert flight.do(key, lambda: 1) == (1, False)
+    with pytest.raises(ValueError):
+        flight.do(key, lambda: (_ for _ in ()).throw(ValueError('boom')))
+    assert flight.stats() == {'in_flight': 0,
+                              'operations': {'complete': {'calls': 2, 'executed': 2, 'coalesced': 0, 'errors': 1}}}
+
+
+def test_keys_depend_on_inputs():
+    assert SingleFlight.make_key(1, 'op', 'a') != SingleFlight.make_key(1, 'op', 'b')
+    assert SingleFlight.make_key(1, 'op', {'x': 1, 'y': 2}) == SingleFlight.make_key(1, 'op', {'y': 2, 'x': 1})
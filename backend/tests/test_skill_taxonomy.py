@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from src.services.skill_taxonomy import SkillTaxonomy, skill_taxonomy
+
+
+def test_java_does_not_match_inside_javascript():
+    assert skill_taxonomy.skills('JavaScript and TypeScript on the frontend') == ['JavaScript', 'TypeScript']
+    assert skill_taxonomy.skills('Java services, javascript tooling') == ['Java', 'JavaScript']
+
+
+def test_synonyms_map_to_the_canonical_skill():
+    assert skill_taxonomy.skills('Deployed to k8s with kube manifests') == ['Kubernetes']
+    assert skill_taxonomy.skills('Written in golang') == ['Go']
+
+
+@pytest.mark.parametrize('text, skill', [
+    ('Wrote C++ drivers', 'C++'),
+    ('Built C# services', 'C#'),
+    ('APIs in Node.js', 'Node.js'),
+    ('Migrated to .NET', '.NET'),
+    ('Migrated to ASP.NET', '.NET'),
+])
+def test_punctuated_skill_names_are_single_tokens(text, skill):
+    assert skill_taxonomy.skills(text) == [skill]
+
+
+def test_punctuation_around_skills_is_not_part_of_them():
+    assert skill_taxonomy.skills('Skills: Python, C++. Node.js!') == ['Python', 'C++', 'Node.js']
+    assert skill_taxonomy.skills('Python.') == ['Python']
+
+
+def test_exact_terms_are_case_sensitive():
+    assert skill_taxonomy.skills('Backend services in Go and iOS apps in Swift') == ['Go', 'iOS', 'Swift']
+    assert skill_taxonomy.skills('Ready to go, with a swift turnaround') == []
+    assert skill_taxonomy.skills('Services on Node and node.js') == ['Node.js']
+
+
+def test_matches_carry_character_offsets():
+    text = 'Ran Kubernetes (k8s) clusters for C++ and Node.js teams'
+
+    matches = skill_taxonomy.find(text)
+
+    assert [(m.skill, text[m.start:m.end]) for m in matches] == [
+        ('Kubernetes', 'Kubernetes'), ('Kubernetes', 'k8s'), ('C++', 'C++'), ('Node.js', 'Node.js')
+    ]
+    assert matches[0].category == 'devops'
+
+
+def test_longest_synonym_wins():
+    taxonomy = SkillTaxonomy([
+        {'name': 'Machine Learning', 'category': 'ml', 'synonyms': ['ml']},
+        {'name': 'Machine Vision', 'category': 'ml'},
+        {'name': 'Learning', 'category': 'practice'},
+    ])
+
+    assert taxonomy.skills('machine learning and machine vision') == ['Machine Learning', 'Machine Vision']
+    assert taxonomy.skills('Machine  learning') == ['Machine Learning']
+
+
+def test_skills_are_distinct_and_filterable_by_category():
+    text = 'Python, Agile, python again, PostgreSQL'
+
+    assert skill_taxonomy.skills(text) == ['Python', 'Agile', 'PostgreSQL']
+    assert skill_taxonomy.skills(text, categories=['database']) == ['PostgreSQL']
+
+
+def test_load_accepts_a_list_or_a_skills_object(tmp_path):
+    entries = [{'name': 'Elixir', 'category': 'language', 'synonyms': ['ex']}]
+    as_list = tmp_path / 'list.json'
+    as_list.write_text(json.dumps(entries))
+    as_object = tmp_path / 'object.json'
+    as_object.write_text(json.dumps({'skills': entries}))
+
+    for path in (as_list, as_object):
+        taxonomy = SkillTaxonomy.load(str(path))
+        assert len(taxonomy) == 1
+        assert taxonomy.skills('Phoenix on Elixir') == ['Elixir']
+
+
+def test_entries_need_a_name():
+    with pytest.raises(ValueError):
+        SkillTaxonomy([{'name': 'Rust'}, {'category': 'language'}])
@@ -0,0 +1,50 @@
+from src.services.star_keywords import StarKeywordMatcher, star_matcher
+
+TEXT = ("  Our team had a hard deadline.  My goal was to ship the migration!"
+        " I decided to split the work... It saved two weeks?  ")
+
+
+def test_sentence_offsets_slice_back_to_each_sentence():
+    sentences = list(star_matcher.sentences(TEXT))
+
+    assert [TEXT[start:end] for start, end, _ in sentences] == [
+        'Our team had a hard deadline',
+        'My goal was to ship the migration',
+        'I decided to split the work',
+        'It saved two weeks',
+    ]
+
+
+def test_sentences_are_tagged_with_their_components():
+    components = [found for _, _, found in star_matcher.sentences(TEXT)]
+
+    assert components == [{'situation'}, {'task'}, {'action'}, {'result'}]
+
+
+def test_matching_is_case_insensitive_on_whole_words_with_plurals():
+    (_, _, found), = star_matcher.sentences('RESULTS came from two Teams')
+    assert found == {'result', 'situation'}
+
+    # 'timeline' and 'ledger' contain the keywords 'time' and 'led' but are other words
+    (_, _, found), = star_matcher.sentences('We kept the timeline and the ledger')
+    assert found == frozenset()
+
+
+def test_keyword_shared_by_components_tags_all_of_them():
+    matcher = StarKeywordMatcher({'situation': ('project',), 'action': ('project', 'built')})
+
+    (_, _, found), = matcher.sentences('The project')
+    assert found == {'situation', 'action'}
+    assert matcher.components == ('situation', 'action')
+
+
+def test_longer_keywords_win_over_their_prefixes():
+    matcher = StarKeywordMatcher({'task': ('role',), 'result': ('roles',)})
+
+    (_, _, found), = matcher.sentences('Two roles')
+    assert found == {'result'}
+
+
+def test_blank_text_has_no_sentences():
+    assert list(star_matcher.sentences('')) == []
+    assert list(star_matcher.sentences('  ...  !? ')) == []
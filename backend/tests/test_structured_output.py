@@ -0,0 +1,57 @@
+from src.services.structured_output import (
+    COMBINED_ANALYSIS_SCHEMA, response_format_for, supports_json_schema, validate_schema
+)
+
+QUESTION = {'text': 'Tell me about the billing migration you led', 'category': 'behavioral'}
+ANALYSIS = {
+    'candidate_profile': {'key_skills': ['Python']},
+    'job_requirements': {'required_skills': ['Python', 'Kubernetes']},
+    'match_analysis': {'missing_skills': ['Kubernetes']},
+}
+
+
+def test_valid_combined_output_has_no_errors():
+    assert validate_schema({'analysis': ANALYSIS, 'questions': [QUESTION]}, COMBINED_ANALYSIS_SCHEMA) == []
+
+
+def test_errors_name_the_offending_path():
+    result = {
+        'analysis': {**ANALYSIS, 'candidate_profile': {'key_skills': 'Python'}},
+        'questions': [QUESTION, {'text': 'Why?', 'category': 'behavioral'}, {'category': 'technical'}],
+    }
+
+    assert validate_schema(result, COMBINED_ANALYSIS_SCHEMA) == [
+        '$.analysis.candidate_profile.key_skills: expected array, got str',
+        '$.questions[1].text: shorter than 10 characters',
+        "$.questions[2]: missing required property 'text'",
+    ]
+
+
+def test_missing_and_empty_sections_are_rejected():
+    assert validate_schema({'analysis': ANALYSIS, 'questions': []}, COMBINED_ANALYSIS_SCHEMA) == [
+        '$.questions: fewer than 1 items'
+    ]
+    assert validate_schema({'questions': [QUESTION]}, COMBINED_ANALYSIS_SCHEMA) == [
+        "$: missing required property 'analysis'"
+    ]
+
+
+def test_null_optional_properties_are_allowed_but_booleans_are_not_numbers():
+    assert validate_schema({'analysis': {**ANALYSIS, 'match_analysis': {'missing_skills': None}},
+                            'questions': [QUESTION]}, COMBINED_ANALYSIS_SCHEMA) == []
+    assert validate_schema(True, {'type': 'number'}) == ['$: expected number, got bool']
+    assert validate_schema('senior', {'type': 'string', 'enum': ['junior', 'mid']}) == [
+        "$: 'senior' is not one of ['junior', 'mid']"
+    ]
+
+
+def test_json_schema_mode_only_for_models_that_support_it():
+    assert supports_json_schema('gpt-4o-mini')
+    assert not supports_json_schema('gpt-4-turbo-preview')
+
+    assert response_format_for('gpt-4-turbo-preview', 'combined_analysis', COMBINED_ANALYSIS_SCHEMA) == {
+        'type': 'json_object'
+    }
+    strict = response_format_for('gpt-4o', 'combined_analysis', COMBINED_ANALYSIS_SCHEMA)
+    assert strict['type'] == 'json_schema'
+    assert strict['json_schema'] == {'name': 'combined_analysis', 'schema': COMBINED_ANALYSIS_SCHEMA, 'strict': False}
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from src.services.telemetry import Counter, Histogram, Telemetry
+
+
+def _lines(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_label_values_are_escaped():
+    counter = Counter('ai_test_total', 'Test counter', ('route', 'operation'))
+    counter.inc(('say "hi"', 'back\\slash\nnewline'), 2)
+
+    assert counter.render().splitlines() == [
+        '# HELP ai_test_total Test counter',
+        '# TYPE ai_test_total counter',
+        'ai_test_total{route="say \\"hi\\"",operation="back\\\\slash\\nnewline"} 2',
+    ]
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    histogram = Histogram('latency_seconds', 'Latency', ('route',), (0.5, 0.1, 1.0))
+    for value in (0.05, 0.3, 0.3, 2.0):
+        histogram.observe(('analyze',), value)
+
+    assert _lines(histogram.render(), 'latency_seconds') == [
+        'latency_seconds_bucket{route="analyze",le="0.1"} 1',
+        'latency_seconds_bucket{route="analyze",le="0.5"} 3',
+        'latency_seconds_bucket{route="analyze",le="1"} 3',
+        'latency_seconds_bucket{route="analyze",le="+Inf"} 4',
+        'latency_seconds_sum{route="analyze"} 2.65',
+        'latency_seconds_count{route="analyze"} 4',
+    ]
+
+
+def test_cost_uses_the_longest_matching_price_prefix():
+    telemetry = Telemetry(prices={'gpt-4o': (2.50, 10.00), 'gpt-4o-mini': (0.15, 0.60)})
+
+    assert telemetry.cost('gpt-4o-mini-2024-07-18', {'prompt_tokens': 1_000_000}) == pytest.approx(0.15)
+    assert telemetry.cost('gpt-4o', {'completion_tokens': 1_000_000}) == pytest.approx(10.00)
+    assert telemetry.cost('unknown-model', {'prompt_tokens': 1_000_000}) == 0.0
+
+
+def test_llm_call_records_requests_tokens_and_cost():
+    telemetry = Telemetry(prices={'gpt-4o': (2.00, 8.00)})
+
+    @telemetry.instrumented('analyze_documents')
+    def analyze():
+        for _ in range(2):
+            telemetry.record_llm_call('openai', 'gpt-4o', time.perf_counter(), None,
+                                      {'prompt_tokens': 1000, 'completion_tokens': 500})
+
+    with telemetry.route_scope('interview.analyze_documents'):
+        analyze()
+    text = telemetry.render_prometheus()
+
+    labels = 'route="interview.analyze_documents",operation="analyze_documents",provider="openai",model="gpt-4o"'
+    assert f'llm_requests_total{{{labels},status="ok"}} 2' in text
+    assert f'llm_tokens_count{{{labels},kind="completion"}} 2' in text
+    cost_line, = _lines(text, 'llm_cost_usd_total{')
+    assert float(cost_line.rsplit(' ', 1)[1]) == pytest.approx(2 * 0.006)
+    assert ('ai_operation_duration_seconds_count{route="interview.analyze_documents",'
+            'operation="analyze_documents",outcome="llm"} 1') in text
+
+
+def test_cached_prompt_tokens_are_discounted(monkeypatch):
+    monkeypatch.setattr('src.services.telemetry.CACHED_PROMPT_PRICE_RATIO', 0.5)
+    telemetry = Telemetry(prices={'gpt-4o': (2.00, 8.00)})
+
+    cost = telemetry.cost('gpt-4o', {'prompt_tokens': 1_000_000, 'cached_tokens': 500_000})
+    assert cost == pytest.approx(1.50)
+
+
+def test_llm_call_records_cost_and_prompt_cache_counters():
+    telemetry = Telemetry(prices={'gpt-4o': (2.00, 8.00)})
+
+    @telemetry.instrumented('analyze_documents')
+    def analyze():
+        telemetry.record_llm_call('openai', 'gpt-4o', time.perf_counter(), None,
+                                  {'prompt_tokens': 1000, 'completion_tokens': 500, 'cached_tokens': 0})
+        telemetry.record_llm_call('openai', 'gpt-4o', time.perf_counter(), None,
+                                  {'prompt_tokens': 1000, 'completion_tokens': 500, 'cached_tokens': 1000})
+
+    with telemetry.route_scope('interview.analyze_documents'):
+        analyze()
+    text = telemetry.render_prometheus()
+
+    labels = 'route="interview.analyze_documents",operation="analyze_documents",provider="openai",model="gpt-4o"'
+    assert f'llm_requests_total{{{labels},status="ok"}} 2' in text
+    assert f'llm_prompt_cache_requests_total{{{labels},result="hit"}} 1' in text
+    assert f'llm_prompt_cache_requests_total{{{labels},result="miss"}} 1' in text
+    cost_line, = _lines(text, 'llm_cost_usd_total{')
+    assert float(cost_line.rsplit(' ', 1)[1]) == pytest.approx(0.006 + 0.005)
+    assert ('ai_operation_duration_seconds_count{route="interview.analyze_documents",'
+            'operation="analyze_documents",outcome="llm"} 1') in text
+
+
+def test_result_cache_hits_and_misses_are_counted():
+    telemetry = Telemetry()
+
+    @telemetry.instrumented('evaluate_response')
+    def evaluate(hit):
+        telemetry.note_cache(hit)
+
+    evaluate(True)
+    evaluate(False)
+    evaluate(False)
+    text = telemetry.render_prometheus()
+
+    assert 'ai_cache_lookups_total{route="none",operation="evaluate_response",result="hit"} 1' in text
+    assert 'ai_cache_lookups_total{route="none",operation="evaluate_response",result="miss"} 2' in text
+    assert 'ai_operation_duration_seconds_count{route="none",operation="evaluate_response",outcome="cache"} 1' in text
+    assert 'ai_operation_duration_seconds_count{route="none",operation="evaluate_response",outcome="local"} 2' in text
+
+
+def test_only_the_first_fallback_of_an_operation_is_counted():
+    telemetry = Telemetry()
+
+    @telemetry.instrumented('analyze_response_star')
+    def analyze():
+        telemetry.note_fallback(TimeoutError())
+        telemetry.note_fallback(reason='unavailable')
+
+    analyze()
+    fallbacks = _lines(telemetry.render_prometheus(), 'ai_fallbacks_total{')
+    assert fallbacks == ['ai_fallbacks_total{route="none",operation="analyze_response_star",reason="timeout"} 1']
+
+
+def test_disabled_telemetry_records_nothing():
+    telemetry = Telemetry(enabled=False)
+    telemetry.note_cache(True)
+    telemetry.record_llm_call('openai', 'gpt-4o', time.perf_counter(), None, {'prompt_tokens': 10})
+
+    assert not [line for line in telemetry.render_prometheus().splitlines() if not line.startswith('#')]
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Benchmark the AI routes offline against the local mock LLM server.
+
+Starts services/mock_llm_server.py on a random port, points the app's OpenAI
+clients at it (LLM_MOCK_URL) and times each AI route in-process. With --seed
+the injected latency and errors are the same on every run. The interviews it
+creates go to a throwaway SQLite database that is deleted afterwards, not to
+the development database.
+
+Examples:
+    python benchmark_ai_routes.py --iterations 20 --latency lognormal:-0.7:0.5 --seed 7
+    python benchmark_ai_routes.py --routes analyze,save_response --error-rate 0.1 --seed 1
+    python benchmark_ai_routes.py --fixtures recorded.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+RESUME_TEXT = """
+Jane Doe - Senior Software Engineer at TechCorp Inc. (2020-Present)
+- Led development of a microservices platform using Python and FastAPI
+- Reduced API response time by 40% through query optimization
+- Managed a team of 5 engineers on Project Phoenix
+Skills: Python, React, Docker, Kubernetes, PostgreSQL, AWS
+"""
+
+JOB_TEXT = """
+Senior Full Stack Engineer - InnovateTech Solutions
+Requirements: 5+ years of Python and React, microservices, AWS, Docker and Kubernetes.
+Responsibilities: design scalable backend services, mentor junior developers.
+"""
+
+ANSWER_TEXT = (
+    "At TechCorp our checkout API was timing out during peak traffic. My task was to bring p95 latency "
+    "under 200ms before the holiday sale. I profiled the service, added query batching and a Redis cache, "
+    "and rolled it out behind a feature flag. As a result p95 dropped from 900ms to 150ms and we handled "
+    "three times the traffic with no incidents."
+)
+
+ROUTES = ['analyze', 'analyze_live', 'analyze_live_stream', 'save_response', 'detect_question', 'complete']
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def create_interview(client, db, Document):
+    response = client.post('/api/interviews', json={
+        'interviewer_name': 'Bench', 'interviewer_email': 'bench@example.com',
+        'candidate_name': 'Jane Doe', 'position_title': 'Senior Full Stack Engineer'
+    })
+    interview_id = response.get_json()['interview']['id']
+    for document_type, text in (('resume', RESUME_TEXT), ('job_listing', JOB_TEXT)):
+        db.session.add(Document(interview_id=interview_id, document_type=document_type,
+                                filename=f'{document_type}.txt', file_path='', extracted_text=text))
+    db.session.commit()
+    return interview_id
+
+
+def run_route(name, client, interview_id, iteration):
+    """Call one route; returns (ok, time to first event or None)."""
+    if name == 'analyze':
+        response = client.post(f'/api/interviews/{interview_id}/analyze')
+    elif name == 'analyze_live':
+        response = client.post(f'/api/interviews/{interview_id}/analyze-live', json={
+            'question_id': iteration, 'question_text': 'Tell me about a performance problem you solved.',
+            'partial_response': ANSWER_TEXT
+        })
+    elif name == 'analyze_live_stream':
+        started = time.perf_counter()
+        response = client.post(f'/api/interviews/{interview_id}/analyze-live/stream', json={
+            'question_text': 'Tell me about a performance problem you solved.',
+            'partial_response': ANSWER_TEXT, 'include_deltas': False
+        }, buffered=False)
+        first_event = None
+        body = ''
+        for chunk in response.response:
+            if first_event is None:
+                first_event = time.perf_counter() - started
+            body += chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        response.close()
+        return response.status_code == 200 and 'event: complete' in body, first_event
+    elif name == 'save_response':
+        response = client.post(f'/api/interviews/{interview_id}/responses', json={
+            'question_id': None, 'question_text': f'Tell me about a performance problem you solved ({iteration}).',
+            'transcribed_text': ANSWER_TEXT
+        })
+    elif name == 'detect_question':
+        response = client.post(f'/api/interviews/{interview_id}/detect-question', json={
+            'spoken_text': 'Can you tell me about a challenging technical problem you solved?'
+        })
+    elif name == 'complete':
+        client.post(f'/api/interviews/{interview_id}/start')
+        response = client.post(f'/api/interviews/{interview_id}/complete')
+    else:
+        raise ValueError(f"Unknown route: {name}")
+    return response.status_code < 400, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AI routes against the mock LLM server')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--routes', default=','.join(ROUTES))
+    parser.add_argument('--latency', default='fixed:0.2', help="none | fixed:S | uniform:LO:HI | normal:MEAN:SD | lognormal:MU:SIGMA")
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--hang-seconds', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--fixtures', help='JSONL file recorded with LLM_RECORD_FIXTURES')
+    parser.add_argument('--keep-cache', action='store_true', help='do not clear the LLM cache between iterations')
+    args = parser.parse_args()
+
+    from src.services.mock_llm_server import MockLLMConfig, start_mock_llm_server
+    config = MockLLMConfig(latency=args.latency, token_delay=args.token_delay, error_rate=args.error_rate,
+                           timeout_rate=args.timeout_rate, hang_seconds=args.hang_seconds, seed=args.seed,
+                           fixtures_path=args.fixtures)
+    server, base_url = start_mock_llm_server(config)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    os.environ['LLM_MOCK_URL'] = base_url
+    os.environ.setdefault('LLM_CACHE_PERSISTENT', 'false')
+    print(f"Mock LLM server at {base_url} ({config.to_dict()})")
+
+    database_dir = tempfile.TemporaryDirectory(prefix='benchmark-db-')
+    os.environ['DEV_DATABASE_URL'] = f"sqlite:///{os.path.join(database_dir.name, 'benchmark.db')}"
+
+    # Import after LLM_MOCK_URL and DEV_DATABASE_URL are set so the client registry and database pick them up
+    from src.main import app
+    from src.models.interview import db, Document
+    from src.services.llm_cache import llm_cache
+
+    client = app.test_client()
+    results = {}
+    with app.app_context():
+        for name in args.routes.split(','):
+            timings, first_events, failures = [], [], 0
+            for iteration in range(args.iterations):
+                if not args.keep_cache:
+                    llm_cache.clear()
+                interview_id = create_interview(client, db, Document)
+                started = time.perf_counter()
+                try:
+                    ok, first_event = run_route(name, client, interview_id, iteration)
+                except Exception as e:
+                    print(f"[ERROR] {name}: {e}")
+                    ok, first_event = False, None
+                timings.append(time.perf_counter() - started)
+                if first_event is not None:
+                    first_events.append(first_event)
+                failures += 0 if ok else 1
+            results[name] = (timings, first_events, failures)
+
+    with urllib.request.urlopen(base_url.replace('/v1', '/mock/stats')) as response:
+        mock_stats = json.loads(response.read())['stats']
+    server.shutdown()
+    with app.app_context():
+        db.engine.dispose()
+    database_dir.cleanup()
+
+    print("\n" + "=" * 86)
+    print(f"{'route':<22}{'n':>4}{'fail':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}{'first evt':>12}")
+    print("=" * 86)
+    for name, (timings, first_events, failures) in results.items():
+        first = f"{statistics.median(first_events):.3f}" if first_events else '-'
+        print(f"{name:<22}{len(timings):>4}{failures:>6}{statistics.mean(timings):>10.3f}"
+              f"{percentile(timings, 50):>10.3f}{percentile(timings, 95):>10.3f}{max(timings):>10.3f}{first:>12}")
+    print("(seconds)")
+    print(f"Mock LLM: {mock_stats}")
+
+
+if __name__ == '__main__':
+    main()
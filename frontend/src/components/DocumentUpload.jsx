@@ -2,6 +2,28 @@ import React, { useState } from 'react';
 import { Upload, FileText, Link, CheckCircle, AlertCircle, Loader2, ArrowRight } from 'lucide-react';
 
 const API_BASE_URL = import.meta.env.PROD ? '/api' : 'http://localhost:5001/api';
+const JOB_POLL_INTERVAL_MS = 1500;
+const JOB_POLL_TIMEOUT_MS = 200000;
+
+// Poll a background job until it completes or fails
+const waitForJob = async (jobId) => {
+  const startedAt = Date.now();
+  while (Date.now() - startedAt < JOB_POLL_TIMEOUT_MS) {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    const response = await fetch(`${API_BASE_URL}/jobs/${jobId}`);
+    if (!response.ok) {
+      throw new Error('Job status unavailable');
+    }
+    const { job } = await response.json();
+    if (job.status === 'completed') {
+      return job;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Analysis failed');
+    }
+  }
+  throw new Error('Analysis timed out');
+};
 
 const DocumentUpload = ({ interview, onDocumentsUploaded }) => {
   const interviewId = interview?.id;
@@ -387,23 +409,25 @@ const DocumentUpload = ({ interview, onDocumentsUploaded }) => {
               }));
               
               try {
-                // Trigger analysis
-                const response = await fetch(`${API_BASE_URL}/interviews/${interviewId}/analyze`, {
+                // Trigger analysis as a background job; the LLM calls outlast a synchronous request
+                const response = await fetch(`${API_BASE_URL}/interviews/${interviewId}/analyze?async=true`, {
                   method: 'POST',
                   headers: {
                     'Content-Type': 'application/json',
                   }
                 });
                 
-                if (response.ok) {
-                  setUploadStatus(prev => ({
-                    ...prev,
-                    analyzing: { status: 'success', message: 'Analysis complete!' }
-                  }));
-                  setTimeout(() => onDocumentsUploaded(), 1000);
-                } else {
+                if (!response.ok) {
                   throw new Error('Analysis failed');
                 }
+                const { job } = await response.json();
+                await waitForJob(job.id);
+                
+                setUploadStatus(prev => ({
+                  ...prev,
+                  analyzing: { status: 'success', message: 'Analysis complete!' }
+                }));
+                setTimeout(() => onDocumentsUploaded(), 1000);
               } catch (error) {
                 setUploadStatus(prev => ({
                   ...prev,
@@ -279,6 +279,7 @@ const LiveInterview = ({ interview, onCompleteInterview }) => {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
+          question_id: questions[currentQuestionIndex]?.id,
           question_text: questions[currentQuestionIndex]?.text || '',
           partial_response: responseText
         })